@@ -1,7 +1,8 @@
-from ivviewer.cursor import IvcCursor, IvcCursors
-from ivviewer.curve import Curve, Point
+from ivviewer.cursor import ArrayCursors, IvcCursor, IvcCursors
+from ivviewer.curve import ArrayCurve, Curve, Point, StoragePolicy
 from ivviewer.ivcviewer import IvcViewer
 from ivviewer.window import Viewer
 
 
-__all__ = ["Curve", "IvcCursor", "IvcCursors", "IvcViewer", "Point", "Viewer"]
+__all__ = ["ArrayCurve", "ArrayCursors", "Curve", "IvcCursor", "IvcCursors", "IvcViewer", "Point", "StoragePolicy",
+           "Viewer"]
@@ -1,15 +1,68 @@
 """
-File with example how to use Viewer.
+File with example how to use Viewer. With command render the curves from CSV files are rendered to images without
+displaying windows:
+
+    python -m ivviewer render INPUT OUTPUT [--jobs N] [--format png] [--size 800x600] [--split]
+
+Files that cannot be rendered are reported to stderr, then the command exits with status 1.
 """
 
+import argparse
 import sys
+from typing import List, Optional, Tuple
 from PyQt5.QtGui import QColor
 from PyQt5.QtWidgets import QApplication
 from ivviewer.curve import Curve
+from ivviewer.render import find_curve_files, IMAGE_FORMATS, render_files
 from ivviewer.window import Viewer
 
 
-if __name__ == "__main__":
+def _parse_size(value: str) -> Tuple[int, int]:
+    """
+    :param value: size in format WIDTHxHEIGHT.
+    :return: width and height.
+    """
+
+    try:
+        width, height = (int(number) for number in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size '{value}', expected WIDTHxHEIGHT") from None
+    return width, height
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    """
+    :param args: command line arguments.
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m ivviewer", description="Viewer of IV curves")
+    subparsers = parser.add_subparsers(dest="command")
+    render_parser = subparsers.add_parser("render", help="render CSV files with IV curves to images")
+    render_parser.add_argument("input", help="CSV file or directory with CSV files")
+    render_parser.add_argument("output", help="directory for images")
+    render_parser.add_argument("-j", "--jobs", type=int, default=None,
+                               help="number of processes (default: number of CPUs)")
+    render_parser.add_argument("-f", "--format", default="png", choices=IMAGE_FORMATS,
+                               help="format of images (default: png)")
+    render_parser.add_argument("-s", "--size", type=_parse_size, default="800x600",
+                               help="size of images in pixels (default: 800x600)")
+    render_parser.add_argument("--split", action="store_true", help="render each curve to separate image")
+    parsed_args = parser.parse_args(args)
+
+    if parsed_args.command == "render":
+        errors = []
+        images = render_files(find_curve_files(parsed_args.input), parsed_args.output, parsed_args.jobs,
+                              parsed_args.format, parsed_args.size, parsed_args.split, errors)
+        print(f"{len(images)} images saved to {parsed_args.output}")
+        for file_name, error in errors:
+            print(f"Failed to render {file_name}: {error}", file=sys.stderr)
+        if errors:
+            sys.exit(1)
+    else:
+        show_example()
+
+
+def show_example() -> None:
     app = QApplication(sys.argv)
     window = Viewer()
     window.plot.set_scale(6.0, 15.0)
@@ -34,3 +87,7 @@ if __name__ == "__main__":
     window.resize(600, 600)
     window.show()
     app.exec()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+from PyQt5.QtGui import QColor
+from ivviewer.curve import ArrayCurve, Curve, PlotCurve
+
+
+DEFAULT_GRID_SIZE: int = 100  # number of voltages in common grid
+
+
+@dataclass
+class SortedCurves:
+    """
+    Points of several curves arranged for interpolation of all curves at once. Points of each curve are sorted by
+    voltage, and voltages are shifted by curve indexes so that the concatenated keys are monotonic and all curves are
+    searched with one np.searchsorted call. Sorting is the expensive part, so object can be created once and used for
+    many interpolations.
+    """
+
+    currents: np.ndarray  # currents of all curves sorted by curve index and voltage
+    keys: np.ndarray  # voltages shifted by curve indexes
+    lengths: np.ndarray  # number of finite points in each curve
+    shift: float  # shift between curves, it is larger than the range of voltages
+    v_min: float  # minimum voltage of all curves
+    v_range: float  # range of voltages of all curves
+    voltages: np.ndarray  # voltages of all curves sorted by curve index and voltage
+
+    @classmethod
+    def from_flat(cls, voltages: np.ndarray, currents: np.ndarray, lengths: np.ndarray) -> "SortedCurves":
+        """
+        :param voltages: concatenated voltages of curves;
+        :param currents: concatenated currents of curves;
+        :param lengths: number of points in each curve.
+        :return: sorted curves. Points with infinite or NaN values are skipped.
+        """
+
+        indexes = np.repeat(np.arange(lengths.size), lengths)
+        finite = np.logical_and(np.isfinite(voltages), np.isfinite(currents))
+        if not finite.all():
+            voltages, currents, indexes = voltages[finite], currents[finite], indexes[finite]
+            lengths = np.bincount(indexes, minlength=lengths.size)
+        if voltages.size == 0:
+            return cls(currents, voltages, lengths, 1.0, 0.0, 0.0, voltages)
+
+        order = np.lexsort((voltages, indexes))
+        voltages, currents = voltages[order], currents[order]
+        v_min = float(voltages.min())
+        v_range = float(voltages.max()) - v_min
+        shift = 2 * v_range + 1
+        return cls(currents, indexes[order] * shift + (voltages - v_min), lengths, shift, v_min, v_range, voltages)
+
+    def interpolate(self, grid: np.ndarray) -> np.ndarray:
+        """
+        :param grid: voltages at which currents are interpolated. Currents outside the voltage range of a curve are
+        equal to currents at its ends.
+        :return: array of interpolated currents with shape (number of curves, grid size). Currents of curves without
+        points are NaN.
+        """
+
+        grid = np.asarray(grid, dtype=np.float64)
+        result = np.full((self.lengths.size, grid.size), np.nan)
+        if self.voltages.size == 0:
+            return result
+
+        curve_indexes = np.arange(self.lengths.size)[:, np.newaxis]
+        queries = curve_indexes * self.shift + np.clip(grid - self.v_min, 0, self.v_range)[np.newaxis, :]
+        positions = np.searchsorted(self.keys, queries)
+
+        starts = (np.cumsum(self.lengths) - self.lengths)[:, np.newaxis]
+        ends = starts + self.lengths[:, np.newaxis] - 1
+        lower = np.clip(positions - 1, starts, ends)
+        upper = np.clip(positions, starts, ends)
+        delta = self.voltages[upper] - self.voltages[lower]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weights = np.where(delta > 0, (grid[np.newaxis, :] - self.voltages[lower]) / delta, 0)
+        weights = np.clip(weights, 0, 1)
+        values = self.currents[lower] + weights * (self.currents[upper] - self.currents[lower])
+        non_empty = self.lengths > 0
+        result[non_empty] = values[non_empty]
+        return result
+
+
+def _flatten_curves(curves: Sequence[Union[ArrayCurve, Curve]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    :param curves: curves of different lengths.
+    :return: concatenated voltages, concatenated currents and number of points in each curve.
+    """
+
+    lengths = np.array([len(curve.voltages) for curve in curves], dtype=np.int64)
+    if lengths.sum() == 0:
+        return np.empty(0), np.empty(0), lengths
+
+    voltages = np.concatenate([np.asarray(curve.voltages, dtype=np.float64) for curve in curves])
+    currents = np.concatenate([np.asarray(curve.currents, dtype=np.float64) for curve in curves])
+    return voltages, currents, lengths
+
+
+def _get_scores(reference: np.ndarray, resampled: np.ndarray, current_scale: Optional[float]) -> np.ndarray:
+    """
+    :param reference: currents of reference curve on grid;
+    :param resampled: currents of curves on grid;
+    :param current_scale: current by which difference is normalized.
+    :return: normalized root mean square differences.
+    """
+
+    if current_scale is None:
+        current_scale = np.ptp(reference)
+    if not current_scale:
+        current_scale = 1.0
+    return np.sqrt(np.mean((resampled - reference[np.newaxis, :]) ** 2, axis=1)) / abs(current_scale)
+
+
+def _resample_flat(voltages: np.ndarray, currents: np.ndarray, lengths: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """
+    :param voltages: concatenated voltages of curves;
+    :param currents: concatenated currents of curves;
+    :param lengths: number of points in each curve;
+    :param grid: voltages at which currents are interpolated.
+    :return: array of interpolated currents with shape (number of curves, grid size). Currents of curves without
+    points are NaN.
+    """
+
+    return SortedCurves.from_flat(voltages, currents, lengths).interpolate(grid)
+
+
+def _resample_reference(voltages: np.ndarray, currents: np.ndarray, grid_size: int
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param voltages: voltages of reference curve;
+    :param currents: currents of reference curve;
+    :param grid_size: number of voltages in grid.
+    :return: grid of voltages covering the reference curve and currents of reference curve on grid.
+    """
+
+    voltages = np.asarray(voltages, dtype=np.float64)
+    currents = np.asarray(currents, dtype=np.float64)
+    finite = np.isfinite(voltages) & np.isfinite(currents)
+    if not finite.any():
+        raise ValueError("Reference curve has no finite points")
+    if grid_size < 2:
+        raise ValueError("Grid must have at least 2 points")
+
+    grid = np.linspace(voltages[finite].min(), voltages[finite].max(), grid_size)
+    lengths = np.array([voltages.size], dtype=np.int64)
+    return grid, _resample_flat(voltages, currents, lengths, grid)[0]
+
+
+def color_curves_by_score(curves: Sequence[PlotCurve], scores: Sequence[float], tolerance: float) -> None:
+    """
+    Function colors curves according to their scores: from green for identical curves to red for curves with score
+    not less than tolerance. Curves with unknown (NaN) score are gray.
+    :param curves: curves to be colored;
+    :param scores: scores of curves;
+    :param tolerance: score at which curve is considered to be completely different.
+    """
+
+    if len(curves) != len(scores):
+        raise ValueError("Number of curves and number of scores must be the same")
+    if tolerance <= 0:
+        raise ValueError("Tolerance must be positive")
+
+    ratios = np.clip(np.asarray(scores, dtype=np.float64) / tolerance, 0, 1)
+    for curve, ratio in zip(curves, ratios):
+        if np.isnan(ratio):
+            color = QColor(128, 128, 128, 200)
+        else:
+            color = QColor.fromHsvF((1 - ratio) / 3, 1, 0.8, 0.8)
+        curve.set_curve_params(color)
+
+
+def compare_arrays(reference_voltages: np.ndarray, reference_currents: np.ndarray, voltages: np.ndarray,
+                   currents: np.ndarray, grid_size: int = DEFAULT_GRID_SIZE, current_scale: Optional[float] = None
+                   ) -> np.ndarray:
+    """
+    Function compares curves of the same length given as arrays with reference curve.
+    :param reference_voltages: voltages of reference curve;
+    :param reference_currents: currents of reference curve;
+    :param voltages: array of voltages with shape (number of curves, number of points);
+    :param currents: array of currents with shape (number of curves, number of points);
+    :param grid_size: number of voltages in common grid;
+    :param current_scale: current by which difference is normalized. By default, peak-to-peak current of reference
+    curve is used.
+    :return: scores of curves (see compare_curves).
+    """
+
+    voltages = np.asarray(voltages, dtype=np.float64)
+    currents = np.asarray(currents, dtype=np.float64)
+    if voltages.ndim != 2 or voltages.shape != currents.shape:
+        raise ValueError("Voltages and currents must be two-dimensional arrays of the same shape")
+
+    grid, reference = _resample_reference(reference_voltages, reference_currents, grid_size)
+    lengths = np.full(voltages.shape[0], voltages.shape[1], dtype=np.int64)
+    resampled = _resample_flat(voltages.ravel(), currents.ravel(), lengths, grid)
+    return _get_scores(reference, resampled, current_scale)
+
+
+def compare_curves(reference: Union[ArrayCurve, Curve], curves: Sequence[Union[ArrayCurve, Curve]],
+                   grid_size: int = DEFAULT_GRID_SIZE, current_scale: Optional[float] = None) -> np.ndarray:
+    """
+    Function compares curves with reference curve. Curves are resampled onto common grid of voltages covering the
+    reference curve, then root mean square difference of currents is divided by current scale. So score is 0 for
+    identical curves and grows with difference.
+    :param reference: reference curve;
+    :param curves: curves to be compared;
+    :param grid_size: number of voltages in common grid;
+    :param current_scale: current by which difference is normalized. By default, peak-to-peak current of reference
+    curve is used.
+    :return: scores of curves. Score of empty curve is NaN.
+    """
+
+    grid, reference_currents = _resample_reference(reference.voltages, reference.currents, grid_size)
+    resampled = _resample_flat(*_flatten_curves(curves), grid)
+    return _get_scores(reference_currents, resampled, current_scale)
+
+
+def resample_curves(curves: Sequence[Union[ArrayCurve, Curve]], grid: np.ndarray) -> np.ndarray:
+    """
+    Function interpolates currents of curves at given voltages. Points of each curve are sorted by voltage, currents
+    outside the voltage range of a curve are equal to currents at its ends.
+    :param curves: curves to be resampled;
+    :param grid: voltages at which currents are interpolated.
+    :return: array of currents with shape (number of curves, grid size).
+    """
+
+    return _resample_flat(*_flatten_curves(curves), np.asarray(grid, dtype=np.float64))
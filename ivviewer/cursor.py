@@ -1,13 +1,33 @@
-from typing import List, Optional, Union
+from typing import List, Optional, Sequence, Tuple, Union
 import numpy as np
 from PyQt5.QtCore import QPoint, QPointF, QRectF, Qt
 from PyQt5.QtGui import QBrush, QColor, QFont, QPen, QPainter
-from qwt import QwtPlot, QwtPlotMarker, QwtText
+from qwt import QwtPlot, QwtPlotItem, QwtPlotMarker, QwtText
+from qwt.plot_curve import array2d_to_qpolygonf
 from qwt.scale_map import QwtScaleMap
 from ivviewer.curve import Point
+from ivviewer.preprocessing import get_scale_key
 
 
-class IvcCursor(QwtPlotMarker):
+class _OverlayItem:
+    """
+    Mixin for plot items of cursors. If the plot draws cursors on overlay, changes of cursors do not invalidate cached
+    image of curves.
+    """
+
+    def itemChanged(self) -> None:
+        """
+        Method notifies the plot that the item has changed.
+        """
+
+        refresh_overlay = getattr(self.plot(), "refresh_overlay", None)
+        if refresh_overlay is not None:
+            refresh_overlay()
+        else:
+            super().itemChanged()
+
+
+class IvcCursor(_OverlayItem, QwtPlotMarker):
     """
     This class is cursor with horizontal and vertical lines, it shows coordinates for selected point.
     """
@@ -19,21 +39,26 @@ class IvcCursor(QwtPlotMarker):
     DEFAULT_Y_LABEL: str = "I"
 
     def __init__(self, pos: Point, ivc_viewer: QwtPlot, font: Optional[QFont] = None, x_label: Optional[str] = None,
-                 y_label: Optional[str] = None, accuracy: Optional[int] = None) -> None:
+                 y_label: Optional[str] = None, accuracy: Optional[int] = None,
+                 collection: Optional["IvcCursors"] = None) -> None:
         """
         :param pos: point at which to place cursor;
         :param ivc_viewer: plot on which to place cursor;
         :param font: font of text at cursor;
         :param x_label: name of the horizontal axis;
         :param y_label: name of the vertical axis;
-        :param accuracy: the accuracy with which you want to display coordinate values on cursor.
+        :param accuracy: the accuracy with which you want to display coordinate values on cursor;
+        :param collection: cursors to which the cursor belongs. Their cached positions are reset when the cursor is
+        moved.
         """
 
         super().__init__()
         self._accuracy: int = accuracy
+        self._collection: Optional["IvcCursors"] = collection
         self._font: QFont = font if isinstance(font, QFont) else QFont("", IvcCursor.DEFAULT_FONT_SIZE)
         self._ivc_viewer: QwtPlot = ivc_viewer
         self._pen_for_cross: QPen = QPen(QBrush(QColor(255, 255, 255)), IvcCursor.DEFAULT_PEN_WIDTH)
+        self._readout: List[Tuple[str, float]] = []
         self._x_label: str = x_label if x_label else IvcCursor.DEFAULT_X_LABEL
         self._y_label: str = y_label if y_label else IvcCursor.DEFAULT_Y_LABEL
 
@@ -53,13 +78,11 @@ class IvcCursor(QwtPlotMarker):
         :return: text to display on the cursor.
         """
 
-        if isinstance(self._accuracy, int):
-            x_value = format(self.value().x(), f".{self._accuracy}f")
-            y_value = format(self.value().y(), f".{self._accuracy}f")
-        else:
-            x_value = self.value().x()
-            y_value = self.value().y()
-        return f"{self._x_label} = {x_value}, {self._y_label} = {y_value}"
+        text = f"{self._x_label} = {self._format_value(self.value().x())}, " \
+               f"{self._y_label} = {self._format_value(self.value().y())}"
+        for title, current in self._readout:
+            text += f"\n{title}: {self._y_label} = {self._format_value(current)}"
+        return text
 
     def _draw_cross(self, painter: QPainter, pos: QPointF) -> None:
         """
@@ -78,6 +101,16 @@ class IvcCursor(QwtPlotMarker):
         y_2 = pos.y() + IvcCursor.CROSS_SIZE
         painter.drawLine(x, y_1, x, y_2)
 
+    def _format_value(self, value: float) -> Union[float, str]:
+        """
+        :param value: coordinate value.
+        :return: value formatted with the accuracy of cursor.
+        """
+
+        if isinstance(self._accuracy, int):
+            return format(value, f".{self._accuracy}f")
+        return value
+
     @staticmethod
     def _get_brush(param: Union[QBrush, QColor, QPen]) -> QBrush:
         """
@@ -183,6 +216,17 @@ class IvcCursor(QwtPlotMarker):
         if param_for_cross:
             self._pen_for_cross = self._get_pen(param_for_cross)
 
+    def setValue(self, *args) -> None:
+        """
+        Method sets position of the cursor. The cursor can be moved directly, so cached positions of cursors to which
+        it belongs are reset.
+        :param args: position as QPointF or x and y values.
+        """
+
+        super().setValue(*args)
+        if self._collection is not None:
+            self._collection._reset_positions()
+
     def set_axis_labels(self, x_label: str, y_label: str) -> None:
         """
         :param x_label: label for horizontal axis;
@@ -195,6 +239,15 @@ class IvcCursor(QwtPlotMarker):
             self._y_label = y_label
         self.label().setText(self.cursor_text)
 
+    def set_readout(self, readout: Optional[Sequence[Tuple[str, float]]]) -> None:
+        """
+        :param readout: titles of curves and their currents at the voltage of cursor to be shown in cursor text. If
+        None, only coordinates of cursor are shown.
+        """
+
+        self._readout = list(readout) if readout else []
+        self.label().setText(self.cursor_text)
+
 
 class IvcCursors:
     """
@@ -226,6 +279,11 @@ class IvcCursors:
         self._cursors: List[IvcCursor] = []
         self._font: QFont = font
         self._ivc_viewer: QwtPlot = ivc_viewer
+        self._pixel_key: Optional[Tuple] = None
+        self._pixel_positions: Optional[np.ndarray] = None
+        self._positions: Optional[np.ndarray] = None
+        self._readout: Optional[np.ndarray] = None  # currents of curves at the voltages of cursors
+        self._readout_titles: List[str] = []
         self._x_label: Optional[str] = x_label
         self._y_label: Optional[str] = y_label
 
@@ -248,6 +306,46 @@ class IvcCursors:
 
         return self._cursors
 
+    def _get_pixel_positions(self) -> np.ndarray:
+        """
+        Method returns cached positions of cursors in pixel coordinates of the plot widget. Positions are recalculated
+        only if cursors, scales or canvas geometry have changed.
+        :return: array with shape (number of cursors, 2).
+        """
+
+        positions = self.get_positions()
+        canvas = self._ivc_viewer.canvas()
+        x_map = self._ivc_viewer.canvasMap(QwtPlot.xBottom)
+        y_map = self._ivc_viewer.canvasMap(QwtPlot.yLeft)
+        key = (*get_scale_key(x_map, y_map, QRectF(canvas.geometry())), canvas.x(), canvas.y())
+        if key != self._pixel_key:
+            self._pixel_positions = np.empty_like(positions)
+            self._pixel_positions[:, 0] = x_map.transform(positions[:, 0]) + canvas.x()
+            self._pixel_positions[:, 1] = y_map.transform(positions[:, 1]) + canvas.y()
+            self._pixel_key = key
+        return self._pixel_positions
+
+    def _get_readout(self, index: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        :param index: cursor index.
+        :return: titles of curves and their currents at the voltage of cursor or None if there is no readout for
+        cursor.
+        """
+
+        if self._readout is None or index >= len(self._readout):
+            return None
+
+        return [(title, current) for title, current in zip(self._readout_titles, self._readout[index].tolist())
+                if not np.isnan(current)]
+
+    def _reset_positions(self) -> None:
+        """
+        Method resets cached positions of cursors. It must be called when cursors are added, moved or removed.
+        """
+
+        self._pixel_key = None
+        self._positions = None
+
     def add_cursor(self, pos: Point) -> None:
         """
         Method adds cursor at given position.
@@ -255,11 +353,33 @@ class IvcCursors:
         """
 
         _ = [cursor.paint(self._color_for_rest) for cursor in self._cursors]
-        cursor = IvcCursor(pos, self._ivc_viewer, self._font, self._x_label, self._y_label, self._accuracy)
+        cursor = IvcCursor(pos, self._ivc_viewer, self._font, self._x_label, self._y_label, self._accuracy, self)
         cursor.paint(self._color_for_selected)
         cursor.attach(self._ivc_viewer)
         self._cursors.append(cursor)
         self._current_index = len(self._cursors) - 1
+        self._reset_positions()
+
+    def add_cursors(self, positions: Union[np.ndarray, Sequence[Tuple[float, float]]]) -> None:
+        """
+        Method adds cursors at given positions. The last added cursor becomes current.
+        :param positions: array with shape (number of cursors, 2) with voltages and currents of cursors.
+        """
+
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        if not positions.size:
+            return
+
+        _ = [cursor.paint(self._color_for_rest) for cursor in self._cursors]
+        for x, y in positions.tolist():
+            cursor = IvcCursor(Point(x, y), self._ivc_viewer, self._font, self._x_label, self._y_label,
+                               self._accuracy, self)
+            cursor.paint(self._color_for_rest)
+            cursor.attach(self._ivc_viewer)
+            self._cursors.append(cursor)
+        self._cursors[-1].paint(self._color_for_selected)
+        self._current_index = len(self._cursors) - 1
+        self._reset_positions()
 
     def attach(self, ivc_viewer: QwtPlot) -> None:
         """
@@ -268,6 +388,7 @@ class IvcCursors:
         """
 
         self._ivc_viewer = ivc_viewer
+        self._pixel_key = None
         _ = [cursor.attach(ivc_viewer) for cursor in self._cursors]
 
     def detach(self) -> None:
@@ -279,23 +400,22 @@ class IvcCursors:
 
     def find_cursor_at_point(self, pos: QPoint) -> Optional[int]:
         """
+        Method finds the cursor nearest to the given position among cursors that are not farther than
+        DISTANCE_FOR_SELECTION pixels. Distances to all cursors are calculated at once using cached pixel positions of
+        cursors.
         :param pos: position where to find the cursor.
         :return: cursor index, at given position.
         """
 
-        def get_distance(pos_1: QPoint, pos_2: QPoint) -> float:
-            return np.sqrt((pos_1.x() - pos_2.x())**2 + (pos_1.y() - pos_2.y())**2)
+        if self.is_empty():
+            return None
 
-        min_distance = None
-        cursor_index = None
-        for index, cursor in enumerate(self._cursors):
-            cursor_pos = cursor.get_cursor_coordinates_in_px()
-            distance = get_distance(pos, cursor_pos)
-            if distance <= self.DISTANCE_FOR_SELECTION:
-                if min_distance is None or min_distance > distance:
-                    min_distance = distance
-                    cursor_index = index
-        return cursor_index
+        positions = self._get_pixel_positions()
+        distances = np.hypot(positions[:, 0] - pos.x(), positions[:, 1] - pos.y())
+        cursor_index = int(np.argmin(distances))
+        if distances[cursor_index] <= self.DISTANCE_FOR_SELECTION:
+            return cursor_index
+        return None
 
     def find_cursor_for_context_menu(self, pos: QPoint) -> bool:
         """
@@ -320,6 +440,18 @@ class IvcCursors:
 
         return self._cursors
 
+    def get_positions(self) -> np.ndarray:
+        """
+        Method returns positions of cursors. Array is cached and replaced by new array when cursors are added, moved
+        or removed, so it must not be changed.
+        :return: array with shape (number of cursors, 2) with voltages and currents of cursors.
+        """
+
+        if self._positions is None:
+            self._positions = np.array([(cursor.value().x(), cursor.value().y()) for cursor in self._cursors],
+                                       dtype=np.float64).reshape(-1, 2)
+        return self._positions
+
     def is_empty(self) -> bool:
         """
         Method checks if there are cursors.
@@ -336,6 +468,7 @@ class IvcCursors:
 
         if self._current_index is not None:
             self._cursors[self._current_index].move(pos)
+            self._reset_positions()
 
     def paint_current_cursor(self) -> None:
         _ = [cursor.paint(self._color_for_rest) for cursor in self._cursors]
@@ -350,6 +483,7 @@ class IvcCursors:
         self.detach()
         self._cursors.clear()
         self._current_index = None
+        self._reset_positions()
 
     def remove_current_cursor(self) -> None:
         """
@@ -360,6 +494,7 @@ class IvcCursors:
             self._cursors[self._current_index].detach()
             self._cursors.pop(self._current_index)
             self._current_index = None
+            self._reset_positions()
 
     def set_axis_labels(self, x_label: str, y_label: str) -> None:
         """
@@ -380,3 +515,258 @@ class IvcCursors:
 
         self._current_index = self.find_cursor_at_point(pos)
         self.paint_current_cursor()
+
+    def set_readout(self, titles: Sequence[str], readout: Optional[np.ndarray]) -> None:
+        """
+        :param titles: titles of curves;
+        :param readout: array with shape (number of cursors, number of curves) with currents of curves at the
+        voltages of cursors to be shown in cursor texts (NaN currents are not shown). If None, only coordinates of
+        cursors are shown.
+        """
+
+        self._readout = readout
+        self._readout_titles = list(titles)
+        _ = [cursor.set_readout(self._get_readout(index)) for index, cursor in enumerate(self._cursors)]
+
+
+class ArrayCursors(IvcCursors, _OverlayItem, QwtPlotItem):
+    """
+    This class is array of cursors whose positions are stored in NumPy array, and all cursors are drawn by one plot
+    item. Unselected cursors are drawn as squares, the current cursor is drawn as IvcCursor with lines and text. So
+    adding, selecting and drawing of thousands of cursors do not require a plot item for each cursor.
+    """
+
+    POINT_SIZE: int = 6  # size of square for unselected cursor in px
+
+    def __init__(self, ivc_viewer: QwtPlot, font: Optional[QFont] = None, color_for_rest: Optional[QColor] = None,
+                 color_for_selected: Optional[QColor] = None, x_label: Optional[str] = None,
+                 y_label: Optional[str] = None, accuracy: Optional[int] = None) -> None:
+        """
+        :param ivc_viewer: plot on which to place cursors;
+        :param font: font of text at current cursor;
+        :param color_for_rest: color for unselected cursors;
+        :param color_for_selected: color for selected cursor;
+        :param x_label: name of the horizontal axis;
+        :param y_label: name of the vertical axis;
+        :param accuracy: the accuracy with which you want to display coordinate values on current cursor.
+        """
+
+        IvcCursors.__init__(self, ivc_viewer, font, color_for_rest, color_for_selected, x_label, y_label, accuracy)
+        QwtPlotItem.__init__(self)
+        self.setZ(30)
+        self._marker: IvcCursor = IvcCursor(Point(0, 0), ivc_viewer, font, x_label, y_label, accuracy)
+        self._marker.paint(self._color_for_selected)
+        self._pen_for_rest: QPen = QPen(QBrush(self._color_for_rest), ArrayCursors.POINT_SIZE)
+        self._pen_for_rest.setCapStyle(Qt.SquareCap)
+        self._array_positions: np.ndarray = np.empty((0, 2))  # voltages and currents of cursors
+
+    def __getitem__(self, index: int) -> Optional[Point]:
+        """
+        :param index: index of the cursor to be returned.
+        :return: position of cursor.
+        """
+
+        if isinstance(index, int) and 0 <= index < len(self._array_positions):
+            return Point(*self._array_positions[index].tolist())
+
+        return None
+
+    @property
+    def cursors(self) -> List[Point]:
+        """
+        :return: list of positions of all cursors.
+        """
+
+        return [Point(x, y) for x, y in self._array_positions.tolist()]
+
+    def _reset_positions(self) -> None:
+        """
+        Method resets cached pixel positions of cursors. Positions of cursors are stored in array, so they are not
+        cached.
+        """
+
+        self._pixel_key = None
+
+    def _set_positions(self, positions: np.ndarray, current_index: Optional[int]) -> None:
+        """
+        :param positions: new array with positions of cursors;
+        :param current_index: index of current cursor.
+        """
+
+        self._array_positions = positions
+        self._current_index = current_index
+        self._reset_positions()
+        self.paint_current_cursor()
+
+    def _update_marker(self) -> None:
+        """
+        Method moves the marker of current cursor to the position of current cursor and updates its text.
+        """
+
+        if self._current_index is not None:
+            self._marker.set_readout(self._get_readout(self._current_index))
+            self._marker.move(Point(*self._array_positions[self._current_index].tolist()))
+
+    def add_cursor(self, pos: Point) -> None:
+        """
+        Method adds cursor at given position.
+        :param pos: position where cursor should be added.
+        """
+
+        self.add_cursors([(pos.x, pos.y)])
+
+    def add_cursors(self, positions: Union[np.ndarray, Sequence[Tuple[float, float]]]) -> None:
+        """
+        Method adds cursors at given positions. The last added cursor becomes current.
+        :param positions: array with shape (number of cursors, 2) with voltages and currents of cursors.
+        """
+
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        if positions.size:
+            positions = np.concatenate((self._array_positions, positions))
+            self._set_positions(positions, len(positions) - 1)
+
+    def attach(self, ivc_viewer: QwtPlot) -> None:
+        """
+        Method attaches cursors to plot.
+        :param ivc_viewer: plot.
+        """
+
+        self._ivc_viewer = ivc_viewer
+        self._reset_positions()
+        QwtPlotItem.attach(self, ivc_viewer)
+
+    def detach(self) -> None:
+        """
+        Method detaches cursors from plot.
+        """
+
+        QwtPlotItem.detach(self)
+
+    def draw(self, painter: QPainter, x_map: QwtScaleMap, y_map: QwtScaleMap, canvas_rect: QRectF) -> None:
+        """
+        Method draws all cursors. Unselected cursors outside the canvas are skipped, others are drawn with one call.
+        :param painter: painter;
+        :param x_map: X scale map;
+        :param y_map: Y scale map;
+        :param canvas_rect: contents rectangle of the canvas in painter coordinates.
+        """
+
+        x = x_map.transform(self._array_positions[:, 0])
+        y = y_map.transform(self._array_positions[:, 1])
+        margin = ArrayCursors.POINT_SIZE
+        rest = (x >= canvas_rect.left() - margin) & (x <= canvas_rect.right() + margin) & \
+               (y >= canvas_rect.top() - margin) & (y <= canvas_rect.bottom() + margin)
+        if self._current_index is not None:
+            rest[self._current_index] = False
+        painter.setPen(self._pen_for_rest)
+        painter.setRenderHint(QPainter.Antialiasing, False)
+        painter.drawPoints(array2d_to_qpolygonf(x[rest], y[rest]))
+        if self._current_index is not None:
+            self._marker.draw(painter, x_map, y_map, canvas_rect)
+
+    def get_list_of_all_cursors(self) -> List[Point]:
+        """
+        Method returns list with positions of all cursors.
+        :return: list with positions of all cursors.
+        """
+
+        return self.cursors
+
+    def get_positions(self) -> np.ndarray:
+        """
+        Method returns positions of cursors. Array is replaced by new array when cursors are added, moved or removed,
+        so it must not be changed.
+        :return: array with shape (number of cursors, 2) with voltages and currents of cursors.
+        """
+
+        return self._array_positions
+
+    def is_empty(self) -> bool:
+        """
+        Method checks if there are cursors.
+        :return: True if object has no cursors otherwise False.
+        """
+
+        return not len(self._array_positions)
+
+    def move_cursor(self, pos: Point) -> None:
+        """
+        Method moves current selected cursor at given position.
+        :param pos: position to move.
+        """
+
+        if self._current_index is not None:
+            self.move_cursors([self._current_index], [(pos.x, pos.y)])
+
+    def move_cursors(self, indexes: Union[np.ndarray, Sequence[int]],
+                     positions: Union[np.ndarray, Sequence[Tuple[float, float]]]) -> None:
+        """
+        Method moves cursors with given indexes.
+        :param indexes: indexes of cursors to be moved;
+        :param positions: array with shape (number of indexes, 2) with new voltages and currents of cursors.
+        """
+
+        new_positions = self._array_positions.copy()
+        new_positions[np.asarray(indexes, dtype=np.int64)] = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        self._set_positions(new_positions, self._current_index)
+
+    def paint_current_cursor(self) -> None:
+        """
+        Method updates current cursor and redraws cursors.
+        """
+
+        self._update_marker()
+        self.itemChanged()
+
+    def remove_all_cursors(self) -> None:
+        """
+        Method removes all cursors.
+        """
+
+        self._set_positions(np.empty((0, 2)), None)
+
+    def remove_current_cursor(self) -> None:
+        """
+        Method removes current cursor.
+        """
+
+        if self._current_index is not None:
+            self.remove_cursors([self._current_index])
+
+    def remove_cursors(self, indexes: Union[np.ndarray, Sequence[int]]) -> None:
+        """
+        Method removes cursors with given indexes. If current cursor is not removed, it remains current.
+        :param indexes: indexes of cursors to be removed.
+        """
+
+        keep = np.ones(len(self._array_positions), dtype=bool)
+        keep[np.asarray(indexes, dtype=np.int64)] = False
+        current_index = self._current_index
+        if current_index is not None:
+            current_index = int(np.count_nonzero(keep[:current_index])) if keep[current_index] else None
+        self._set_positions(self._array_positions[keep], current_index)
+
+    def set_axis_labels(self, x_label: str, y_label: str) -> None:
+        """
+        :param x_label: label fot horizontal axis;
+        :param y_label: label for vertical axis.
+        """
+
+        if x_label:
+            self._x_label = x_label
+        if y_label:
+            self._y_label = y_label
+        self._marker.set_axis_labels(self._x_label, self._y_label)
+
+    def set_readout(self, titles: Sequence[str], readout: Optional[np.ndarray]) -> None:
+        """
+        :param titles: titles of curves;
+        :param readout: array with shape (number of cursors, number of curves) with currents of curves at the
+        voltages of cursors. Currents are shown in the text of current cursor (NaN currents are not shown). If None,
+        only coordinates of cursor are shown.
+        """
+
+        self._readout = readout
+        self._readout_titles = list(titles)
+        self._update_marker()
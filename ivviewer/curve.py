@@ -1,9 +1,20 @@
-from typing import List, Optional, Union
+import hashlib
+import logging
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass
 import numpy as np
-from PyQt5.QtCore import pyqtSignal, QObject
-from PyQt5.QtGui import QBrush, QColor, QPen
-from qwt import QwtPlot, QwtPlotCurve
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QPointF, QRectF, Qt, QThreadPool
+from PyQt5.QtGui import QBrush, QColor, QPainter, QPen, QPolygonF
+from qwt import QwtPlot, QwtPlotCurve, QwtPlotDirectPainter
+from qwt.plot_curve import array2d_to_qpolygonf
+from qwt.plot_series import QwtSeriesData
+from qwt.scale_map import QwtScaleMap
+from ivviewer.decimation import decimate_min_max
+from ivviewer.preprocessing import CurvePreparationTask, get_scale_key, PreparedCurve
+from ivviewer.spatial import PointGrid, SegmentGrid
+
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -18,43 +29,402 @@ class Point:
     y: float
 
 
+@dataclass(frozen=True)
+class StoragePolicy:
+    """
+    Policy for storing curves of the plot.
+    """
+
+    dtype: Optional[type] = None  # data type of curve buffers (e.g. np.float32), None - curves are stored as given
+    keep_closed_copy: bool = True  # if False then currents in units of plot are calculated on the fly when drawn
+
+
+class ArrayCurve:
+    """
+    Class for curve whose voltages and currents are stored in contiguous NumPy buffers. Each buffer has one extra
+    element reserved for the point that closes the loop, so the buffers can be given to the plot without copying.
+    """
+
+    def __init__(self, voltages: Iterable[float], currents: Iterable[float], dtype: np.dtype = np.float64) -> None:
+        """
+        :param voltages: voltage values;
+        :param currents: current values;
+        :param dtype: data type of buffers (float64 or float32).
+        """
+
+        voltages = np.asarray(voltages)
+        currents = np.asarray(currents)
+        if voltages.ndim != 1 or voltages.shape != currents.shape:
+            raise ValueError("Voltages and currents must be one-dimensional arrays of the same length")
+
+        size = voltages.size
+        self._closed_voltages: np.ndarray = np.empty(size + 1, dtype=dtype)
+        self._closed_currents: np.ndarray = np.empty(size + 1, dtype=dtype)
+        self._closed_voltages[:size] = voltages
+        self._closed_currents[:size] = currents
+        self.close_loop()
+
+    def __len__(self) -> int:
+        """
+        :return: number of points in curve (without closing point).
+        """
+
+        return self._closed_voltages.size - 1
+
+    @property
+    def closed_currents(self) -> np.ndarray:
+        """
+        :return: buffer with current values and closing point.
+        """
+
+        return self._closed_currents
+
+    @property
+    def closed_voltages(self) -> np.ndarray:
+        """
+        :return: buffer with voltage values and closing point.
+        """
+
+        return self._closed_voltages
+
+    @property
+    def currents(self) -> np.ndarray:
+        """
+        :return: array with current values (view of buffer without closing point).
+        """
+
+        return self._closed_currents[:-1]
+
+    @property
+    def dtype(self) -> np.dtype:
+        """
+        :return: data type of buffers.
+        """
+
+        return self._closed_voltages.dtype
+
+    @property
+    def voltages(self) -> np.ndarray:
+        """
+        :return: array with voltage values (view of buffer without closing point).
+        """
+
+        return self._closed_voltages[:-1]
+
+    @classmethod
+    def from_buffers(cls, closed_voltages: np.ndarray, closed_currents: np.ndarray) -> "ArrayCurve":
+        """
+        Method creates curve that uses given buffers without copying. Last element of each buffer is the closing
+        point. Buffers can be read-only (for example, memory-mapped), then they must already contain closing point.
+        :param closed_voltages: buffer with voltage values and closing point;
+        :param closed_currents: buffer with current values and closing point.
+        :return: array-backed curve.
+        """
+
+        if closed_voltages.ndim != 1 or closed_voltages.shape != closed_currents.shape or \
+                closed_voltages.dtype != closed_currents.dtype or closed_voltages.size == 0:
+            raise ValueError("Buffers must be non-empty one-dimensional arrays of the same length and data type")
+
+        curve = cls.__new__(cls)
+        curve._closed_voltages = closed_voltages
+        curve._closed_currents = closed_currents
+        curve.close_loop()
+        return curve
+
+    @classmethod
+    def from_curve(cls, curve: Curve, dtype: np.dtype = np.float64) -> "ArrayCurve":
+        """
+        :param curve: curve with lists of voltage and current values;
+        :param dtype: data type of buffers.
+        :return: array-backed curve.
+        """
+
+        return cls(curve.voltages, curve.currents, dtype)
+
+    def close_loop(self) -> None:
+        """
+        Method copies the first point to the reserved closing point. It should be called after the buffers have been
+        changed in place. Read-only buffers are not changed.
+        """
+
+        if len(self) > 0 and self._closed_voltages.flags.writeable and self._closed_currents.flags.writeable:
+            self._closed_voltages[-1] = self._closed_voltages[0]
+            self._closed_currents[-1] = self._closed_currents[0]
+
+    def to_curve(self) -> Curve:
+        """
+        :return: curve with lists of voltage and current values.
+        """
+
+        return Curve(self.voltages.tolist(), self.currents.tolist())
+
+
+class RingBuffer:
+    """
+    Class for fixed-capacity buffer of points that arrive during measurement. Each point is written twice (at index
+    and at index + capacity), so the last points are always available as contiguous arrays without copying.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        """
+        :param capacity: maximum number of points in buffer.
+        """
+
+        if capacity < 1:
+            raise ValueError("Capacity of ring buffer must be positive")
+
+        self._capacity: int = capacity
+        self._size: int = 0
+        self._write_index: int = 0
+        self._x: np.ndarray = np.empty(2 * capacity, dtype=np.float64)
+        self._y: np.ndarray = np.empty(2 * capacity, dtype=np.float64)
+
+    def __len__(self) -> int:
+        """
+        :return: number of points in buffer.
+        """
+
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: maximum number of points in buffer.
+        """
+
+        return self._capacity
+
+    @property
+    def x(self) -> np.ndarray:
+        """
+        :return: array of x values from the oldest point to the newest one.
+        """
+
+        end = self._write_index + self._capacity
+        return self._x[end - self._size:end]
+
+    @property
+    def y(self) -> np.ndarray:
+        """
+        :return: array of y values from the oldest point to the newest one.
+        """
+
+        end = self._write_index + self._capacity
+        return self._y[end - self._size:end]
+
+    def append(self, x: np.ndarray, y: np.ndarray) -> bool:
+        """
+        :param x: x values of new points;
+        :param y: y values of new points.
+        :return: True if the oldest points were overwritten.
+        """
+
+        if x.size > self._capacity:
+            x = x[-self._capacity:]
+            y = y[-self._capacity:]
+        index = 0
+        while index < x.size:
+            # Write the part that fits before the end of the first half of buffer
+            count = min(x.size - index, self._capacity - self._write_index)
+            start = self._write_index
+            for buffer, values in ((self._x, x), (self._y, y)):
+                buffer[start:start + count] = values[index:index + count]
+                buffer[start + self._capacity:start + self._capacity + count] = values[index:index + count]
+            index += count
+            self._write_index = (self._write_index + count) % self._capacity
+        overwritten = self._size + x.size > self._capacity
+        self._size = min(self._size + x.size, self._capacity)
+        return overwritten
+
+    def clear(self) -> None:
+        self._size = 0
+        self._write_index = 0
+
+
+class CurveSeriesData(QwtSeriesData):
+    """
+    Series data that gives the plot direct access to the arrays prepared by PlotCurve.
+    """
+
+    def __init__(self) -> None:
+        QwtSeriesData.__init__(self)
+        self._bounds: Optional[Tuple[float, float, float, float]] = None
+        self._version: int = 0
+        self._x: np.ndarray = np.empty(0)
+        self._y: np.ndarray = np.empty(0)
+        self._y_factor: float = 1.0
+
+    @property
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        :return: minimum and maximum x values, minimum and maximum y values. Bounds are calculated once after the
+        samples have been set.
+        """
+
+        if self._bounds is None and self.size() > 0:
+            y_1, y_2 = float(self._y.min()) * self._y_factor, float(self._y.max()) * self._y_factor
+            self._bounds = float(self._x.min()), float(self._x.max()), min(y_1, y_2), max(y_1, y_2)
+        return self._bounds
+
+    @property
+    def version(self) -> int:
+        """
+        :return: number that changes every time the samples are set.
+        """
+
+        return self._version
+
+    def boundingRect(self) -> QRectF:
+        """
+        :return: bounding rectangle of the series.
+        """
+
+        if self.bounds is None:
+            return QRectF(1.0, 1.0, -2.0, -2.0)
+
+        x_min, x_max, y_min, y_max = self.bounds
+        return QRectF(x_min, y_min, x_max - x_min, y_max - y_min)
+
+    def sample(self, index: int) -> QPointF:
+        """
+        :param index: index of sample.
+        :return: sample at given position.
+        """
+
+        return QPointF(float(self._x[index]), float(self._y[index]) * self._y_factor)
+
+    def set_samples(self, x: np.ndarray, y: np.ndarray, finite: bool = True,
+                    bounds: Optional[Tuple[float, float, float, float]] = None, y_factor: float = 1.0) -> None:
+        """
+        Method sets arrays of samples. Arrays are not copied if all their values are finite.
+        :param x: array of x values;
+        :param y: array of y values;
+        :param finite: if True, keep only finite values, otherwise arrays are taken as is;
+        :param bounds: bounds of samples if they are already known, otherwise they will be calculated when needed;
+        :param y_factor: factor by which y values are multiplied when they are requested.
+        """
+
+        # The sum is not finite if there is any NaN or infinity in the array
+        if finite and not (np.isfinite(x.sum()) and np.isfinite(y.sum())):
+            indexes = np.logical_and(np.isfinite(x), np.isfinite(y))
+            x = x[indexes]
+            y = y[indexes]
+        self._bounds = bounds
+        self._x = x
+        self._y = y
+        self._y_factor = y_factor
+        self._version += 1
+
+    def size(self) -> int:
+        """
+        :return: number of samples.
+        """
+
+        return min(self._x.size, self._y.size)
+
+    def xData(self) -> np.ndarray:
+        """
+        :return: array of x values. Qwt draws float64 values only, so array of other type is converted on the fly.
+        """
+
+        if self._x.dtype != np.float64:
+            return self._x.astype(np.float64)
+        return self._x
+
+    def yData(self) -> np.ndarray:
+        """
+        :return: array of y values. Array of other type than float64 or with factor is converted on the fly.
+        """
+
+        if self._y.dtype != np.float64 or self._y_factor != 1:
+            return np.multiply(self._y, self._y_factor, dtype=np.float64)
+        return self._y
+
+    def y_slice(self, from_: int, to: int) -> np.ndarray:
+        """
+        :param from_: index of the first sample;
+        :param to: index of the last sample.
+        :return: array of y values of given samples. Only these values are converted if there is a factor.
+        """
+
+        y = self._y[from_:to + 1]
+        if y.dtype != np.float64 or self._y_factor != 1:
+            return np.multiply(y, self._y_factor, dtype=np.float64)
+        return y
+
+
 class PlotCurve(QwtPlotCurve, QObject):
     """
     Class for curve.
     """
 
+    CURRENT_FACTOR: float = 1000  # currents are displayed in mA
+    DECIMATION_POINTS_PER_PIXEL: int = 4  # curve is decimated if it has more points per pixel column of canvas
     DEFAULT_WIDTH: float = 4
+    HIGHLIGHT_ALPHA: int = 80  # opacity of the wide line drawn under highlighted curve
+    HIGHLIGHT_WIDTH_FACTOR: float = 3  # width of the line under highlighted curve relative to the curve pen width
     curve_changed: pyqtSignal = pyqtSignal()
+    curve_prepared: pyqtSignal = pyqtSignal(int, object)  # emitted from worker thread when curve data is prepared
 
-    def __init__(self, ivc_viewer: QwtPlot, parent=None, title: Optional[str] = None) -> None:
+    def __init__(self, ivc_viewer: QwtPlot, parent=None, title: Optional[str] = None,
+                 storage_policy: Optional[StoragePolicy] = None) -> None:
         """
         :param ivc_viewer: plot on which to place curve;
         :param parent: parent object;
-        :param title: curve title (displayed in plot legend).
+        :param title: curve title (displayed in plot legend);
+        :param storage_policy: policy for storing curve data.
         """
 
+        self._render_version: int = 0  # number of changes of the curve that affect its drawing
         QwtPlotCurve.__init__(self, title)
         QObject.__init__(self)
-        self._curve: Optional[Curve] = None
+        self._curve: Optional[Union[ArrayCurve, Curve]] = None
+        self._currents_buffer: Optional[np.ndarray] = None
+        self._decimated_polyline: Optional[QPolygonF] = None
+        self._decimation_enabled: bool = True
+        self._decimation_key: Optional[Tuple] = None
+        self._fingerprint: Optional[bytes] = None  # fingerprint of data of the shown curve, None if unknown
+        self._generation: int = 0  # number of the last curve set, results for older curves are dropped
+        self._highlighted: bool = False
         self._ivc_viewer: QwtPlot = ivc_viewer
         self._parent = parent
+        self._pending_curve: Optional[Union[ArrayCurve, Curve]] = None
+        self._point_grid: Optional[PointGrid] = None
+        self._point_grid_key: Optional[Tuple] = None
+        self._segment_grid: Optional[SegmentGrid] = None
+        self._segment_grid_key: Optional[Tuple] = None
+        self._series: CurveSeriesData = CurveSeriesData()
+        self._storage_policy: StoragePolicy = storage_policy or StoragePolicy()
+        self._stream: Optional[RingBuffer] = None
+        self._stream_painter: Optional[QwtPlotDirectPainter] = None
+        self._voltages_buffer: Optional[np.ndarray] = None
+        self.setData(self._series)
+        self.curve_prepared.connect(self._set_prepared_curve)
 
     @property
-    def curve(self) -> Optional[Curve]:
+    def curve(self) -> Optional[Union[ArrayCurve, Curve]]:
         """
-        :return: object with lists of voltage and current values.
+        :return: object with voltage and current values.
         """
 
         return self._curve
 
     @curve.setter
-    def curve(self, curve: Optional[Curve]) -> None:
+    def curve(self, curve: Optional[Union[ArrayCurve, Curve]]) -> None:
         """
-        :param curve: object with lists of new voltage and current values.
+        :param curve: object with new voltage and current values.
         """
 
         self.set_curve(curve)
 
+    @property
+    def bounds(self) -> Optional[Tuple[float, float, float, float]]:
+        """
+        :return: minimum and maximum voltages [V], minimum and maximum currents [mA] of the curve as it is drawn.
+        """
+
+        return self._series.bounds
+
     @property
     def curve_title(self) -> str:
         """
@@ -63,20 +433,310 @@ class PlotCurve(QwtPlotCurve, QObject):
 
         return self.title().text()
 
-    def _set_curve(self, curve: Optional[Curve] = None) -> None:
+    @property
+    def data_version(self) -> int:
+        """
+        :return: number that changes every time the data of the curve changes.
+        """
+
+        return self._series.version
+
+    @property
+    def render_version(self) -> int:
+        """
+        :return: number that changes every time the curve is changed so that it should be redrawn (data, pen, style,
+        visibility and so on), except for points appended in streaming mode (see data_version).
+        """
+
+        return self._render_version
+
+    @property
+    def storage_policy(self) -> StoragePolicy:
+        """
+        :return: policy for storing curve data.
+        """
+
+        return self._storage_policy
+
+    def _check_decimation(self, canvas_rect: QRectF, from_: int, to: int) -> bool:
+        """
+        :param canvas_rect: contents rectangle of the canvas;
+        :param from_: index of the first point to be painted;
+        :param to: index of the last point to be painted.
+        :return: True if the whole curve should be drawn decimated.
+        """
+
+        size = self.dataSize()
+        return self._decimation_enabled and from_ == 0 and to in (-1, size - 1) and self._is_plain_line() and \
+            size > self.DECIMATION_POINTS_PER_PIXEL * canvas_rect.width()
+
+    def _draw_highlight(self, painter: QPainter, polyline: QPolygonF) -> None:
+        """
+        Method draws wide semi-transparent line under the highlighted curve.
+        :param painter: painter;
+        :param polyline: polyline of the curve.
         """
-        :param curve: object with lists of new voltage and current values.
+
+        pen = QPen(self.pen())
+        color = QColor(pen.color())
+        color.setAlpha(self.HIGHLIGHT_ALPHA)
+        pen.setColor(color)
+        pen.setWidthF(max(pen.widthF(), 1) * self.HIGHLIGHT_WIDTH_FACTOR)
+        painter.save()
+        painter.setPen(pen)
+        painter.drawPolyline(polyline)
+        painter.restore()
+
+    def _drop_pending_curve(self) -> None:
+        """
+        Method makes data that is being prepared in worker thread outdated.
+        """
+
+        self._generation += 1
+        self._pending_curve = None
+
+    def _get_decimated_polyline(self, x_map: QwtScaleMap, y_map: QwtScaleMap, canvas_rect: QRectF) -> QPolygonF:
+        """
+        Method returns decimated polyline. Polyline is recalculated only if data, scales or canvas size have changed.
+        :param x_map: maps x values into pixel coordinates;
+        :param y_map: maps y values into pixel coordinates;
+        :param canvas_rect: contents rectangle of the canvas.
+        :return: decimated polyline.
+        """
+
+        key = (self._series.version, *get_scale_key(x_map, y_map, canvas_rect))
+        if key != self._decimation_key:
+            x = x_map.transform(self._series.xData())
+            y = y_map.transform(self._series.yData())
+            self._decimated_polyline = array2d_to_qpolygonf(*decimate_min_max(x, y))
+            self._decimation_key = key
+        return self._decimated_polyline
+
+    def _is_plain_line(self) -> bool:
+        """
+        :return: True if the curve is drawn as a polyline without symbols and filling.
+        """
+
+        return self.style() == self.Lines and self.symbol() is None and self.brush().style() == Qt.NoBrush
+
+    def _set_curve(self, curve: Optional[Union[ArrayCurve, Curve]] = None, fingerprint: Optional[bytes] = None,
+                   bounds: Optional[Tuple[float, float, float, float]] = None) -> None:
+        """
+        :param curve: object with new voltage and current values;
+        :param fingerprint: fingerprint of curve data;
+        :param bounds: minimum and maximum voltages and currents of the curve if they are known.
         """
 
         self._curve = curve
-        _plot_curve(self)
+        self._drop_pending_curve()
+        self._fingerprint = fingerprint
+        self._stream = None
+        _plot_curve(self, bounds)
+
+    @pyqtSlot(int, object)
+    def _set_prepared_curve(self, generation: int, prepared: Union[PreparedCurve, Exception]) -> None:
+        """
+        Slot sets the curve prepared in worker thread. Results for the curves that have already been replaced are
+        dropped.
+        :param generation: number of the curve for which data was prepared;
+        :param prepared: prepared data or exception raised while preparing.
+        """
+
+        if generation != self._generation:
+            return
+
+        curve = self._pending_curve
+        self._pending_curve = None
+        if isinstance(prepared, Exception):
+            # Exception cannot be raised in slot, so the current curve is kept
+            logger.error("Failed to prepare curve for drawing", exc_info=prepared)
+            return
+
+        self._curve = curve
+        self._fingerprint = None
+        self._stream = None
+        if self._storage_policy.keep_closed_copy:
+            # Prepared arrays become the buffers of the curve
+            self._voltages_buffer = prepared.voltages
+            self._currents_buffer = prepared.currents
+            self._series.set_samples(prepared.voltages, prepared.currents, finite=False, bounds=prepared.bounds)
+        else:
+            self._voltages_buffer = self._currents_buffer = None
+            self._series.set_samples(curve.closed_voltages, curve.closed_currents, bounds=prepared.bounds,
+                                     y_factor=self.CURRENT_FACTOR)
+        if prepared.polyline is not None:
+            self._decimated_polyline = prepared.polyline
+            self._decimation_key = (self._series.version, *prepared.scale_key)
+        self.dataChanged()
+        self._ivc_viewer._adjust_scale()
+        self.curve_changed.emit()
+
+    def append_points(self, voltages: Iterable[float], currents: Iterable[float]) -> None:
+        """
+        Method adds new points to the curve in streaming mode. Only the segment with new points is redrawn while the
+        buffer is not full.
+        :param voltages: voltage values of new points;
+        :param currents: current values of new points.
+        """
+
+        if self._stream is None:
+            raise RuntimeError("Streaming mode is not started. Call start_stream() first")
+
+        voltages = np.asarray(voltages, dtype=np.float64)
+        currents = np.asarray(currents, dtype=np.float64)
+        indexes = np.logical_and(np.isfinite(voltages), np.isfinite(currents))
+        if not indexes.all():
+            voltages = voltages[indexes]
+            currents = currents[indexes]
+        if voltages.size == 0:
+            return
+
+        old_size = len(self._stream)
+        old_bounds = self._series.bounds
+        overwritten = self._stream.append(voltages, currents)
+        bounds = None
+        if not overwritten:
+            # Bounds are updated with new points only
+            bounds = (voltages.min(), voltages.max(), currents.min() * self.CURRENT_FACTOR,
+                      currents.max() * self.CURRENT_FACTOR)
+            if old_size:
+                bounds = _merge_bounds(bounds, old_bounds)
+        # Ring buffer keeps currents as they are given, they are converted to mA when drawn
+        self._series.set_samples(self._stream.x, self._stream.y, finite=False, bounds=bounds,
+                                 y_factor=self.CURRENT_FACTOR)
+        self._ivc_viewer._check_autoscale()
+        if overwritten or self.plot() is None:
+            # The oldest points should disappear, so the whole curve is redrawn. Once the buffer is full, this happens
+            # for every chunk of points, so in steady state streaming costs a full replot per chunk
+            self.dataChanged()
+            return
+
+        if self._stream_painter is None:
+            self._stream_painter = QwtPlotDirectPainter(self.plot())
+        self._stream_painter.drawSeries(self, max(old_size - 1, 0), len(self._stream) - 1)
 
     def clear_curve(self) -> None:
         self.set_curve(None)
 
-    def get_curve(self) -> Optional[Curve]:
+    def drawSeries(self, painter: QPainter, x_map: QwtScaleMap, y_map: QwtScaleMap, canvas_rect: QRectF, from_: int,
+                   to: int) -> None:
+        """
+        Method draws an interval of the curve. If the curve has far more points than the canvas has pixel columns, the
+        curve is decimated before drawing. In streaming mode new segment is drawn as polyline of its points only.
+        :param painter: painter;
+        :param x_map: maps x values into pixel coordinates;
+        :param y_map: maps y values into pixel coordinates;
+        :param canvas_rect: contents rectangle of the canvas;
+        :param from_: index of the first point to be painted;
+        :param to: index of the last point to be painted.
+        """
+
+        decimated = self._check_decimation(canvas_rect, from_, to)
+        if self._stream is not None and from_ > 0 and not self._highlighted and self._is_plain_line():
+            # Only the new segment is converted to mA, not the whole ring buffer
+            to = self.dataSize() - 1 if to < 0 else to
+            painter.save()
+            painter.setPen(self.pen())
+            painter.drawPolyline(array2d_to_qpolygonf(x_map.transform(self._series.xData()[from_:to + 1]),
+                                                      y_map.transform(self._series.y_slice(from_, to))))
+            painter.restore()
+            return
+
+        if self._highlighted:
+            if decimated:
+                polyline = self._get_decimated_polyline(x_map, y_map, canvas_rect)
+            else:
+                to = self.dataSize() - 1 if to < 0 else to
+                polyline = array2d_to_qpolygonf(x_map.transform(self._series.xData()[from_:to + 1]),
+                                                y_map.transform(self._series.y_slice(from_, to)))
+            self._draw_highlight(painter, polyline)
+
+        if not decimated:
+            super().drawSeries(painter, x_map, y_map, canvas_rect, from_, to)
+            return
+
+        painter.save()
+        painter.setPen(self.pen())
+        painter.drawPolyline(self._get_decimated_polyline(x_map, y_map, canvas_rect))
+        painter.restore()
+
+    def enable_decimation(self, enable: bool) -> None:
+        """
+        :param enable: if True then dense curve will be decimated before drawing.
+        """
+
+        self._decimation_enabled = enable
+        self.itemChanged()
+
+    def find_nearest_point(self, pos: QPointF, max_distance: float = np.inf) -> Optional[Tuple[Point, float]]:
+        """
+        Method finds the point of the curve nearest to the given position on the canvas. Points are searched with a
+        grid index in pixel coordinates that is rebuilt only if data, scales or canvas size have changed.
+        :param pos: position in pixel coordinates of the canvas;
+        :param max_distance: maximum distance to the point in pixels.
+        :return: point of the curve (voltage [V] and current [mA]) and distance to it in pixels or None if there is no
+        point at given distance.
+        """
+
+        plot = self.plot()
+        if plot is None or self._series.size() == 0:
+            return None
+
+        x_map = plot.canvasMap(self.xAxis())
+        y_map = plot.canvasMap(self.yAxis())
+        key = (self._series.version, *get_scale_key(x_map, y_map, QRectF(plot.canvas().contentsRect())))
+        if key != self._point_grid_key:
+            self._point_grid = PointGrid(x_map.transform(self._series.xData()), y_map.transform(self._series.yData()))
+            self._point_grid_key = key
+
+        nearest = self._point_grid.find_nearest(pos.x(), pos.y(), max_distance)
+        if nearest is None:
+            return None
+
+        index, distance = nearest
+        sample = self._series.sample(index)
+        return Point(sample.x(), sample.y()), distance
+
+    def find_nearest_segment(self, pos: QPointF, max_distance: float) -> Optional[Tuple[int, float]]:
+        """
+        Method finds the segment of the curve nearest to the given position on the canvas. Segments are searched with
+        a grid index in pixel coordinates that is rebuilt only if data, scales or canvas size have changed.
+        :param pos: position in pixel coordinates of the canvas;
+        :param max_distance: maximum distance to the segment in pixels.
+        :return: index of the first point of the segment and distance to the segment in pixels or None if there is no
+        segment at given distance.
+        """
+
+        plot = self.plot()
+        if plot is None or self._series.size() == 0:
+            return None
+
+        x_map = plot.canvasMap(self.xAxis())
+        y_map = plot.canvasMap(self.yAxis())
+        key = (self._series.version, *get_scale_key(x_map, y_map, QRectF(plot.canvas().contentsRect())))
+        if key != self._segment_grid_key:
+            self._segment_grid = SegmentGrid(x_map.transform(self._series.xData()),
+                                             y_map.transform(self._series.yData()))
+            self._segment_grid_key = key
+
+        return self._segment_grid.find_nearest(pos.x(), pos.y(), max_distance)
+
+    def finish_stream(self) -> None:
         """
-        :return: object with lists of voltage and current values.
+        Method finishes streaming mode and sets collected points as a curve with closed loop.
+        """
+
+        if self._stream is None:
+            return
+
+        stream = self._stream
+        dtype = self._storage_policy.dtype or np.float64
+        curve = ArrayCurve(stream.x, stream.y, dtype) if len(stream) else None
+        self.set_curve(curve)
+
+    def get_curve(self) -> Optional[Union[ArrayCurve, Curve]]:
+        """
+        :return: object with voltage and current values.
         """
 
         return self._curve
@@ -88,15 +748,148 @@ class PlotCurve(QwtPlotCurve, QObject):
 
         return not self._curve
 
-    def set_curve(self, curve: Optional[Curve]) -> None:
+    def is_highlighted(self) -> bool:
+        """
+        :return: True if the curve is highlighted.
+        """
+
+        return self._highlighted
+
+    def is_streaming(self) -> bool:
         """
-        :param curve: object with lists of new voltage and current values.
+        :return: True if the curve is in streaming mode.
         """
 
-        self._set_curve(curve)
+        return self._stream is not None
+
+    def itemChanged(self) -> None:
+        """
+        Method notifies the plot that the curve has changed.
+        """
+
+        self._render_version += 1
+        super().itemChanged()
+
+    def refresh_curve(self) -> None:
+        """
+        Method redraws the current array-backed curve after its buffers have been changed in place. Scale of the plot
+        is not adjusted.
+        """
+
+        self._drop_pending_curve()
+        self._fingerprint = None
+        _plot_curve(self)
+        self._ivc_viewer._check_autoscale()
+        self.curve_changed.emit()
+
+    def set_curve(self, curve: Optional[Union[ArrayCurve, Curve]],
+                  bounds: Optional[Tuple[float, float, float, float]] = None) -> None:
+        """
+        Method sets new curve. If the curve has the same data as the shown curve, nothing is done: the shown curve
+        object is kept, the curve is not redrawn and signal curve_changed is not emitted.
+        :param curve: object with new voltage and current values. Voltage buffer of ArrayCurve with float64 values is
+        given to the plot without copying. Buffers of ArrayCurve that are read-only (for example, memory-mapped) are
+        given to the plot without copying and their data is not read until the curve is drawn. Curve must have the
+        same number of voltages and currents;
+        :param bounds: minimum and maximum voltages [V], minimum and maximum currents [A] of the curve if they are
+        known. Then all values of the curve are taken as finite and are not checked.
+        """
+
+        _check_curve(curve)
+        fingerprint = _get_fingerprint(curve)
+        if fingerprint is not None and fingerprint == self._fingerprint and self._stream is None and \
+                self._pending_curve is None:
+            return
+
+        self._set_curve(curve, fingerprint, bounds)
         self._ivc_viewer._adjust_scale()
         self.curve_changed.emit()
 
+    def set_curve_async(self, curve: Optional[Union[ArrayCurve, Curve]], thread_pool: Optional[QThreadPool] = None
+                        ) -> None:
+        """
+        Method prepares the curve for drawing (unit conversion, loop closing, bounds and decimation) in worker thread.
+        The curve is set when the data is ready, then signal curve_changed is emitted. If another curve is set
+        before that, the prepared data is dropped. The curve must not be changed while it is being prepared.
+        :param curve: object with new voltage and current values;
+        :param thread_pool: thread pool for preparation. Global thread pool is used by default.
+        """
+
+        if curve is None or curve == (None, None):
+            self.set_curve(None)
+            return
+
+        _check_curve(curve)
+        curve = _apply_storage_policy(curve, self._storage_policy)
+        self._generation += 1
+        self._pending_curve = curve
+        kwargs = {}
+        plot = self.plot()
+        if plot is not None and self._decimation_enabled:
+            kwargs = {"x_map": plot.canvasMap(self.xAxis()),
+                      "y_map": plot.canvasMap(self.yAxis()),
+                      "canvas_rect": QRectF(plot.canvas().contentsRect()),
+                      "points_per_pixel": self.DECIMATION_POINTS_PER_PIXEL}
+        task = CurvePreparationTask(self.curve_prepared, self._generation, curve.voltages, curve.currents,
+                                    self.CURRENT_FACTOR, dtype=self._storage_policy.dtype or np.float64, **kwargs)
+        (thread_pool or QThreadPool.globalInstance()).start(task)
+
+    def set_highlighted(self, highlighted: bool) -> None:
+        """
+        :param highlighted: if True then the curve is drawn over a wide semi-transparent line of its color.
+        """
+
+        if self._highlighted != highlighted:
+            self._highlighted = highlighted
+            self.itemChanged()
+
+    def set_storage_policy(self, policy: StoragePolicy) -> None:
+        """
+        Method sets policy for storing curve data. The current curve is stored again according to the new policy.
+        :param policy: policy for storing curve data.
+        """
+
+        if not isinstance(policy, StoragePolicy):
+            raise TypeError("Invalid type of argument passed. Allowed type: StoragePolicy")
+
+        self._storage_policy = policy
+        if self._curve is not None and self._stream is None:
+            self._fingerprint = None
+            self.set_curve(self._curve)
+
+    def start_stream(self, capacity: int) -> None:
+        """
+        Method starts streaming mode in which points are added to the curve as they arrive from the instrument. The
+        current curve is removed. Points are kept in a ring buffer, so only the last capacity points are shown.
+        :param capacity: maximum number of points in the curve.
+        """
+
+        self._curve = None
+        self._drop_pending_curve()
+        self._fingerprint = None
+        self._stream = RingBuffer(capacity)
+        self._series.set_samples(self._stream.x, self._stream.y, finite=False, y_factor=self.CURRENT_FACTOR)
+        self.dataChanged()
+
+    def update_curve(self, voltages: Sequence[float], currents: Sequence[float]) -> None:
+        """
+        Method overwrites the buffers of the current array-backed curve in place. Scale of the plot is not adjusted.
+        If the number of points has changed or the current curve is not an ArrayCurve, new curve is set instead.
+        :param voltages: new voltage values;
+        :param currents: new current values.
+        """
+
+        curve = self._curve
+        if not isinstance(curve, ArrayCurve) or len(curve) != len(voltages) or len(curve) != len(currents) or \
+                not curve.voltages.flags.writeable:
+            dtype = curve.dtype if isinstance(curve, ArrayCurve) else self._storage_policy.dtype or np.float64
+            self.set_curve(ArrayCurve(voltages, currents, dtype))
+            return
+
+        curve.voltages[:] = voltages
+        curve.currents[:] = currents
+        self.refresh_curve()
+
     def set_curve_params(self, param: Union[QBrush, QColor, QPen] = QColor(0, 0, 0, 200)) -> None:
         """
         :param param: brush, color or pen for curve.
@@ -112,13 +905,138 @@ class PlotCurve(QwtPlotCurve, QObject):
             raise TypeError("Invalid type of argument passed. Allowed types: QBrush, QColor and QPen")
 
 
-def _plot_curve(curve_plot: PlotCurve) -> None:
-    if curve_plot.curve is None or curve_plot.curve == (None, None):
-        curve_plot.setData((), ())
+def _apply_storage_policy(curve: Union[ArrayCurve, Curve], policy: StoragePolicy) -> Union[ArrayCurve, Curve]:
+    """
+    :param curve: curve to be stored;
+    :param policy: policy for storing curves.
+    :return: given curve or its copy in array-backed buffers of data type required by policy.
+    """
+
+    if isinstance(curve, ArrayCurve):
+        if policy.dtype is None or curve.dtype == policy.dtype:
+            return curve
+    elif policy.dtype is None and policy.keep_closed_copy:
+        return curve
+    return ArrayCurve(curve.voltages, curve.currents, policy.dtype or np.float64)
+
+
+def _check_curve(curve: Optional[Union[ArrayCurve, Curve]]) -> None:
+    """
+    :param curve: curve to be set.
+    """
+
+    if curve is not None and curve != (None, None) and len(curve.voltages) != len(curve.currents):
+        raise ValueError(f"Curve must have the same number of voltages and currents, got {len(curve.voltages)} "
+                         f"voltages and {len(curve.currents)} currents")
+
+
+def _get_buffer(buffer: Optional[np.ndarray], size: int, dtype: type = np.float64) -> np.ndarray:
+    """
+    :param buffer: existing buffer;
+    :param size: required buffer size;
+    :param dtype: required data type of buffer.
+    :return: existing buffer if it has required size and data type, otherwise new buffer.
+    """
+
+    if buffer is None or buffer.size != size or buffer.dtype != dtype:
+        buffer = np.empty(size, dtype=dtype)
+    return buffer
+
+
+def _get_fingerprint(curve: Optional[Union[ArrayCurve, Curve]]) -> Optional[bytes]:
+    """
+    :param curve: curve.
+    :return: digest of curve data. Curves with equal digests are drawn in the same way. None if the curve has
+    read-only buffers, so that memory-mapped data is not read.
+    """
+
+    if curve is None or curve == (None, None) or len(curve.voltages) == 0:
+        return b""
+
+    if _is_read_only(curve):
+        return None
+
+    if isinstance(curve, ArrayCurve):
+        voltages, currents = curve.voltages, curve.currents
+    else:
+        voltages = np.asarray(curve.voltages, dtype=np.float64)
+        currents = np.asarray(curve.currents, dtype=np.float64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{type(curve).__name__}:{voltages.dtype.str}:{voltages.size}:{currents.size}".encode())
+    digest.update(np.ascontiguousarray(voltages))
+    digest.update(np.ascontiguousarray(currents))
+    return digest.digest()
+
+
+def _is_read_only(curve: Union[ArrayCurve, Curve]) -> bool:
+    """
+    :param curve: curve.
+    :return: True if the curve is array-backed and its buffers are read-only.
+    """
+
+    return isinstance(curve, ArrayCurve) and not (curve.voltages.flags.writeable and curve.currents.flags.writeable)
+
+
+def _merge_bounds(bounds_1: Tuple[float, float, float, float],
+                  bounds_2: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+    """
+    :param bounds_1: first bounds (x_min, x_max, y_min, y_max);
+    :param bounds_2: second bounds (x_min, x_max, y_min, y_max).
+    :return: bounds that contain both given bounds.
+    """
+
+    return (min(bounds_1[0], bounds_2[0]), max(bounds_1[1], bounds_2[1]), min(bounds_1[2], bounds_2[2]),
+            max(bounds_1[3], bounds_2[3]))
+
+
+def _plot_curve(curve_plot: PlotCurve, bounds: Optional[Tuple[float, float, float, float]] = None) -> None:
+    """
+    :param curve_plot: curve of plot;
+    :param bounds: minimum and maximum voltages [V], minimum and maximum currents [A] of the curve if they are known.
+    """
+
+    curve = curve_plot.curve
+    if curve is None or curve == (None, None) or len(curve.voltages) == 0:
+        curve_plot._series.set_samples(np.empty(0), np.empty(0))
+        curve_plot.dataChanged()
+        return
+
+    finite = bounds is None
+    if bounds is not None:
+        bounds = (bounds[0], bounds[1], bounds[2] * PlotCurve.CURRENT_FACTOR, bounds[3] * PlotCurve.CURRENT_FACTOR)
+    policy = curve_plot.storage_policy
+    curve = curve_plot._curve = _apply_storage_policy(curve, policy)
+    if not policy.keep_closed_copy or _is_read_only(curve):
+        # Curve buffers are given to the plot, currents are converted to mA when the curve is drawn. Read-only
+        # buffers are not copied, so memory-mapped data is read only when needed
+        curve.close_loop()
+        curve_plot._voltages_buffer = curve_plot._currents_buffer = None
+        curve_plot._series.set_samples(curve.closed_voltages, curve.closed_currents, finite, bounds,
+                                       PlotCurve.CURRENT_FACTOR)
+        curve_plot.dataChanged()
+        return
+
+    # Buffers are reused while the number of points does not change
+    size = len(curve.voltages) + 1
+    dtype = policy.dtype or np.float64
+    currents = curve_plot._currents_buffer = _get_buffer(curve_plot._currents_buffer, size, dtype)
+    if isinstance(curve, ArrayCurve):
+        curve.close_loop()
+        if curve.dtype == dtype:
+            voltages = curve.closed_voltages
+        else:
+            voltages = curve_plot._voltages_buffer = _get_buffer(curve_plot._voltages_buffer, size)
+            voltages[:] = curve.closed_voltages
+        np.multiply(curve.closed_currents, PlotCurve.CURRENT_FACTOR, out=currents)
     else:
         # Get curves and close the loop
-        voltages = np.append(curve_plot.curve.voltages, curve_plot.curve.voltages[0])
-        currents = np.append(curve_plot.curve.currents, curve_plot.curve.currents[0]) * 1000
+        voltages = curve_plot._voltages_buffer = _get_buffer(curve_plot._voltages_buffer, size)
+        voltages[:-1] = curve.voltages
+        voltages[-1] = voltages[0]
+        currents[:-1] = curve.currents
+        currents[-1] = currents[0]
+        currents *= PlotCurve.CURRENT_FACTOR
 
-        # Setting curve data: (voltage [V], current [mA])
-        curve_plot.setData(voltages, currents)
+    # Setting curve data: (voltage [V], current [mA])
+    curve_plot._series.set_samples(voltages, currents, finite, bounds)
+    curve_plot.dataChanged()
@@ -0,0 +1,39 @@
+from typing import Tuple
+import numpy as np
+
+
+def decimate_min_max(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Function reduces the number of points of a polyline given in pixel coordinates keeping its visual envelope.
+    Consecutive points that fall into the same pixel column form a run. Each run is replaced by its first point,
+    points with minimum and maximum y values and its last point. The order of points is kept, so closed loops and
+    curves with several branches are drawn correctly.
+    :param x: x coordinates of points in pixels;
+    :param y: y coordinates of points in pixels.
+    :return: x and y coordinates of reduced polyline.
+    """
+
+    if x.size < 3:
+        return x, y
+
+    columns = np.floor(x)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+    ends = np.append(starts[1:], x.size) - 1
+    lengths = ends - starts + 1
+
+    reduced_x = np.empty((starts.size, 4))
+    reduced_y = np.empty((starts.size, 4))
+    reduced_x[:, 0] = x[starts]
+    reduced_y[:, 0] = y[starts]
+    reduced_x[:, 1] = x[starts]
+    reduced_y[:, 1] = np.minimum.reduceat(y, starts)
+    reduced_x[:, 2] = x[ends]
+    reduced_y[:, 2] = np.maximum.reduceat(y, starts)
+    reduced_x[:, 3] = x[ends]
+    reduced_y[:, 3] = y[ends]
+
+    # Runs of one or two points are kept as they are
+    mask = np.ones((starts.size, 4), dtype=bool)
+    mask[lengths == 1, 1:] = False
+    mask[lengths == 2, 1:3] = False
+    return reduced_x[mask], reduced_y[mask]
@@ -0,0 +1,360 @@
+import json
+import re
+import struct
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Pattern, Sequence, Tuple, Union
+import numpy as np
+from PyQt5.QtCore import pyqtBoundSignal, QRunnable, Qt
+from PyQt5.QtGui import QColor, QPen
+from ivviewer.curve import ArrayCurve, Curve
+
+
+ARCHIVE_ALIGNMENT: int = 64  # arrays stored without compression start at offsets that are multiples of this value
+ARCHIVE_VERSION: int = 1  # version of archive index format
+CHUNK_SIZE: int = 100000  # number of points formatted at once when curves are written
+# Colon at the end of line with curve title followed by line with units. Pattern starts with colon rather than with
+# line start, so that regular expression engine quickly skips lines with values
+HEADER_PATTERN: Pattern = re.compile(r":[ \t]*\n(?P<units>[^\n]*)(\n|$)")
+# Local header of ZIP archive member: signature, version, flags, compression, time, date, CRC, compressed size, size,
+# lengths of name and extra field
+LOCAL_HEADER_FORMAT: str = "<4s5H3L2H"
+LOCAL_HEADER_SIGNATURE: bytes = b"PK\x03\x04"
+LOCAL_HEADER_SIZE: int = struct.calcsize(LOCAL_HEADER_FORMAT)
+PADDING_EXTRA_ID: int = 0xD935  # ID of extra field with padding that aligns data of archive member
+ZIP64_EXTRA_SIZE: int = 20  # size of ZIP64 extra field that zipfile adds to local header
+
+
+@dataclass
+class FileCurve:
+    """
+    Curve read from file with IV curves.
+    """
+
+    title: str
+    curve: ArrayCurve
+    x_unit: str
+    y_unit: str
+    pen: Optional[QPen] = None
+    bounds: Optional[Tuple[float, float, float, float]] = None  # minimum and maximum voltages and currents if known
+
+
+class IvcWriteTask(QRunnable):
+    """
+    Task to write IV curves to CSV file in thread pool.
+    """
+
+    def __init__(self, file_name: str, curves: Sequence[Tuple[str, Sequence[float], Sequence[float]]], x_unit: str,
+                 y_unit: str, progress_signal: pyqtBoundSignal, finished_signal: pyqtBoundSignal,
+                 failed_signal: pyqtBoundSignal) -> None:
+        """
+        :param file_name: name of CSV file;
+        :param curves: titles, voltages and currents of curves. Data must not be changed while the task is running;
+        :param x_unit: unit of voltage;
+        :param y_unit: unit of current;
+        :param progress_signal: signal with numbers of written points and all points;
+        :param finished_signal: signal with file name that is emitted when file is written;
+        :param failed_signal: signal with error message that is emitted if file cannot be written.
+        """
+
+        super().__init__()
+        self._curves: Sequence[Tuple[str, Sequence[float], Sequence[float]]] = curves
+        self._failed_signal: pyqtBoundSignal = failed_signal
+        self._file_name: str = file_name
+        self._finished_signal: pyqtBoundSignal = finished_signal
+        self._progress_signal: pyqtBoundSignal = progress_signal
+        self._x_unit: str = x_unit
+        self._y_unit: str = y_unit
+
+    def run(self) -> None:
+        try:
+            write_ivc(self._file_name, self._curves, self._x_unit, self._y_unit, self._progress_signal.emit)
+        except Exception as exc:
+            self._failed_signal.emit(str(exc))
+            return
+        self._finished_signal.emit(self._file_name)
+
+
+def _get_closed_values(curve: Union[ArrayCurve, Curve]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :param curve: curve.
+    :return: voltages and currents of curve with closing point.
+    """
+
+    if isinstance(curve, ArrayCurve):
+        curve.close_loop()
+        return curve.closed_voltages, curve.closed_currents
+
+    voltages = np.asarray(curve.voltages, dtype=np.float64)
+    currents = np.asarray(curve.currents, dtype=np.float64)
+    return np.append(voltages, voltages[:1]), np.append(currents, currents[:1])
+
+
+def _create_member_info(archive: zipfile.ZipFile, name: str) -> zipfile.ZipInfo:
+    """
+    Function creates information about the member that is written next to archive. If the member is stored without
+    compression, the extra field of its local header is padded so that its data starts at offset that is a multiple
+    of ARCHIVE_ALIGNMENT. NPY header is padded to the same alignment, so the array can be memory-mapped.
+    :param archive: archive opened for writing;
+    :param name: name of member.
+    :return: information about member.
+    """
+
+    info = zipfile.ZipInfo(name, time.localtime()[:6])
+    info.compress_type = archive.compression
+    if info.compress_type == zipfile.ZIP_STORED:
+        size = archive.fp.tell() + LOCAL_HEADER_SIZE + len(name.encode("utf-8")) + 4 + ZIP64_EXTRA_SIZE
+        padding = -size % ARCHIVE_ALIGNMENT
+        info.extra = struct.pack("<2H", PADDING_EXTRA_ID, padding) + bytes(padding)
+    return info
+
+
+def _get_bounds(voltages: np.ndarray, currents: np.ndarray) -> Optional[Tuple[float, float, float, float]]:
+    """
+    :param voltages: voltage values;
+    :param currents: current values.
+    :return: minimum and maximum voltages, minimum and maximum currents, or None if there are not finite values.
+    """
+
+    # The sum is not finite if there is any NaN or infinity in the array
+    if not (np.isfinite(voltages.sum()) and np.isfinite(currents.sum())):
+        return None
+    return float(voltages.min()), float(voltages.max()), float(currents.min()), float(currents.max())
+
+
+def _map_archive_member(file_name: str, info: zipfile.ZipInfo) -> Optional[np.ndarray]:
+    """
+    Function maps array stored without compression in ZIP archive into memory.
+    :param file_name: name of archive;
+    :param info: information about archive member with array in NPY format.
+    :return: read-only memory-mapped array or None if the member is compressed or encrypted, or its data is not
+    aligned for the data type of array. Then the array should be read.
+    """
+
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x01:
+        return None
+
+    with open(file_name, "rb") as file:
+        file.seek(info.header_offset)
+        signature, _, flags, compression, _, _, _, _, _, name_length, extra_length = \
+            struct.unpack(LOCAL_HEADER_FORMAT, file.read(LOCAL_HEADER_SIZE))
+        if signature != LOCAL_HEADER_SIGNATURE or flags & 0x01 or compression != zipfile.ZIP_STORED or \
+                name_length != len(info.filename.encode("utf-8")):
+            raise ValueError(f"Invalid local header of member {info.filename} in archive {file_name}")
+
+        start = info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length
+        file.seek(start)
+        version = np.lib.format.read_magic(file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+        offset = file.tell()
+    if offset + dtype.itemsize * int(np.prod(shape)) > start + info.file_size:
+        raise ValueError(f"Array {info.filename} does not fit into member data in archive {file_name}")
+
+    if offset % dtype.alignment:
+        return None
+    if not all(shape):
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(file_name, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def _parse_values(text: str) -> Optional[np.ndarray]:
+    """
+    :param text: lines with voltage and current values separated by comma.
+    :return: array with shape (number of lines, 2) or None if text has invalid format.
+    """
+
+    text = text.strip()
+    if not text:
+        return np.empty((0, 2))
+
+    # Separators must alternate: comma between voltage and current, new line between points
+    codes = np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+    separators = codes[(codes == ord(",")) | (codes == ord("\n"))]
+    if separators.size % 2 != 1 or np.any(separators[0::2] != ord(",")) or np.any(separators[1::2] != ord("\n")):
+        return None
+
+    try:
+        values = np.array(text.replace("\n", ",").split(","), dtype=np.float64)
+    except ValueError:
+        return None
+    return values.reshape(-1, 2)
+
+
+def _format_values(values: Sequence[float]) -> List[str]:
+    """
+    :param values: array or list of numbers.
+    :return: numbers formatted as Python prints them. Numbers are formatted in bulk, integers of lists are written
+    without decimal point.
+    """
+
+    if isinstance(values, np.ndarray):
+        return values.astype(str).tolist()
+
+    array = np.asarray(values)
+    formatted = array.astype(str)
+    if array.dtype.kind == "f":
+        # List with integers and floats is converted to float array, integers are formatted separately
+        is_int = np.fromiter(map(int.__instancecheck__, values), dtype=bool, count=len(values))
+        if is_int.any():
+            formatted[is_int] = array[is_int].astype(np.int64).astype(str)
+    return formatted.tolist()
+
+
+def format_points(voltages: Sequence[float], currents: Sequence[float]) -> str:
+    """
+    Function formats points as lines "voltage, current". Numbers look like the numbers printed by Python.
+    :param voltages: voltage values;
+    :param currents: current values.
+    :return: lines with points, each line ends with new line character.
+    """
+
+    if len(voltages) == 0:
+        return ""
+
+    lines = map(", ".join, zip(_format_values(voltages), _format_values(currents)))
+    return "\n".join(lines) + "\n"
+
+
+def read_ivc(file_name: str) -> List[FileCurve]:
+    """
+    Function reads IV curves from CSV file in the format of IvcViewer.export_ivc: for each curve there is a line with
+    curve title and colon, a line with units of voltage and current and lines with voltage and current values. Values
+    of each curve are parsed by NumPy at once.
+    :param file_name: name of CSV file.
+    :return: list of curves.
+    """
+
+    with open(file_name, "r") as file:
+        text = file.read()
+
+    headers = list(HEADER_PATTERN.finditer(text))
+    title_starts = [text.rfind("\n", 0, header.start()) + 1 for header in headers]
+    if text[:title_starts[0] if headers else len(text)].strip():
+        raise ValueError(f"Values without curve title in file {file_name}")
+
+    curves = []
+    for header_index, header in enumerate(headers):
+        title = text[title_starts[header_index]:header.start()].strip()
+        units = tuple(unit.strip() for unit in header.group("units").split(",", 1))
+        if len(units) != 2:
+            raise ValueError(f"Invalid units of curve '{title}' in file {file_name}")
+
+        end = title_starts[header_index + 1] if header_index + 1 < len(headers) else len(text)
+        values = _parse_values(text[header.end():end])
+        if values is None:
+            raise ValueError(f"Invalid values of curve '{title}' in file {file_name}")
+        curves.append(FileCurve(title, ArrayCurve(values[:, 0], values[:, 1]), *units))
+    return curves
+
+
+def read_ivc_archive(file_name: str, mmap: bool = True) -> List[FileCurve]:
+    """
+    Function reads IV curves from archive written by write_ivc_archive. Arrays of archive without compression are
+    memory-mapped, so only data of the curves that are used is read from disk. Bounds of curves are taken from the
+    index of archive. Arrays whose data is not aligned for their data type (archives written without alignment
+    padding) are read.
+    :param file_name: name of archive;
+    :param mmap: if True, then arrays stored without compression are memory-mapped, otherwise they are read.
+    :return: list of curves. Buffers of memory-mapped curves are read-only.
+    """
+
+    with zipfile.ZipFile(file_name) as archive:
+        index = json.loads(str(np.lib.format.read_array(archive.open("index.npy"))))
+        if index.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported version of IV curve archive {file_name}")
+
+        arrays = []
+        for name in ("voltages.npy", "currents.npy"):
+            array = _map_archive_member(file_name, archive.getinfo(name)) if mmap else None
+            if array is None:
+                with archive.open(name) as member:
+                    array = np.lib.format.read_array(member)
+            arrays.append(array)
+
+    voltages, currents = arrays
+    curves = []
+    for item in index["curves"]:
+        start, stop = item["offset"], item["offset"] + item["length"] + 1
+        pen = item.get("pen")
+        if pen is not None:
+            pen = QPen(QColor(pen["color"]), pen["width"], Qt.PenStyle(pen["style"]))
+        curve = ArrayCurve.from_buffers(voltages[start:stop], currents[start:stop])
+        bounds = item.get("bounds")
+        curves.append(FileCurve(item["title"], curve, index["x_unit"], index["y_unit"], pen,
+                                None if bounds is None else tuple(bounds)))
+    return curves
+
+
+def write_ivc(file_name: str, curves: Sequence[Tuple[str, Sequence[float], Sequence[float]]], x_unit: str,
+              y_unit: str, progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    Function writes IV curves to CSV file: for each curve there is a line with curve title and colon, a line with
+    units of voltage and current and lines with voltage and current values.
+    :param file_name: name of CSV file;
+    :param curves: titles, voltages and currents of curves;
+    :param x_unit: unit of voltage;
+    :param y_unit: unit of current;
+    :param progress: function that is called with numbers of written points and all points.
+    """
+
+    total = sum(len(voltages) for _, voltages, _ in curves)
+    written = 0
+    with open(file_name, "w") as file:
+        for title, voltages, currents in curves:
+            file.write(f"\n{title}:\n{x_unit}, {y_unit}\n")
+            for start in range(0, len(voltages), CHUNK_SIZE):
+                stop = start + CHUNK_SIZE
+                file.write(format_points(voltages[start:stop], currents[start:stop]))
+                written += len(voltages[start:stop])
+                if progress is not None:
+                    progress(written, total)
+
+
+def write_ivc_archive(file_name: str, curves: Sequence[Tuple[str, Union[ArrayCurve, Curve], Optional[QPen]]],
+                      x_unit: str, y_unit: str, compress: bool = False) -> None:
+    """
+    Function writes IV curves to binary archive. Archive is ZIP file in NPZ format with arrays voltages and currents
+    (values of all curves one after another, each curve with closing point) and index (JSON string with titles,
+    positions of curves in arrays, bounds of curves with finite values, units and pens). Data of arrays without
+    compression is aligned to ARCHIVE_ALIGNMENT bytes.
+    :param file_name: name of archive;
+    :param curves: titles, curves and pens of curves;
+    :param x_unit: unit of voltage;
+    :param y_unit: unit of current;
+    :param compress: if True, then arrays are compressed. Compressed arrays cannot be memory-mapped when read.
+    """
+
+    items = []
+    voltages, currents = [], []
+    offset = 0
+    for title, curve, pen in curves:
+        if curve is None or len(curve.voltages) == 0:
+            continue
+
+        closed_voltages, closed_currents = _get_closed_values(curve)
+        voltages.append(closed_voltages)
+        currents.append(closed_currents)
+        item = {"title": title, "offset": offset, "length": closed_voltages.size - 1}
+        bounds = _get_bounds(closed_voltages, closed_currents)
+        if bounds is not None:
+            item["bounds"] = bounds
+        if pen is not None:
+            item["pen"] = {"color": pen.color().name(QColor.HexArgb), "width": pen.widthF(), "style": int(pen.style())}
+        items.append(item)
+        offset += closed_voltages.size
+
+    dtype = np.result_type(*voltages, *currents) if voltages else np.float64
+    index = {"version": ARCHIVE_VERSION, "x_unit": x_unit, "y_unit": y_unit, "curves": items}
+    arrays = {"index": np.array(json.dumps(index, ensure_ascii=False)),
+              "voltages": np.concatenate(voltages).astype(dtype, copy=False) if voltages else np.empty(0, dtype),
+              "currents": np.concatenate(currents).astype(dtype, copy=False) if currents else np.empty(0, dtype)}
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(file_name, "w", compression=compression, allowZip64=True) as archive:
+        for name, array in arrays.items():
+            with archive.open(_create_member_info(archive, f"{name}.npy"), "w", force_zip64=True) as member:
+                np.lib.format.write_array(member, array, allow_pickle=False)
@@ -1,19 +1,41 @@
+import logging
+import math
 import os
 import platform
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from functools import partial
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import numpy as np
-from PyQt5.QtCore import pyqtSignal, pyqtSlot, QCoreApplication as qApp, QEvent, QObject, QPoint, Qt
-from PyQt5.QtGui import QBrush, QColor, QCursor, QFont, QIcon, QMouseEvent, QPen
+from PyQt5.QtCore import (pyqtSignal, pyqtSlot, QBuffer, QCoreApplication as qApp, QEvent, QIODevice, QObject, QPoint,
+                          QPointF, QRectF, QSize, Qt, QThreadPool, QTimer)
+from PyQt5.QtGui import QBrush, QColor, QCursor, QFont, QIcon, QImage, QMouseEvent, QPainter, QPen, QPixmap
+from PyQt5.QtSvg import QSvgGenerator
 from PyQt5.QtWidgets import QAction, QFileDialog, QMenu
-from qwt import QwtLegend, QwtPlot, QwtPlotGrid, QwtPlotMarker, QwtText
-from ivviewer.cursor import IvcCursor, IvcCursors
-from ivviewer.curve import Curve, PlotCurve, Point
+from qwt import QwtLegend, QwtPlot, QwtPlotGrid, QwtPlotItem, QwtPlotMarker, QwtPlotRenderer, QwtText
+from qwt.scale_map import QwtScaleMap
+from ivviewer.compare import SortedCurves
+from ivviewer.cursor import ArrayCursors, IvcCursor, IvcCursors, _OverlayItem
+from ivviewer.curve import PlotCurve, Point, StoragePolicy
+from ivviewer.ivc_file import FileCurve, IvcWriteTask, read_ivc, read_ivc_archive, write_ivc, write_ivc_archive
+
+
+logger = logging.getLogger(__name__)
+
+
+class _TextMarker(_OverlayItem, QwtPlotMarker):
+    """
+    Marker with text. In layered rendering mode it is drawn over the cached image of static items.
+    """
 
 
 class IvcViewer(QwtPlot):
 
+    AUTOSCALE_MARGIN: float = 0.05  # part of scale that is added to the curves bounds
+    AUTOSCALE_SHRINK_INTERVAL: float = 1.0  # minimum time in seconds between two reductions of scale
+    AUTOSCALE_SHRINK_RATIO: float = 0.5  # scale is reduced only when curves take less than this part of it
+    CURVE_SELECTION_DISTANCE: float = 5  # maximum distance in pixels from click to the selected curve
     DEFAULT_AXIS_FONT_SIZE: int = 20
     DEFAULT_BACK_COLOR: QColor = QColor(0xe1, 0xed, 0xeb)
     DEFAULT_CENTER_TEXT_FONT_SIZE: int = 40
@@ -27,7 +49,12 @@ class IvcViewer(QwtPlot):
     DEFAULT_Y_UNIT: str = "А"
     MIN_BORDER_Y: float = 0.5
     MIN_BORDER_X: float = 1.0
+    SNAP_DISTANCE: float = 20  # maximum distance in pixels from mouse to the point of curve the cursor snaps to
     curve_changed: pyqtSignal = pyqtSignal()
+    curve_selected: pyqtSignal = pyqtSignal(object)  # selected curve or None if selection is cleared
+    ivc_export_failed: pyqtSignal = pyqtSignal(str)  # error message
+    ivc_export_finished: pyqtSignal = pyqtSignal(str)  # name of file with exported curves
+    ivc_export_progress: pyqtSignal = pyqtSignal(int, int)  # numbers of exported points and all points
     min_borders_changed: pyqtSignal = pyqtSignal()
 
     def __init__(self, owner, parent=None, solid_axis_enabled: bool = True, grid_color: QColor = None,
@@ -58,7 +85,19 @@ class IvcViewer(QwtPlot):
         :param accuracy: the accuracy with which you want to display coordinate values on cursors.
         """
 
+        self._batch_depth: int = 0
+        self._cursor_readout_enabled: bool = False
+        self._deferred_updates: Dict[str, bool] = {}
+        self._max_frame_rate: Optional[float] = None
+        self._static_layer_kept: bool = False  # True while changes that keep cached image of static items are made
+        self._replot_timer: Optional[QTimer] = None
+        self._static_layer_version: int = 0  # number that changes when any plot item changes
         super().__init__(parent)
+        self._replot_timer = QTimer(self)
+        self._replot_timer.setSingleShot(True)
+        self._replot_timer.timeout.connect(self._replot_by_timer)
+        self.ivc_export_failed.connect(self._handle_ivc_export_failure)
+        self._renderer: QwtPlotRenderer = QwtPlotRenderer(self)
         self._owner = owner
         self._axis_font: QFont = axis_font if isinstance(axis_font, QFont) else QFont("", self.DEFAULT_AXIS_FONT_SIZE)
         self._grid_color: QColor = grid_color if isinstance(grid_color, QColor) else self.DEFAULT_GRID_COLOR
@@ -85,6 +124,16 @@ class IvcViewer(QwtPlot):
         self._min_border_y: float = abs(float(IvcViewer.MIN_BORDER_Y))
         self._x_scale: float = None
         self._y_scale: float = None
+        self._autoscale_enabled: bool = False
+        self._auto_x_scale: Optional[float] = None
+        self._auto_y_scale: Optional[float] = None
+        self._auto_scale_shrink_time: float = 0
+        self._storage_policy: StoragePolicy = StoragePolicy()
+        self._layered_rendering: bool = False
+        self._static_layer: Optional[QPixmap] = None  # cached image of plot items that are not drawn on overlay
+        self._static_layer_key: Optional[Tuple] = None
+        self._curve_layers: Dict[PlotCurve, Tuple[Tuple, QPixmap]] = {}  # cached images of curves with their keys
+        self._curve_layers_enabled: bool = False
         # X Axis
         axis_pen = QPen(QBrush(self._grid_color), 2)
         self._xy_axis: QwtPlotMarker = QwtPlotMarker()
@@ -111,17 +160,26 @@ class IvcViewer(QwtPlot):
         self.enableAxis(QwtPlot.xBottom, axis_label_enabled)
         self.enableAxis(QwtPlot.yLeft, axis_label_enabled)
 
-        self.cursors: IvcCursors = IvcCursors(self, cursor_font, color_for_rest=color_for_rest_cursors,
-                                              color_for_selected=color_for_selected_cursor, x_label=x_label,
-                                              y_label=y_label, accuracy=accuracy)
+        self._cursors_params: Dict[str, Any] = {"font": cursor_font, "color_for_rest": color_for_rest_cursors,
+                                                "color_for_selected": color_for_selected_cursor, "x_label": x_label,
+                                                "y_label": y_label, "accuracy": accuracy}
+        self.cursors: IvcCursors = IvcCursors(self, **self._cursors_params)
         self.curves: List[PlotCurve] = []
         self._center_text: QwtText = None
-        self._center_text_marker: QwtPlotMarker = None
+        self._center_text_marker: _TextMarker = None
         self._lower_text: QwtText = None
-        self._lower_text_marker: QwtPlotMarker = None
+        self._lower_text_marker: _TextMarker = None
 
         self._add_cursor_mode: bool = False
         self._remove_cursor_mode: bool = False
+        self._snap_to_curves: bool = False
+        self._curve_selection_enabled: bool = False
+        self._selected_curve: Optional[PlotCurve] = None
+        self._readout: Optional[np.ndarray] = None
+        self._readout_positions: Optional[np.ndarray] = None  # positions of cursors for which readout is calculated
+        self._shown_readout: Optional[np.ndarray] = None  # readout shown in cursor texts
+        self._sorted_curves: Optional[SortedCurves] = None
+        self._sorted_curves_key: Optional[Tuple] = None
 
         self._context_menu_works_with_cursors: bool = True
         self._dir_path: str = "."
@@ -135,6 +193,7 @@ class IvcViewer(QwtPlot):
             "save_screenshot": {"default": "Сохранить изображение"},
         }
         self._left_button_pressed: bool = False
+        self._mouse_cursor_shape: Optional[Qt.CursorShape] = None  # shape of override cursor set by the plot
         self._set_axis_titles()
         self._adjust_scale()
 
@@ -149,7 +208,7 @@ class IvcViewer(QwtPlot):
         :return: maximum value (scale) along horizontal X axis.
         """
 
-        return self._get_scale(self._x_scale, self._min_border_x)
+        return self._get_scale(self._auto_x_scale if self._autoscale_enabled else self._x_scale, self._min_border_x)
 
     @property
     def y_scale(self) -> float:
@@ -157,31 +216,74 @@ class IvcViewer(QwtPlot):
         :return: maximum value (scale) along horizontal Y axis.
         """
 
-        return self._get_scale(self._y_scale, self._min_border_y)
+        return self._get_scale(self._auto_y_scale if self._autoscale_enabled else self._y_scale, self._min_border_y)
+
+    def _add_file_curves(self, file_curves: List[FileCurve]) -> List[PlotCurve]:
+        """
+        :param file_curves: curves read from file.
+        :return: added curves.
+        """
+
+        added_curves = []
+        with self.batch():
+            for file_curve in file_curves:
+                curve = self.add_curve(file_curve.title)
+                if file_curve.pen is not None:
+                    curve.set_curve_params(file_curve.pen)
+                curve.set_curve(file_curve.curve, file_curve.bounds)
+                added_curves.append(curve)
+        return added_curves
 
     def _adjust_scale(self) -> None:
         """
         Method disables autoscaling and specifies a fixed scales for axes.
         """
 
+        if self._batch_depth:
+            self._deferred_updates["scale"] = True
+            return
+
+        if self._autoscale_enabled:
+            self._update_auto_scales()
         x_scale = self.x_scale
         y_scale = self.y_scale
-        self.setAxisScale(QwtPlot.xBottom, -x_scale, x_scale)
-        self.setAxisScale(QwtPlot.yLeft, -y_scale, y_scale)
+        with self._keep_static_layer():
+            # Scales are compared when the cached image of static items is drawn
+            self.setAxisScale(QwtPlot.xBottom, -x_scale, x_scale)
+            self.setAxisScale(QwtPlot.yLeft, -y_scale, y_scale)
         self._update_align_lower_text(x_scale, y_scale)
 
     def _change_mouse_cursor(self, cursor_under_mouse: Optional[bool] = None) -> None:
         """
+        Method changes application override cursor only if the state of mouse (dragging cursor, hovering over cursor
+        or nothing) has changed.
         :param cursor_under_mouse: True if the mouse is pointing at the cursor.
         """
 
         if self._left_button_pressed:
-            mouse_cursor = QCursor(Qt.ClosedHandCursor)
+            shape = Qt.ClosedHandCursor
         elif cursor_under_mouse:
-            mouse_cursor = QCursor(Qt.PointingHandCursor)
+            shape = Qt.PointingHandCursor
         else:
-            mouse_cursor = None
-        self._set_mouse_cursor(mouse_cursor)
+            shape = None
+        if shape == self._mouse_cursor_shape:
+            return
+
+        self._mouse_cursor_shape = shape
+        self._set_mouse_cursor(None if shape is None else QCursor(shape))
+
+    def _check_autoscale(self) -> None:
+        """
+        Method adjusts scale if autoscale is enabled and the cached bounds of curves require new scale.
+        """
+
+        if not self._autoscale_enabled:
+            return
+
+        if self._batch_depth:
+            self._deferred_updates["scale"] = True
+        elif self._update_auto_scales():
+            self._adjust_scale()
 
     def _check_cursor_under_mouse(self, pos) -> bool:
         """
@@ -189,8 +291,78 @@ class IvcViewer(QwtPlot):
         :return: True if the mouse is hovering over a cursor.
         """
 
-        cursor_index = self.cursors.find_cursor_at_point(pos)
-        return self.cursors[cursor_index] is not None
+        return self.cursors.find_cursor_at_point(pos) is not None
+
+    @staticmethod
+    def _draw_items(painter: QPainter, items: List[QwtPlotItem], canvas_rect: QRectF, maps: List[QwtScaleMap]
+                    ) -> None:
+        """
+        Method draws given visible items as QwtPlot.drawItems does.
+        :param painter: painter;
+        :param items: plot items to be drawn;
+        :param canvas_rect: contents rectangle of the canvas;
+        :param maps: maps of all axes.
+        """
+
+        for item in items:
+            if item.isVisible():
+                painter.save()
+                antialiased = item.testRenderHint(QwtPlotItem.RenderAntialiased)
+                painter.setRenderHint(QPainter.Antialiasing, antialiased)
+                painter.setRenderHint(QPainter.HighQualityAntialiasing, antialiased)
+                item.draw(painter, maps[item.xAxis()], maps[item.yAxis()], canvas_rect)
+                painter.restore()
+
+    def _finish_batch(self) -> None:
+        """
+        Method applies updates that were deferred during batch update.
+        """
+
+        deferred_updates = self._deferred_updates
+        self._deferred_updates = {}
+        if deferred_updates.get("scale"):
+            self._adjust_scale()
+        if deferred_updates.get("layout"):
+            self.updateLayout()
+        self.setUpdatesEnabled(True)
+        if deferred_updates.get("replot"):
+            self.replot()
+        if deferred_updates.get("curve_changed"):
+            self.curve_changed.emit()
+
+    def _get_auto_scale(self, current_scale: Optional[float], required_scale: Optional[float],
+                        shrink_allowed: bool) -> Optional[float]:
+        """
+        :param current_scale: current automatic scale;
+        :param required_scale: the smallest scale at which all curves are visible;
+        :param shrink_allowed: if True, then scale can be reduced.
+        :return: new automatic scale.
+        """
+
+        if required_scale is None or required_scale <= 0:
+            return current_scale
+
+        if current_scale is None or required_scale > current_scale or \
+                (shrink_allowed and required_scale < current_scale * self.AUTOSCALE_SHRINK_RATIO):
+            return _round_up_scale(required_scale)
+
+        return current_scale
+
+    def _get_cursor_position(self, pos: QPoint) -> Point:
+        """
+        :param pos: position in the plot widget.
+        :return: position for cursor at axes coordinates. If snapping to curves is enabled, it is the nearest point of
+        visible curves not farther than SNAP_DISTANCE pixels. Otherwise, it is the position of mouse.
+        """
+
+        if self._snap_to_curves:
+            canvas_pos = QPointF(pos - self.canvas().pos())
+            points = [curve.find_nearest_point(canvas_pos, self.SNAP_DISTANCE) for curve in self.curves
+                      if curve.plot() is self and curve.isVisible()]
+            points = [point for point in points if point is not None]
+            if points:
+                return min(points, key=lambda point: point[1])[0]
+        return self._transform_point_coordinates(pos)
 
     def _get_default_path(self, file_base_name: str, extension: str) -> str:
         """
@@ -230,16 +402,108 @@ class IvcViewer(QwtPlot):
 
         return abs(min_border)
 
+    @pyqtSlot()
+    def _handle_curve_change(self) -> None:
+        """
+        Slot emits signal that curve has changed or defers it until the end of batch update.
+        """
+
+        if self._batch_depth:
+            self._deferred_updates["curve_changed"] = True
+        else:
+            self.curve_changed.emit()
+
+    @pyqtSlot(str)
+    def _handle_ivc_export_failure(self, message: str) -> None:
+        """
+        Slot logs error that occurred while IV curves were written to file in background.
+        :param message: error message.
+        """
+
+        logger.error("Failed to export IV curves: %s", message)
+
     def _handle_mouse_move_event(self, event: QMouseEvent) -> None:
         """
         :param event: mouse event.
         """
 
         pos = self.canvas().mapToParent(event.pos())
-        self._change_mouse_cursor(self._check_cursor_under_mouse(pos))
         if self._left_button_pressed:
-            pos_to_move = self._transform_point_coordinates(pos)
+            self._change_mouse_cursor()
+            pos_to_move = self._get_cursor_position(pos)
             self.cursors.move_cursor(pos_to_move)
+        else:
+            self._change_mouse_cursor(self._check_cursor_under_mouse(pos))
+
+    @staticmethod
+    def _is_overlay_item(item: QwtPlotItem) -> bool:
+        """
+        :param item: plot item.
+        :return: True if item is drawn over the cached image of static items in layered rendering mode.
+        """
+
+        return isinstance(item, _OverlayItem)
+
+    @contextmanager
+    def _keep_static_layer(self) -> Iterator[None]:
+        """
+        Context manager for changes that do not require redrawing of the cached image of static items in layered
+        rendering mode: changes of items drawn on overlay and changes of scales.
+        """
+
+        kept = self._static_layer_kept
+        self._static_layer_kept = True
+        try:
+            yield
+        finally:
+            self._static_layer_kept = kept
+
+    def _render_layer(self, items: List[QwtPlotItem], canvas_rect: QRectF, maps: List[QwtScaleMap],
+                      pixel_ratio: float, scale_key: Optional[Tuple] = None) -> QPixmap:
+        """
+        Method draws given items to transparent image of the canvas size.
+        :param items: plot items to be drawn;
+        :param canvas_rect: contents rectangle of the canvas;
+        :param maps: maps of all axes;
+        :param pixel_ratio: device pixel ratio of the canvas;
+        :param scale_key: scales and canvas geometry. If given, then curves are drawn from their cached images that
+        are redrawn only if the curve or the key has changed.
+        :return: image with items.
+        """
+
+        layer = QPixmap(canvas_rect.size().toSize() * pixel_ratio)
+        layer.setDevicePixelRatio(pixel_ratio)
+        layer.fill(Qt.transparent)
+        painter = QPainter(layer)
+        painter.translate(-canvas_rect.topLeft())
+        if scale_key is None:
+            self._draw_items(painter, items, canvas_rect, maps)
+            painter.end()
+            return layer
+
+        curve_layers = {}
+        for item in items:
+            if isinstance(item, PlotCurve) and item.isVisible():
+                key = (item.render_version, item.data_version, scale_key)
+                curve_key, curve_layer = self._curve_layers.get(item, (None, None))
+                if curve_key != key:
+                    curve_layer = self._render_layer([item], canvas_rect, maps, pixel_ratio)
+                curve_layers[item] = key, curve_layer
+                painter.drawPixmap(canvas_rect.topLeft(), curve_layer)
+            else:
+                self._draw_items(painter, [item], canvas_rect, maps)
+        painter.end()
+        # Images of removed and hidden curves are dropped
+        self._curve_layers = curve_layers
+        return layer
+
+    @pyqtSlot()
+    def _replot_by_timer(self) -> None:
+        """
+        Slot performs the replot scheduled by the frame rate limiter.
+        """
+
+        self.replot()
 
     def _set_axis_titles(self) -> None:
         x_axis_title = QwtText(self._x_title)
@@ -293,6 +557,50 @@ class IvcViewer(QwtPlot):
 
         self._lower_text_marker.setValue(-x_scale, -y_scale)
 
+    def _update_auto_scales(self) -> bool:
+        """
+        Method calculates scales at which all curves are visible using the cached bounds of curves. Scale grows at once
+        and is reduced only if the curves take small part of it, but not more often than once per
+        AUTOSCALE_SHRINK_INTERVAL seconds.
+        :return: True if scales have changed.
+        """
+
+        x_required, y_required = None, None
+        for curve in self.curves:
+            bounds = curve.bounds
+            if bounds is not None:
+                x_required = max(x_required or 0, abs(bounds[0]), abs(bounds[1]))
+                y_required = max(y_required or 0, abs(bounds[2]), abs(bounds[3]))
+        if x_required is not None:
+            x_required *= 1 + self.AUTOSCALE_MARGIN
+            y_required *= 1 + self.AUTOSCALE_MARGIN
+
+        now = time.monotonic()
+        shrink_allowed = now - self._auto_scale_shrink_time >= self.AUTOSCALE_SHRINK_INTERVAL
+        x_scale = self._get_auto_scale(self._auto_x_scale, x_required, shrink_allowed)
+        y_scale = self._get_auto_scale(self._auto_y_scale, y_required, shrink_allowed)
+        if (x_scale, y_scale) == (self._auto_x_scale, self._auto_y_scale):
+            return False
+
+        if (self._auto_x_scale is not None and x_scale < self._auto_x_scale) or \
+                (self._auto_y_scale is not None and y_scale < self._auto_y_scale):
+            self._auto_scale_shrink_time = now
+        self._auto_x_scale, self._auto_y_scale = x_scale, y_scale
+        return True
+
+    def _update_cursor_readout(self) -> None:
+        """
+        Method shows currents of curves at the voltages of cursors in cursor texts. Texts are changed only if readout
+        has been recalculated.
+        """
+
+        readout = self.get_cursor_readout()
+        if readout is self._shown_readout:
+            return
+
+        self._shown_readout = readout
+        self.cursors.set_readout([curve.curve_title for curve in self.curves], readout)
+
     @pyqtSlot(QPoint)
     def add_cursor(self, position: QPoint) -> None:
         """
@@ -300,7 +608,7 @@ class IvcViewer(QwtPlot):
         :param position: point where cursor should be placed.
         """
 
-        pos = self._transform_point_coordinates(position)
+        pos = self._get_cursor_position(position)
         self.cursors.add_cursor(pos)
 
     def add_curve(self, title: str = None) -> PlotCurve:
@@ -311,13 +619,60 @@ class IvcViewer(QwtPlot):
 
         if title is None:
             title = f"curve #{len(self.curves) + 1}"
-        curve = PlotCurve(self, title=title)
+        curve = PlotCurve(self, title=title, storage_policy=self._storage_policy)
         curve.set_curve_params(QColor(255, 0, 0, 200))
         curve.attach(self)
-        curve.curve_changed.connect(self.curve_changed.emit)
+        curve.curve_changed.connect(self._handle_curve_change)
         self.curves.append(curve)
         return curve
 
+    def attachItem(self, plot_item: QwtPlotItem, on: bool) -> None:
+        """
+        Method attaches or detaches plot item. Attaching and detaching of items drawn on overlay (cursors and texts)
+        keep the cached image of static items.
+        :param plot_item: plot item;
+        :param on: if True then item is attached, otherwise it is detached.
+        """
+
+        if not self._is_overlay_item(plot_item):
+            super().attachItem(plot_item, on)
+            return
+
+        with self._keep_static_layer():
+            super().attachItem(plot_item, on)
+
+    def autoRefresh(self) -> None:
+        """
+        Method is called when any plot item changes. It invalidates the cached image of static items (see
+        enable_layered_rendering) and refreshes the plot (see refresh_overlay).
+        """
+
+        if not self._static_layer_kept:
+            self._static_layer_version += 1
+        self.refresh_overlay()
+
+    @contextmanager
+    def batch(self) -> Iterator["IvcViewer"]:
+        """
+        Context manager for batch update of the plot. Scale adjustment, layout recalculation, replots and
+        curve_changed signal are deferred until the outermost block exits and then applied once.
+
+        with viewer.batch():
+            for curve, data in zip(viewer.curves, measurements):
+                curve.set_curve(data)
+            viewer.set_scale(6.0, 15.0)
+        """
+
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self.setUpdatesEnabled(False)
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._finish_batch()
+
     def check_non_empty_curves(self) -> bool:
         """
         Method checks if there are non-empty curves.
@@ -360,6 +715,47 @@ class IvcViewer(QwtPlot):
         self._adjust_scale()
         self.min_borders_changed.emit()
 
+    def drawCanvas(self, painter: QPainter) -> None:
+        """
+        Method draws plot items on the canvas. In layered rendering mode static items (grid, axes, curves) are drawn
+        from the cached image that is redrawn only if these items, scales or canvas size have changed. Cursors and
+        texts are drawn over the image, so moving a cursor does not redraw curves.
+        :param painter: painter of the canvas.
+        """
+
+        canvas_rect = QRectF(self.canvas().contentsRect())
+        if not self._layered_rendering or canvas_rect.isEmpty():
+            super().drawCanvas(painter)
+            return
+
+        maps = [self.canvasMap(axis) for axis in self.AXES]
+        items = self.itemList()
+        overlay_items = [item for item in items if self._is_overlay_item(item)]
+        static_items = [item for item in items if not self._is_overlay_item(item)]
+        pixel_ratio = painter.device().devicePixelRatioF()
+        scale_key = (pixel_ratio, canvas_rect.getRect(),
+                     tuple((map_.s1(), map_.s2(), map_.p1(), map_.p2()) for map_ in maps))
+        key = (self._static_layer_version, tuple(curve.data_version for curve in self.curves), scale_key)
+        if key != self._static_layer_key:
+            # Curves in streaming mode change without notification, so versions of curves data are checked too
+            self._static_layer = self._render_layer(static_items, canvas_rect, maps, pixel_ratio,
+                                                    scale_key if self._curve_layers_enabled else None)
+            self._static_layer_key = key
+
+        painter.drawPixmap(canvas_rect.topLeft(), self._static_layer)
+        self._draw_items(painter, overlay_items, canvas_rect, maps)
+
+    def enable_autoscale(self, enable: bool) -> None:
+        """
+        :param enable: if True then axes scales will be fitted to the curves. Scales set by user with set_scale are
+        not used while autoscale is enabled.
+        """
+
+        self._autoscale_enabled = enable
+        self._auto_x_scale = None
+        self._auto_y_scale = None
+        self._adjust_scale()
+
     def enable_context_menu(self, enable: bool) -> None:
         """
         :param enable: if True then context menu will be enabled.
@@ -375,6 +771,26 @@ class IvcViewer(QwtPlot):
             except Exception:
                 pass
 
+    def enable_array_cursors(self, enable: bool) -> None:
+        """
+        :param enable: if True then cursors are stored in NumPy array and drawn by one plot item (see ArrayCursors).
+        It is suitable for thousands of cursors. Existing cursors are moved to the new collection.
+        """
+
+        cursors_class = ArrayCursors if enable else IvcCursors
+        if type(self.cursors) is cursors_class:
+            return
+
+        positions = self.cursors.get_positions()
+        self.cursors.remove_all_cursors()
+        self.cursors.detach()
+        self.cursors = cursors_class(self, **self._cursors_params)
+        self.cursors.set_axis_labels(self._x_label, self._y_label)
+        if not self._center_text_marker:
+            self.cursors.attach(self)
+        self.cursors.add_cursors(positions)
+        self._shown_readout = None
+
     def enable_context_menu_for_cursors(self, enable: bool) -> None:
         """
         :param enable: if True then context menu can work with cursors.
@@ -382,6 +798,48 @@ class IvcViewer(QwtPlot):
 
         self._context_menu_works_with_cursors = enable
 
+    def enable_cursor_readout(self, enable: bool) -> None:
+        """
+        :param enable: if True then cursor texts show currents of all curves at the voltages of cursors.
+        """
+
+        self._cursor_readout_enabled = enable
+        self._shown_readout = None
+        if not enable:
+            self.cursors.set_readout([], None)
+
+    def enable_curve_selection(self, enable: bool) -> None:
+        """
+        :param enable: if True then click near a curve selects and highlights it, click far from curves clears
+        selection. Selection works when the widget is not in the state of adding or removing cursors.
+        """
+
+        self._curve_selection_enabled = enable
+        if not enable:
+            self.select_curve(None)
+
+    def enable_layered_rendering(self, enable: bool, curve_layers: bool = False) -> None:
+        """
+        :param enable: if True then static items (grid, axes, curves) are cached in an image and cursors and texts are
+        drawn over it, so cursors can be moved without redrawing curves;
+        :param curve_layers: if True then each curve is also cached in its own image, so when one curve changes only
+        this curve is redrawn. Each curve takes an image of the canvas size in memory.
+        """
+
+        self._curve_layers = {}
+        self._curve_layers_enabled = enable and curve_layers
+        self._layered_rendering = enable
+        self._static_layer = None
+        self._static_layer_key = None
+
+    def enable_snap_to_curves(self, enable: bool) -> None:
+        """
+        :param enable: if True then cursors are placed and moved to the nearest points of visible curves if they are
+        not farther than SNAP_DISTANCE pixels from mouse.
+        """
+
+        self._snap_to_curves = enable
+
     def eventFilter(self, obj: QObject, event: QEvent) -> bool:
         """
         :param obj: the object for which the event occurred;
@@ -389,25 +847,29 @@ class IvcViewer(QwtPlot):
         :return:
         """
 
-        if obj == self.canvas() and isinstance(event, QMouseEvent) and event.type() == QEvent.MouseMove:
-            self._handle_mouse_move_event(QMouseEvent(event))
+        event_type = event.type()
+        if event_type == QEvent.MouseMove and obj == self.canvas() and isinstance(event, QMouseEvent):
+            if self.cursors.is_empty() and not self._left_button_pressed:
+                # Nothing can be under the mouse, override cursor is removed if it was set before
+                self._change_mouse_cursor(False)
+            else:
+                self._handle_mouse_move_event(QMouseEvent(event))
             return True
 
+        if event_type == QEvent.Leave and obj == self.canvas() and not self._left_button_pressed:
+            self._change_mouse_cursor(False)
+
         return super().eventFilter(obj, event)
 
     @pyqtSlot()
-    def export_ivc(self, ask_where_to_export: bool = True) -> None:
+    def export_ivc(self, ask_where_to_export: bool = True, in_background: bool = False) -> None:
         """
         Slot exports IV curves to file.
-        :param ask_where_to_export: if True, then you need to ask the user where exactly to export curves.
+        :param ask_where_to_export: if True, then you need to ask the user where exactly to export curves;
+        :param in_background: if True, then file is written in worker thread. When the file is written, signal
+        ivc_export_finished is emitted, signal ivc_export_progress is emitted while the file is being written.
         """
 
-        def print_to_file(file_, curve_label: str, curve_: Curve) -> None:
-            print(f"\n{curve_label}:", file=file_)
-            print(f"{self._x_unit}, {self._y_unit}", file=file_)
-            for voltage, current in zip(curve_.voltages, curve_.currents):
-                print(f"{voltage}, {current}", file=file_)
-
         default_file_name = self._get_default_path("ivc", ".csv")
         options = {}
         if platform.system().lower() != "windows":
@@ -423,15 +885,93 @@ class IvcViewer(QwtPlot):
 
         if not file_name.endswith(".csv"):
             file_name += ".csv"
-        with open(file_name, "w") as file:
-            for curve in self.curves:
-                if curve is not None and not curve.is_empty():
-                    print_to_file(file, curve.curve_title, curve.curve)
+        curves = [(curve.curve_title, curve.curve.voltages, curve.curve.currents) for curve in self.curves
+                  if curve is not None and not curve.is_empty()]
+        if not in_background:
+            write_ivc(file_name, curves, self._x_unit, self._y_unit)
+            self.ivc_export_finished.emit(file_name)
+            return
+
+        # Curves can be changed while the file is being written, so the task gets copies of their data
+        curves = [(title, _copy_values(voltages), _copy_values(currents)) for title, voltages, currents in curves]
+        QThreadPool.globalInstance().start(IvcWriteTask(file_name, curves, self._x_unit, self._y_unit,
+                                                        self.ivc_export_progress, self.ivc_export_finished,
+                                                        self.ivc_export_failed))
+
+    def export_ivc_archive(self, file_name: str, compress: bool = False) -> None:
+        """
+        Method exports IV curves with their titles and pens to binary archive.
+        :param file_name: name of archive;
+        :param compress: if True, then curves are compressed. Archive without compression can be opened instantly
+        because the curves are memory-mapped.
+        """
+
+        curves = [(curve.curve_title, curve.curve, curve.pen()) for curve in self.curves
+                  if curve is not None and not curve.is_empty()]
+        write_ivc_archive(file_name, curves, self._x_unit, self._y_unit, compress)
+
+    def exportTo(self, filename: str, size: Tuple[int, int] = (800, 600), size_mm: Tuple[float, float] = None,
+                 resolution: float = 72.0, format_: str = None) -> None:
+        """
+        Method exports plot to PDF or image file. The renderer of the plot is reused.
+        :param filename: file name;
+        :param size: width and height in pixels;
+        :param size_mm: width and height in millimeters;
+        :param resolution: resolution in dots per inch;
+        :param format_: file format (PDF, SVG, PNG, ...). By default, it is determined by file extension.
+        """
+
+        if size_mm is None:
+            size_mm = tuple(25.4 * np.array(size) / resolution)
+        self._renderer.renderDocument(self, filename, size_mm, resolution, format_)
+
+    def find_curve_at_point(self, pos: QPoint) -> Optional[PlotCurve]:
+        """
+        Method finds the visible curve nearest to the given position among curves that are not farther than
+        CURVE_SELECTION_DISTANCE pixels. Segments of each curve are searched with a grid index (see
+        PlotCurve.find_nearest_segment).
+        :param pos: position in pixel coordinates of the widget.
+        :return: curve at given position or None.
+        """
+
+        canvas_pos = QPointF(pos - self.canvas().pos())
+        nearest_curve = None
+        nearest_distance = self.CURVE_SELECTION_DISTANCE
+        for curve in self.curves:
+            if curve.isVisible():
+                nearest = curve.find_nearest_segment(canvas_pos, nearest_distance)
+                if nearest is not None and (nearest_curve is None or nearest[1] < nearest_distance):
+                    nearest_curve, nearest_distance = curve, nearest[1]
+        return nearest_curve
+
+    def get_cursor_readout(self) -> np.ndarray:
+        """
+        Method returns currents of all curves at the voltages of cursors. Currents of all curves are interpolated at
+        once as in compare.resample_curves. Sorted points of curves are cached until curves change, and the result is
+        cached until curves or cursors change.
+        :return: array with shape (number of cursors, number of curves) with currents in units of plot. Currents of
+        empty curves are NaN. Array must not be changed.
+        """
 
-    def get_list_of_all_cursors(self) -> List[IvcCursor]:
+        curves_key = tuple((curve, curve.data_version) for curve in self.curves)
+        if curves_key != self._sorted_curves_key:
+            lengths = np.array([curve.dataSize() for curve in self.curves], dtype=np.int64)
+            voltages = np.concatenate([np.empty(0)] + [curve.data().xData() for curve in self.curves])
+            currents = np.concatenate([np.empty(0)] + [curve.data().yData() for curve in self.curves])
+            self._sorted_curves = SortedCurves.from_flat(voltages, currents, lengths)
+            self._sorted_curves_key = curves_key
+            self._readout = None
+
+        positions = self.cursors.get_positions()
+        if self._readout is None or positions is not self._readout_positions:
+            self._readout = self._sorted_curves.interpolate(positions[:, 0]).T
+            self._readout_positions = positions
+        return self._readout
+
+    def get_list_of_all_cursors(self) -> Union[List[IvcCursor], List[Point]]:
         """
         Method returns list of all cursors.
-        :return: list of all cursors.
+        :return: list of all cursors. If cursors are stored in array, list of positions of cursors is returned.
         """
 
         return self.cursors.cursors
@@ -454,6 +994,13 @@ class IvcViewer(QwtPlot):
         y_step = min([round(y_map[i + 1] - y_map[i], 2) for i in range(len(y_map) - 1)])
         return x_step, y_step
 
+    def get_selected_curve(self) -> Optional[PlotCurve]:
+        """
+        :return: selected curve or None.
+        """
+
+        return self._selected_curve
+
     def get_state_adding_cursor(self) -> bool:
         """
         :return: True if the widget is in the state of adding cursors when the left mouse button is pressed.
@@ -468,6 +1015,26 @@ class IvcViewer(QwtPlot):
 
         return self._remove_cursor_mode
 
+    def import_ivc(self, file_name: str) -> List[PlotCurve]:
+        """
+        Method adds IV curves from CSV file written by export_ivc to the plot.
+        :param file_name: name of CSV file.
+        :return: added curves.
+        """
+
+        return self._add_file_curves(read_ivc(file_name))
+
+    def import_ivc_archive(self, file_name: str, mmap: bool = True) -> List[PlotCurve]:
+        """
+        Method adds IV curves from binary archive to the plot.
+        :param file_name: name of archive;
+        :param mmap: if True, then curves of archive without compression are memory-mapped and read from disk only
+        when they are drawn.
+        :return: added curves.
+        """
+
+        return self._add_file_curves(read_ivc_archive(file_name, mmap))
+
     def localize_widget(self, **kwargs) -> None:
         """
         :param kwargs: dictionary with translation for context menu items.
@@ -487,7 +1054,7 @@ class IvcViewer(QwtPlot):
             self.cursors.set_current_cursor(event_pos)
             cursor_under_mouse = self._check_cursor_under_mouse(event_pos)
             if self._add_cursor_mode and not cursor_under_mouse:
-                pos = self._transform_point_coordinates(event_pos)
+                pos = self._get_cursor_position(event_pos)
                 self.cursors.add_cursor(pos)
             elif self._add_cursor_mode and cursor_under_mouse:
                 self._left_button_pressed = True
@@ -496,6 +1063,8 @@ class IvcViewer(QwtPlot):
                 self._left_button_pressed = False
             elif not self._add_cursor_mode and not self._remove_cursor_mode and cursor_under_mouse:
                 self._left_button_pressed = True
+            elif not self._add_cursor_mode and not self._remove_cursor_mode and self._curve_selection_enabled:
+                self.select_curve(self.find_curve_at_point(event_pos))
             self._change_mouse_cursor()
         event.accept()
 
@@ -505,9 +1074,10 @@ class IvcViewer(QwtPlot):
         :param event: mouse release event.
         """
 
-        if event.button() == Qt.LeftButton and self._check_cursor_under_mouse(event.pos()):
+        if event.button() == Qt.LeftButton:
+            # Dragging is finished even if the cursor is not under the mouse, for example, when it has snapped to curve
             self._left_button_pressed = False
-            self._change_mouse_cursor(True)
+            self._change_mouse_cursor(self._check_cursor_under_mouse(event.pos()))
         event.accept()
 
     def redraw_cursors(self) -> None:
@@ -517,6 +1087,23 @@ class IvcViewer(QwtPlot):
 
         self.cursors.paint_current_cursor()
 
+    def refresh_overlay(self) -> None:
+        """
+        Method replots the plot if autoReplot option is set. During batch update replot is deferred. If the frame rate
+        is limited, replot is scheduled so that it happens no more often than the given frame rate. Unlike autoRefresh
+        the method keeps the cached image of static items, so it is called by items drawn on overlay (cursors) when
+        they change.
+        """
+
+        if self._batch_depth:
+            self._deferred_updates["replot"] = True
+        elif self._max_frame_rate and self.autoReplot():
+            # All changes made until the timer fires are shown with one replot
+            if not self._replot_timer.isActive():
+                self._replot_timer.start(int(1000 / self._max_frame_rate))
+        else:
+            super().autoRefresh()
+
     @pyqtSlot()
     def remove_all_cursors(self) -> None:
         """
@@ -533,6 +1120,61 @@ class IvcViewer(QwtPlot):
 
         self.cursors.remove_current_cursor()
 
+    def render_image(self, size: Tuple[int, int] = (800, 600), dpi: float = 72.0) -> QImage:
+        """
+        Method renders the plot to image in memory.
+        :param size: width and height of image in pixels;
+        :param dpi: resolution of image in dots per inch. Fonts and pens given in points are scaled with it.
+        :return: image.
+        """
+
+        image = QImage(QSize(*size), QImage.Format_ARGB32)
+        dots_per_meter = int(round(dpi / 25.4 * 1000))
+        image.setDotsPerMeterX(dots_per_meter)
+        image.setDotsPerMeterY(dots_per_meter)
+        image.fill(QColor(Qt.white))
+        painter = QPainter(image)
+        self._renderer.render(self, painter, QRectF(0, 0, *size))
+        painter.end()
+        return image
+
+    def render_to_bytes(self, image_format: str = "png", size: Tuple[int, int] = (800, 600), dpi: float = 72.0
+                        ) -> bytes:
+        """
+        Method renders the plot to encoded image without saving it to file.
+        :param image_format: image format: svg or raster format supported by Qt (png, jpg, bmp, ...);
+        :param size: width and height of image in pixels;
+        :param dpi: resolution of image in dots per inch.
+        :return: encoded image.
+        """
+
+        buffer = QBuffer()
+        buffer.open(QIODevice.WriteOnly)
+        if image_format.lower() == "svg":
+            generator = QSvgGenerator()
+            generator.setOutputDevice(buffer)
+            generator.setResolution(int(round(dpi)))
+            generator.setSize(QSize(*size))
+            generator.setViewBox(QRectF(0, 0, *size))
+            painter = QPainter(generator)
+            self._renderer.render(self, painter, QRectF(0, 0, *size))
+            painter.end()
+        elif not self.render_image(size, dpi).save(buffer, image_format.upper()):
+            raise ValueError(f"Unsupported image format '{image_format}'")
+        buffer.close()
+        return bytes(buffer.data())
+
+    def replot(self) -> None:
+        """
+        Method redraws the plot. Scheduled replot is cancelled because it is no longer needed.
+        """
+
+        if self._replot_timer:
+            self._replot_timer.stop()
+        if self._cursor_readout_enabled:
+            self._update_cursor_readout()
+        super().replot()
+
     @pyqtSlot()
     def save_image(self, ask_where_to_save: bool = True) -> None:
         """
@@ -559,6 +1201,22 @@ class IvcViewer(QwtPlot):
             file_name += ".png"
         self.exportTo(file_name)
 
+    def select_curve(self, curve: Optional[PlotCurve]) -> None:
+        """
+        Method highlights given curve and emits signal curve_selected if the selected curve has changed.
+        :param curve: curve to be selected or None to clear selection.
+        """
+
+        if curve is self._selected_curve:
+            return
+
+        if self._selected_curve is not None:
+            self._selected_curve.set_highlighted(False)
+        self._selected_curve = curve
+        if curve is not None:
+            curve.set_highlighted(True)
+        self.curve_selected.emit(curve)
+
     def set_center_text(self, text: str, font: QFont = None, color: QColor = None) -> None:
         """
         :param text: text to be shown in the center of the widget;
@@ -579,7 +1237,7 @@ class IvcViewer(QwtPlot):
         self._center_text = QwtText(text)
         self._center_text.setFont(font if isinstance(font, QFont) else QFont("", self.DEFAULT_CENTER_TEXT_FONT_SIZE))
         self._center_text.setColor(color if isinstance(color, QColor) else self._text_color)
-        self._center_text_marker = QwtPlotMarker()
+        self._center_text_marker = _TextMarker()
         self._center_text_marker.setValue(0, 0)
         self._center_text_marker.setLabel(self._center_text)
         self._center_text_marker.attach(self)
@@ -600,13 +1258,25 @@ class IvcViewer(QwtPlot):
         self._lower_text.setFont(font if isinstance(font, QFont) else QFont("", self.DEFAULT_LOWER_TEXT_FONT_SIZE))
         self._lower_text.setColor(color if isinstance(color, QColor) else self._grid_color)
         self._lower_text.setRenderFlags(Qt.AlignLeft)
-        self._lower_text_marker = QwtPlotMarker()
+        self._lower_text_marker = _TextMarker()
         self._lower_text_marker.setSpacing(10)
         self._lower_text_marker.setLabelAlignment(Qt.AlignTop | Qt.AlignRight)
         self._lower_text_marker.setLabel(self._lower_text)
         self._lower_text_marker.attach(self)
         self._adjust_scale()
 
+    def set_max_frame_rate(self, frame_rate: Optional[float]) -> None:
+        """
+        Method limits how often the plot is replotted. Changes of curves, cursors and scales made between two frames
+        are shown with one replot.
+        :param frame_rate: maximum number of replots per second. If None or 0, the plot is replotted immediately after
+        every change.
+        """
+
+        self._max_frame_rate = abs(float(frame_rate)) if frame_rate else None
+        if not self._max_frame_rate and self._replot_timer.isActive():
+            self.replot()
+
     def set_min_borders(self, min_x: float, min_y: float) -> None:
         """
         :param min_x: minimum acceptable X axis scale;
@@ -637,6 +1307,21 @@ class IvcViewer(QwtPlot):
         self._y_scale = y_scale
         self._adjust_scale()
 
+    def set_storage_policy(self, policy: StoragePolicy) -> None:
+        """
+        Method sets policy for storing data of all curves of the plot. For example, with StoragePolicy(np.float32,
+        False) each point of a curve takes 8 bytes.
+        :param policy: policy for storing curve data.
+        """
+
+        if not isinstance(policy, StoragePolicy):
+            raise TypeError("Invalid type of argument passed. Allowed type: StoragePolicy")
+
+        self._storage_policy = policy
+        with self.batch():
+            for curve in self.curves:
+                curve.set_storage_policy(policy)
+
     def set_state_adding_cursor(self, state: bool) -> None:
         """
         :param state: if True, then a state will be set in which a marker will be added when the left mouse button is
@@ -698,7 +1383,7 @@ class IvcViewer(QwtPlot):
         action_export_ivc = QAction(QIcon(os.path.join(media_dir, "export.png")), self._get_item_label("export_ivc"),
                                     menu)
         action_export_ivc.setEnabled(non_empty_curves)
-        action_export_ivc.triggered.connect(self.export_ivc)
+        action_export_ivc.triggered.connect(lambda: self.export_ivc(True, in_background=True))
         menu.addAction(action_export_ivc)
         if self._context_menu_works_with_cursors:
             action_add_cursor = QAction(QIcon(os.path.join(media_dir, "add_cursor.png")),
@@ -727,3 +1412,37 @@ class IvcViewer(QwtPlot):
         if isinstance(legend_font, QFont):
             legend.setFont(legend_font)
         self.insertLegend(legend, QwtPlot.TopLegend)
+
+    def updateLayout(self) -> None:
+        """
+        Method adjusts plot content to the current widget size. During batch update layout recalculation is deferred.
+        """
+
+        if self._batch_depth:
+            self._deferred_updates["layout"] = True
+        else:
+            super().updateLayout()
+
+
+def _copy_values(values: Sequence[float]) -> Sequence[float]:
+    """
+    :param values: array or list of values.
+    :return: copy of values of the same type.
+    """
+
+    return values.copy() if isinstance(values, np.ndarray) else list(values)
+
+
+def _round_up_scale(value: float) -> float:
+    """
+    Function rounds value up to the nearest number of the form 1, 2 or 5 multiplied by a power of ten. Such rounding
+    prevents the scale from changing with every small change of curves.
+    :param value: positive value.
+    :return: rounded value.
+    """
+
+    power = 10 ** math.floor(math.log10(value))
+    for mantissa in (1, 2, 5, 10):
+        if mantissa * power >= value:
+            return mantissa * power
+    return 10 * power
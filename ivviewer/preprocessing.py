@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+import numpy as np
+from PyQt5.QtCore import pyqtBoundSignal, QRectF, QRunnable
+from PyQt5.QtGui import QPolygonF
+from qwt.plot_curve import array2d_to_qpolygonf
+from qwt.scale_map import QwtScaleMap
+from ivviewer.decimation import decimate_min_max
+
+
+@dataclass
+class PreparedCurve:
+    """
+    Curve data that is ready to be drawn.
+    """
+
+    voltages: np.ndarray  # voltages with closing point
+    currents: np.ndarray  # currents with closing point in units of plot
+    bounds: Optional[Tuple[float, float, float, float]]  # x_min, x_max, y_min, y_max
+    polyline: Optional[QPolygonF] = None  # decimated polyline in pixel coordinates
+    scale_key: Optional[Tuple] = None  # scales and canvas size for which polyline was calculated
+
+
+def get_scale_key(x_map: QwtScaleMap, y_map: QwtScaleMap, canvas_rect: QRectF) -> Tuple:
+    """
+    :param x_map: maps x values into pixel coordinates;
+    :param y_map: maps y values into pixel coordinates;
+    :param canvas_rect: contents rectangle of the canvas.
+    :return: tuple that changes when scales or canvas size change.
+    """
+
+    return (x_map.s1(), x_map.s2(), x_map.p1(), x_map.p2(), y_map.s1(), y_map.s2(), y_map.p1(), y_map.p2(),
+            canvas_rect.width(), canvas_rect.height())
+
+
+def prepare_curve(voltages: Iterable[float], currents: Iterable[float], current_factor: float,
+                  x_map: Optional[QwtScaleMap] = None, y_map: Optional[QwtScaleMap] = None,
+                  canvas_rect: Optional[QRectF] = None, points_per_pixel: Optional[int] = None,
+                  dtype: type = np.float64) -> PreparedCurve:
+    """
+    Function converts currents to units of plot, closes the loop, removes infinite values, calculates bounds and, if
+    scale maps are given and the curve is dense, decimates the curve. Function does not use plot objects, so it can
+    be run in worker thread.
+    :param voltages: voltage values;
+    :param currents: current values;
+    :param current_factor: factor to convert currents to units of plot;
+    :param x_map: maps x values into pixel coordinates;
+    :param y_map: maps y values into pixel coordinates;
+    :param canvas_rect: contents rectangle of the canvas;
+    :param points_per_pixel: curve is decimated if it has more points per pixel column of canvas;
+    :param dtype: data type of prepared arrays.
+    :return: prepared curve.
+    """
+
+    voltages = np.asarray(voltages)
+    currents = np.asarray(currents)
+    if voltages.size == 0:
+        return PreparedCurve(np.empty(0, dtype=dtype), np.empty(0, dtype=dtype), None)
+
+    closed_voltages = np.empty(voltages.size + 1, dtype=dtype)
+    closed_voltages[:-1] = voltages
+    closed_voltages[-1] = voltages[0]
+    closed_currents = np.empty(currents.size + 1, dtype=dtype)
+    np.multiply(currents, current_factor, out=closed_currents[:-1])
+    closed_currents[-1] = closed_currents[0]
+    indexes = np.logical_and(np.isfinite(closed_voltages), np.isfinite(closed_currents))
+    if not indexes.all():
+        closed_voltages = closed_voltages[indexes]
+        closed_currents = closed_currents[indexes]
+    if closed_voltages.size == 0:
+        return PreparedCurve(closed_voltages, closed_currents, None)
+
+    bounds = (float(closed_voltages.min()), float(closed_voltages.max()), float(closed_currents.min()),
+              float(closed_currents.max()))
+    prepared = PreparedCurve(closed_voltages, closed_currents, bounds)
+    if all(arg is not None for arg in (x_map, y_map, canvas_rect, points_per_pixel)) and \
+            closed_voltages.size > points_per_pixel * canvas_rect.width():
+        x = x_map.transform(closed_voltages.astype(np.float64, copy=False))
+        y = y_map.transform(closed_currents.astype(np.float64, copy=False))
+        prepared.polyline = array2d_to_qpolygonf(*decimate_min_max(x, y))
+        prepared.scale_key = get_scale_key(x_map, y_map, canvas_rect)
+    return prepared
+
+
+class CurvePreparationTask(QRunnable):
+    """
+    Task to prepare curve data in thread pool. The result (or the raised exception) is sent with the given signal
+    together with the generation number of the task.
+    """
+
+    def __init__(self, signal: pyqtBoundSignal, generation: int, *args, **kwargs) -> None:
+        """
+        :param signal: signal with arguments (generation, result) that is emitted when the task is done;
+        :param generation: generation number of the task;
+        :param args: positional arguments for prepare_curve function;
+        :param kwargs: keyword arguments for prepare_curve function.
+        """
+
+        super().__init__()
+        self._args = args
+        self._generation: int = generation
+        self._kwargs = kwargs
+        self._signal: pyqtBoundSignal = signal
+
+    def run(self) -> None:
+        try:
+            result = prepare_curve(*self._args, **self._kwargs)
+        except Exception as exc:
+            result = exc
+        self._signal.emit(self._generation, result)
@@ -0,0 +1,185 @@
+"""
+Headless rendering of CSV files with IV curves to images. Files are rendered in a pool of processes, each process has
+its own offscreen QApplication and IvcViewer.
+"""
+
+import glob
+import multiprocessing
+import os
+from typing import List, Optional, Sequence, Tuple
+from PyQt5.QtCore import QEvent
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication
+from ivviewer.ivc_file import FileCurve, read_ivc
+from ivviewer.ivcviewer import IvcViewer
+
+
+CURVE_COLORS: Tuple[QColor, ...] = (QColor(255, 0, 0, 200), QColor(0, 153, 0, 200), QColor(0, 102, 255, 200),
+                                    QColor(255, 153, 0, 200), QColor(153, 0, 204, 200), QColor(0, 153, 153, 200))
+DEFAULT_IMAGE_SIZE: Tuple[int, int] = 800, 600
+IMAGE_FORMATS: Tuple[str, ...] = "bmp", "jpg", "pdf", "png", "svg"
+
+_application: Optional[QApplication] = None
+_viewer: Optional[IvcViewer] = None
+
+
+def _create_application() -> QApplication:
+    """
+    :return: application that uses offscreen platform unless another platform is set explicitly.
+    """
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QApplication([])
+
+
+def _init_worker() -> None:
+    """
+    Function creates application and plot in the worker process.
+    """
+
+    global _application, _viewer
+
+    _application = _create_application()
+    _viewer = create_viewer()
+
+
+def _render_task(task: Tuple[str, str, str, Tuple[int, int], bool]) -> Tuple[List[str], Optional[str]]:
+    """
+    :param task: arguments for render_file function without plot.
+    :return: names of saved images and error message if file cannot be rendered.
+    """
+
+    return _try_render_file(_viewer, task)
+
+
+def _set_curves(viewer: IvcViewer, curves: Sequence[FileCurve]) -> None:
+    """
+    Function shows given curves on the plot. Curves of the plot are reused, unnecessary curves are detached.
+    :param viewer: plot;
+    :param curves: curves to be shown.
+    """
+
+    with viewer.batch():
+        while len(viewer.curves) < len(curves):
+            viewer.add_curve()
+        for index, plot_curve in enumerate(viewer.curves):
+            if index < len(curves):
+                plot_curve.setTitle(curves[index].title)
+                plot_curve.set_curve_params(CURVE_COLORS[index % len(CURVE_COLORS)])
+                plot_curve.set_curve(curves[index].curve)
+                plot_curve.attach(viewer)
+            else:
+                plot_curve.set_curve(None)
+                plot_curve.detach()
+        # Scales are fitted to the curves of each image anew
+        viewer.enable_autoscale(True)
+
+
+def _try_render_file(viewer: IvcViewer, task: Tuple[str, str, str, Tuple[int, int], bool]
+                     ) -> Tuple[List[str], Optional[str]]:
+    """
+    Function renders file and catches errors, so that one bad file does not stop rendering of other files.
+    :param viewer: plot for rendering;
+    :param task: arguments for render_file function without plot.
+    :return: names of saved images and error message if file cannot be rendered.
+    """
+
+    try:
+        return render_file(viewer, *task), None
+    except Exception as exc:
+        return [], str(exc)
+
+
+def create_viewer() -> IvcViewer:
+    """
+    :return: plot for rendering images.
+    """
+
+    viewer = IvcViewer(None)
+    viewer.show_legend()
+    return viewer
+
+
+def find_curve_files(path: str) -> List[str]:
+    """
+    :param path: CSV file or directory with CSV files.
+    :return: sorted list of CSV files.
+    """
+
+    if os.path.isdir(path):
+        return sorted(glob.glob(os.path.join(path, "*.csv")))
+    return [path]
+
+
+def render_file(viewer: IvcViewer, file_name: str, output_dir: str, image_format: str = "png",
+                size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, split: bool = False) -> List[str]:
+    """
+    Function renders curves from CSV file to image.
+    :param viewer: plot for rendering;
+    :param file_name: name of CSV file with curves;
+    :param output_dir: directory for images;
+    :param image_format: format of images;
+    :param size: width and height of images in pixels;
+    :param split: if True then each curve is rendered to separate image, otherwise all curves are rendered to one
+    image.
+    :return: names of saved images.
+    """
+
+    curves = read_ivc(file_name)
+    base_name = os.path.join(output_dir, os.path.splitext(os.path.basename(file_name))[0])
+    if split:
+        groups = [(f"{base_name}_{index}.{image_format}", [curve]) for index, curve in enumerate(curves, 1)]
+    else:
+        groups = [(f"{base_name}.{image_format}", curves)]
+
+    for image_name, group in groups:
+        _set_curves(viewer, group)
+        viewer.exportTo(image_name, size=size)
+    return [image_name for image_name, _ in groups]
+
+
+def render_files(file_names: Sequence[str], output_dir: str, jobs: Optional[int] = None, image_format: str = "png",
+                 size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, split: bool = False,
+                 errors: Optional[List[Tuple[str, str]]] = None) -> List[str]:
+    """
+    Function renders curves from CSV files to images using pool of processes.
+    :param file_names: names of CSV files with curves;
+    :param output_dir: directory for images;
+    :param jobs: number of processes. By default, it is equal to the number of CPUs. If 1, files are rendered in
+    the current process. In that case the QApplication of the caller is reused if it exists, otherwise offscreen
+    application is created;
+    :param image_format: format of images;
+    :param size: width and height of images in pixels;
+    :param split: if True then each curve is rendered to separate image, otherwise all curves of file are rendered
+    to one image;
+    :param errors: list to which names of files that cannot be rendered and error messages are added. If None,
+    ValueError is raised after other files have been rendered.
+    :return: names of saved images.
+    """
+
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Invalid image format '{image_format}'. Allowed formats: {', '.join(IMAGE_FORMATS)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = [(file_name, output_dir, image_format, tuple(size), split) for file_name in file_names]
+    jobs = min(jobs or os.cpu_count() or 1, max(len(tasks), 1))
+    if jobs == 1:
+        application = QApplication.instance() or _create_application()
+        viewer = create_viewer()
+        results = [_try_render_file(viewer, task) for task in tasks]
+        # Plot is deleted before the application that may have been created here
+        viewer.deleteLater()
+        application.sendPostedEvents(None, QEvent.DeferredDelete)
+    else:
+        # Processes are spawned, so they do not inherit Qt state of the current process
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(jobs, initializer=_init_worker) as pool:
+            results = pool.map(_render_task, tasks, chunksize=max(1, len(tasks) // (4 * jobs)))
+
+    failures = [(task[0], error) for task, (_, error) in zip(tasks, results) if error is not None]
+    if errors is not None:
+        errors.extend(failures)
+    elif failures:
+        messages = [f"{file_name}: {error}" for file_name, error in failures]
+        raise ValueError("Failed to render files:\n" + "\n".join(messages))
+    return [image_name for images, _ in results for image_name in images]
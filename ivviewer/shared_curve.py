@@ -0,0 +1,269 @@
+"""
+Shared memory buffer to pass curves from acquisition process to the process with plot.
+
+Layout of the shared memory block:
+    header: sequence number (uint64), number of points (uint64), capacity (uint64), unit of voltage (16 bytes),
+    unit of current (16 bytes);
+    voltages: capacity of float64 values;
+    currents: capacity of float64 values.
+
+Sequence number is odd while the writer is changing the data, so the reader can detect that it has copied
+inconsistent data and try again later.
+"""
+
+import struct
+from typing import Iterable, Optional, Tuple
+import numpy as np
+from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QTimer
+from ivviewer.curve import PlotCurve
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+
+class SharedCurveBuffer:
+    """
+    Class for curve stored in shared memory block. Acquisition process creates the buffer and writes curves to it, the
+    process with plot attaches to the buffer by its name.
+    """
+
+    HEADER_FORMAT: str = "<QQQ16s16s"
+    HEADER_SIZE: int = struct.calcsize(HEADER_FORMAT)
+    UNIT_SIZE: int = 16
+
+    def __init__(self, memory, owner: bool) -> None:
+        """
+        :param memory: shared memory block;
+        :param owner: if True then shared memory block will be destroyed when buffer is closed.
+        """
+
+        self._memory = memory
+        self._owner: bool = owner
+        capacity = self._unpack_header()[2]
+        self._voltages: np.ndarray = np.ndarray((capacity,), dtype=np.float64, buffer=memory.buf,
+                                                offset=self.HEADER_SIZE)
+        self._currents: np.ndarray = np.ndarray((capacity,), dtype=np.float64, buffer=memory.buf,
+                                                offset=self.HEADER_SIZE + 8 * capacity)
+
+    @property
+    def capacity(self) -> int:
+        """
+        :return: maximum number of points in curve.
+        """
+
+        return self._voltages.size
+
+    @property
+    def length(self) -> int:
+        """
+        :return: number of points in curve. It can change at any moment if data is being written.
+        """
+
+        return self._unpack_header()[1]
+
+    @property
+    def name(self) -> str:
+        """
+        :return: name of shared memory block.
+        """
+
+        return self._memory.name
+
+    @property
+    def sequence(self) -> int:
+        """
+        :return: sequence number of data. It is odd while data is being written.
+        """
+
+        return struct.unpack_from("<Q", self._memory.buf, 0)[0]
+
+    @property
+    def units(self) -> Tuple[str, str]:
+        """
+        :return: units of voltage and current.
+        """
+
+        _, _, _, x_unit, y_unit = self._unpack_header()
+        return x_unit.rstrip(b"\0").decode("utf-8"), y_unit.rstrip(b"\0").decode("utf-8")
+
+    @staticmethod
+    def _check_shared_memory() -> None:
+        """
+        Method checks that shared memory is supported by Python.
+        """
+
+        if shared_memory is None:
+            raise RuntimeError("Shared memory curves require Python 3.8 or newer")
+
+    def _unpack_header(self) -> Tuple[int, int, int, bytes, bytes]:
+        """
+        :return: sequence number, number of points, capacity, units of voltage and current.
+        """
+
+        return struct.unpack_from(self.HEADER_FORMAT, self._memory.buf, 0)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedCurveBuffer":
+        """
+        Method attaches to the buffer created by another process.
+        :param name: name of shared memory block.
+        :return: buffer.
+        """
+
+        cls._check_shared_memory()
+        return cls(shared_memory.SharedMemory(name=name), False)
+
+    def close(self) -> None:
+        """
+        Method closes access to shared memory block. The block is destroyed if the buffer has created it.
+        """
+
+        if self._memory is None:
+            return
+
+        self._voltages = None
+        self._currents = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
+
+    @classmethod
+    def create(cls, capacity: int, name: Optional[str] = None, x_unit: str = "В", y_unit: str = "А"
+               ) -> "SharedCurveBuffer":
+        """
+        Method creates new shared memory block for curve.
+        :param capacity: maximum number of points in curve;
+        :param name: name of shared memory block. If None, unique name is generated;
+        :param x_unit: unit of voltage;
+        :param y_unit: unit of current.
+        :return: buffer.
+        """
+
+        cls._check_shared_memory()
+        if capacity < 1:
+            raise ValueError("Capacity of shared curve buffer must be positive")
+
+        memory = shared_memory.SharedMemory(name=name, create=True, size=cls.HEADER_SIZE + 16 * capacity)
+        struct.pack_into(cls.HEADER_FORMAT, memory.buf, 0, 0, 0, capacity,
+                         x_unit.encode("utf-8")[:cls.UNIT_SIZE], y_unit.encode("utf-8")[:cls.UNIT_SIZE])
+        return cls(memory, True)
+
+    def read(self, voltages: np.ndarray, currents: np.ndarray) -> Optional[Tuple[int, int]]:
+        """
+        Method copies the curve from shared memory to given arrays.
+        :param voltages: array for voltages;
+        :param currents: array for currents.
+        :return: sequence number and number of copied points, or None if data was being written while copying or the
+        curve does not fit into given arrays.
+        """
+
+        sequence = self.sequence
+        if sequence % 2:
+            return None
+
+        length = self.length
+        if length > min(voltages.size, currents.size):
+            return None
+
+        voltages[:length] = self._voltages[:length]
+        currents[:length] = self._currents[:length]
+        if self.sequence != sequence:
+            return None
+        return sequence, length
+
+    def write(self, voltages: Iterable[float], currents: Iterable[float]) -> None:
+        """
+        Method writes curve to shared memory.
+        :param voltages: voltage values;
+        :param currents: current values.
+        """
+
+        voltages = np.asarray(voltages, dtype=np.float64)
+        currents = np.asarray(currents, dtype=np.float64)
+        if voltages.shape != currents.shape or voltages.size > self.capacity:
+            raise ValueError("Voltages and currents must have the same length not greater than capacity")
+
+        sequence = self.sequence
+        struct.pack_into("<Q", self._memory.buf, 0, sequence + 1)
+        self._voltages[:voltages.size] = voltages
+        self._currents[:currents.size] = currents
+        struct.pack_into("<QQ", self._memory.buf, 0, sequence + 1, voltages.size)
+        struct.pack_into("<Q", self._memory.buf, 0, sequence + 2)
+
+
+class SharedCurveSource(QObject):
+    """
+    Class checks sequence number of shared curve buffer by timer and updates the bound curve when new data appears.
+    Data is copied from shared memory into scratch arrays of the source. Only after the copy is validated, it is
+    copied into the buffers of the curve, so the plot never draws data that was being written.
+    """
+
+    DEFAULT_INTERVAL: int = 20  # ms
+    curve_received: pyqtSignal = pyqtSignal(int)
+
+    def __init__(self, buffer: SharedCurveBuffer, curve: Optional[PlotCurve] = None, interval: Optional[int] = None,
+                 parent: Optional[QObject] = None) -> None:
+        """
+        :param buffer: shared curve buffer;
+        :param curve: curve to be updated with data from buffer;
+        :param interval: interval in ms between checks of buffer;
+        :param parent: parent object.
+        """
+
+        super().__init__(parent)
+        self._buffer: SharedCurveBuffer = buffer
+        self._curve: Optional[PlotCurve] = curve
+        self._currents: np.ndarray = np.empty(buffer.capacity)  # scratch array for currents read from buffer
+        self._last_sequence: int = 0  # sequence number of empty buffer
+        self._timer: QTimer = QTimer(self)
+        self._timer.setInterval(interval if interval else self.DEFAULT_INTERVAL)
+        self._timer.timeout.connect(self.check_buffer)
+        self._voltages: np.ndarray = np.empty(buffer.capacity)  # scratch array for voltages read from buffer
+
+    def bind(self, curve: Optional[PlotCurve]) -> None:
+        """
+        :param curve: curve to be updated with data from buffer.
+        """
+
+        self._curve = curve
+        self._last_sequence = 0
+
+    @pyqtSlot()
+    def check_buffer(self) -> bool:
+        """
+        Slot updates the bound curve if sequence number of buffer has changed. Data is read into scratch arrays and
+        then copied into the buffers of the curve in place (see PlotCurve.update_curve), so each update copies the
+        data twice. If the data was being written while reading, the curve is not updated and reading is repeated at
+        the next check.
+        :return: True if curve has been updated.
+        """
+
+        if self._curve is None or self._buffer.sequence == self._last_sequence:
+            return False
+
+        result = self._buffer.read(self._voltages, self._currents)
+        if result is None:
+            # Writer is changing the data, try next time
+            return False
+
+        self._last_sequence, length = result
+        self._curve.update_curve(self._voltages[:length], self._currents[:length])
+        self.curve_received.emit(self._last_sequence)
+        return True
+
+    def start(self) -> None:
+        """
+        Method starts checking the buffer by timer.
+        """
+
+        self._timer.start()
+
+    def stop(self) -> None:
+        """
+        Method stops checking the buffer by timer.
+        """
+
+        self._timer.stop()
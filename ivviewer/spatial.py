@@ -0,0 +1,254 @@
+"""
+Spatial indexes for fast search of curve points and segments near a position on the canvas.
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+
+
+def _get_cell_entries(starts: np.ndarray, cells: np.ndarray) -> np.ndarray:
+    """
+    :param starts: positions in sorted arrays where entries of each cell start (the last element is the number of
+    entries);
+    :param cells: indexes of cells.
+    :return: positions in sorted arrays of all entries of given cells.
+    """
+
+    cell_starts = starts[cells]
+    counts = starts[cells + 1] - cell_starts
+    # Each entry gets the shift from its place in the result to its place in sorted arrays
+    shifts = np.repeat(cell_starts - np.cumsum(counts) + counts, counts)
+    return np.arange(shifts.size) + shifts
+
+
+class PointGrid:
+    """
+    Uniform grid over points given in pixel coordinates. Points are sorted by grid cells, so points of any cell are
+    found by two array lookups, and the nearest point is searched only in cells around the given position.
+    """
+
+    CELL_SIZE: float = 16  # default size of grid cell in pixels
+    MAX_CELLS: int = 1 << 16  # cells are enlarged if grid has more cells
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cell_size: float = CELL_SIZE) -> None:
+        """
+        :param x: x coordinates of points in pixels;
+        :param y: y coordinates of points in pixels;
+        :param cell_size: size of grid cell in pixels.
+        """
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        indexes = np.flatnonzero(np.logical_and(np.isfinite(x), np.isfinite(y)))
+        x = x[indexes]
+        y = y[indexes]
+        if indexes.size:
+            self._x_min: float = float(x.min())
+            self._y_min: float = float(y.min())
+            width = float(x.max()) - self._x_min
+            height = float(y.max()) - self._y_min
+        else:
+            self._x_min = self._y_min = 0.0
+            width = height = 0.0
+
+        while (width // cell_size + 1) * (height // cell_size + 1) > self.MAX_CELLS:
+            cell_size *= 2
+        self._cell_size: float = float(cell_size)
+        self._columns: int = int(width // cell_size) + 1
+        self._rows: int = int(height // cell_size) + 1
+
+        columns = np.minimum(((x - self._x_min) // self._cell_size).astype(np.int64), self._columns - 1)
+        rows = np.minimum(((y - self._y_min) // self._cell_size).astype(np.int64), self._rows - 1)
+        cells = rows * self._columns + columns
+        order = np.argsort(cells, kind="stable")
+        self._indexes: np.ndarray = indexes[order]  # indexes of sorted points in the given arrays
+        self._starts: np.ndarray = np.searchsorted(cells[order], np.arange(self._columns * self._rows + 1))
+        self._x: np.ndarray = x[order]
+        self._y: np.ndarray = y[order]
+
+    def __len__(self) -> int:
+        """
+        :return: number of points in the grid.
+        """
+
+        return self._x.size
+
+    def _get_ring_points(self, column: int, row: int, ring: int) -> np.ndarray:
+        """
+        :param column: column of the central cell;
+        :param row: row of the central cell;
+        :param ring: distance in cells from the central cell.
+        :return: positions in sorted arrays of points that lie in cells at given distance from the central cell.
+        """
+
+        if ring == 0:
+            columns = np.array([column])
+            rows = np.array([row])
+        else:
+            side = np.arange(-ring, ring + 1)
+            inner_side = side[1:-1]
+            columns = column + np.concatenate((side, side, np.full(inner_side.size, -ring),
+                                               np.full(inner_side.size, ring)))
+            rows = row + np.concatenate((np.full(side.size, -ring), np.full(side.size, ring), inner_side, inner_side))
+        inside = (columns >= 0) & (columns < self._columns) & (rows >= 0) & (rows < self._rows)
+        return _get_cell_entries(self._starts, rows[inside] * self._columns + columns[inside])
+
+    def find_nearest(self, x: float, y: float, max_distance: float = np.inf) -> Optional[Tuple[int, float]]:
+        """
+        Method finds the point nearest to the given position. Cells are checked ring by ring around the cell of the
+        position until the remaining cells are farther than the point that is found.
+        :param x: x coordinate of position in pixels;
+        :param y: y coordinate of position in pixels;
+        :param max_distance: maximum distance to the point in pixels.
+        :return: index of the nearest point in the arrays given to the grid and distance to it in pixels or None if
+        there are no points at given distance.
+        """
+
+        if not self._x.size:
+            return None
+
+        column = int((x - self._x_min) // self._cell_size)
+        row = int((y - self._y_min) // self._cell_size)
+        first_ring = max(0, -column, column - self._columns + 1, -row, row - self._rows + 1)
+        last_ring = max(column, self._columns - 1 - column, row, self._rows - 1 - row)
+        best_position = None
+        best_distance = np.inf
+        for ring in range(first_ring, last_ring + 1):
+            # Points in this and next rings are not closer than this
+            if (ring - 1) * self._cell_size >= min(best_distance, max_distance):
+                break
+
+            positions = self._get_ring_points(column, row, ring)
+            if positions.size:
+                distances = np.hypot(self._x[positions] - x, self._y[positions] - y)
+                index = int(np.argmin(distances))
+                if distances[index] < best_distance:
+                    best_distance = float(distances[index])
+                    best_position = positions[index]
+
+        if best_position is None or best_distance > max_distance:
+            return None
+        return int(self._indexes[best_position]), best_distance
+
+
+class SegmentGrid:
+    """
+    Uniform grid over segments of a polyline given in pixel coordinates. Each segment is put into all cells covered by
+    its bounding box, so only segments in cells around the given position are checked when the nearest segment is
+    searched.
+    """
+
+    CELL_SIZE: float = 16  # default size of grid cell in pixels
+    ENTRIES_PER_SEGMENT: int = 4  # cells are enlarged if segments are put into more cells on average
+    MAX_CELLS: int = 1 << 16  # cells are enlarged if grid has more cells
+
+    def __init__(self, x: np.ndarray, y: np.ndarray, cell_size: float = CELL_SIZE) -> None:
+        """
+        :param x: x coordinates of polyline points in pixels;
+        :param y: y coordinates of polyline points in pixels;
+        :param cell_size: size of grid cell in pixels.
+        """
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        finite = np.logical_and(np.isfinite(x), np.isfinite(y))
+        # Segment connects point with given index and the next point
+        self._indexes: np.ndarray = np.flatnonzero(np.logical_and(finite[:-1], finite[1:]))
+        self._x_1: np.ndarray = x[self._indexes]
+        self._y_1: np.ndarray = y[self._indexes]
+        self._x_2: np.ndarray = x[self._indexes + 1]
+        self._y_2: np.ndarray = y[self._indexes + 1]
+        if self._indexes.size:
+            self._x_min: float = float(min(self._x_1.min(), self._x_2.min()))
+            self._y_min: float = float(min(self._y_1.min(), self._y_2.min()))
+            width = float(max(self._x_1.max(), self._x_2.max())) - self._x_min
+            height = float(max(self._y_1.max(), self._y_2.max())) - self._y_min
+        else:
+            self._x_min = self._y_min = 0.0
+            width = height = 0.0
+
+        while (width // cell_size + 1) * (height // cell_size + 1) > self.MAX_CELLS:
+            cell_size *= 2
+        max_entries = max(self.ENTRIES_PER_SEGMENT * self._indexes.size, self.MAX_CELLS)
+        while True:
+            first_columns, first_rows, widths, heights = self._get_segment_cells(cell_size)
+            counts = widths * heights
+            if counts.sum() <= max_entries:
+                break
+            cell_size *= 2
+        self._cell_size: float = float(cell_size)
+        self._columns: int = int(width // cell_size) + 1
+        self._rows: int = int(height // cell_size) + 1
+
+        segments = np.repeat(np.arange(self._indexes.size), counts)
+        offsets = np.arange(segments.size) - np.repeat(np.cumsum(counts) - counts, counts)
+        columns = first_columns[segments] + offsets % widths[segments]
+        rows = first_rows[segments] + offsets // widths[segments]
+        cells = rows * self._columns + columns
+        order = np.argsort(cells, kind="stable")
+        self._segments: np.ndarray = segments[order]  # segments of grid entries sorted by cells
+        self._starts: np.ndarray = np.searchsorted(cells[order], np.arange(self._columns * self._rows + 1))
+
+    def __len__(self) -> int:
+        """
+        :return: number of segments in the grid.
+        """
+
+        return self._indexes.size
+
+    def _get_segment_cells(self, cell_size: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :param cell_size: size of grid cell in pixels.
+        :return: first columns, first rows, numbers of columns and numbers of rows of cells covered by bounding boxes
+        of segments.
+        """
+
+        first_columns = (np.minimum(self._x_1, self._x_2) - self._x_min) // cell_size
+        last_columns = (np.maximum(self._x_1, self._x_2) - self._x_min) // cell_size
+        first_rows = (np.minimum(self._y_1, self._y_2) - self._y_min) // cell_size
+        last_rows = (np.maximum(self._y_1, self._y_2) - self._y_min) // cell_size
+        widths = (last_columns - first_columns).astype(np.int64) + 1
+        heights = (last_rows - first_rows).astype(np.int64) + 1
+        return first_columns.astype(np.int64), first_rows.astype(np.int64), widths, heights
+
+    def find_nearest(self, x: float, y: float, max_distance: float) -> Optional[Tuple[int, float]]:
+        """
+        Method finds the segment nearest to the given position. Only cells that are not farther than max_distance from
+        the position are checked.
+        :param x: x coordinate of position in pixels;
+        :param y: y coordinate of position in pixels;
+        :param max_distance: maximum distance to the segment in pixels.
+        :return: index of the first point of the nearest segment in the arrays given to the grid and distance to the
+        segment in pixels or None if there are no segments at given distance.
+        """
+
+        if not self._indexes.size:
+            return None
+
+        first_column = max(int((x - max_distance - self._x_min) // self._cell_size), 0)
+        last_column = min(int((x + max_distance - self._x_min) // self._cell_size), self._columns - 1)
+        first_row = max(int((y - max_distance - self._y_min) // self._cell_size), 0)
+        last_row = min(int((y + max_distance - self._y_min) // self._cell_size), self._rows - 1)
+        if first_column > last_column or first_row > last_row:
+            return None
+
+        cells = np.arange(first_row, last_row + 1)[:, np.newaxis] * self._columns + \
+            np.arange(first_column, last_column + 1)[np.newaxis, :]
+        segments = np.unique(self._segments[_get_cell_entries(self._starts, cells.ravel())])
+        if not segments.size:
+            return None
+
+        x_1 = self._x_1[segments]
+        y_1 = self._y_1[segments]
+        dx = self._x_2[segments] - x_1
+        dy = self._y_2[segments] - y_1
+        lengths = dx ** 2 + dy ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Relative position of the point of segment nearest to the given position
+            ratios = np.where(lengths > 0, ((x - x_1) * dx + (y - y_1) * dy) / lengths, 0)
+        ratios = np.clip(ratios, 0, 1)
+        distances = np.hypot(x_1 + ratios * dx - x, y_1 + ratios * dy - y)
+        index = int(np.argmin(distances))
+        if distances[index] > max_distance:
+            return None
+        return int(self._indexes[segments[index]]), float(distances[index])
@@ -0,0 +1,64 @@
+import numpy as np
+from ivviewer import ArrayCurve, Curve, Viewer
+from ivviewer.compare import color_curves_by_score, compare_arrays, compare_curves, resample_curves
+from .utils import prepare_test
+
+
+class TestCompare:
+
+    def test_1_resample_curves(self) -> None:
+        """
+        Test checks that curves of different lengths are resampled onto common grid as with np.interp.
+        """
+
+        rng = np.random.RandomState(0)
+        curves = [Curve(list(rng.uniform(-5, 5, 50)), list(rng.uniform(-1, 1, 50))),
+                  ArrayCurve(rng.uniform(-2, 3, 20), rng.uniform(-1, 1, 20)),
+                  Curve([], []),
+                  Curve([1.0], [0.5])]
+        grid = np.linspace(-6, 6, 31)
+        resampled = resample_curves(curves, grid)
+        assert resampled.shape == (4, 31)
+        for curve, currents in zip((curves[0], curves[1], curves[3]), resampled[[0, 1, 3]]):
+            order = np.argsort(curve.voltages)
+            expected = np.interp(grid, np.asarray(curve.voltages)[order], np.asarray(curve.currents)[order])
+            assert np.allclose(currents, expected)
+        assert np.isnan(resampled[2]).all()
+
+    def test_2_compare_arrays(self) -> None:
+        """
+        Test checks scores of curves given as two-dimensional arrays.
+        """
+
+        voltages = 5 * np.sin(np.linspace(0, 2 * np.pi, 200, endpoint=False))
+        currents = voltages / 1000
+        batch_voltages = np.tile(voltages, (3, 1))
+        batch_currents = np.vstack((currents, 2 * currents, -currents))
+        scores = compare_arrays(voltages, currents, batch_voltages, batch_currents)
+        assert scores[0] < 1e-12
+        assert 0 < scores[1] < scores[2]
+
+    @prepare_test
+    def test_3_color_curves_by_score(self, window: Viewer) -> None:
+        """
+        Test checks that curves are colored according to their scores.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        reference = Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005])
+        curves = [Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005]), Curve([-2.5, 0, 2.5], [0.005, 0, -0.005]),
+                  Curve([], [])]
+        plot_curves = []
+        for curve in curves:
+            plot_curve = window.plot.add_curve()
+            plot_curve.set_curve(curve)
+            plot_curves.append(plot_curve)
+        scores = compare_curves(reference, curves)
+        color_curves_by_score(plot_curves, scores, 0.5)
+        assert plot_curves[0].pen().color().green() > plot_curves[0].pen().color().red()
+        assert plot_curves[1].pen().color().red() > plot_curves[1].pen().color().green()
+        assert plot_curves[2].pen().color().saturation() == 0
+
+        window.setToolTip("Должно быть две прямые: зеленая и красная")
@@ -1,8 +1,10 @@
 import sys
-from PyQt5.QtCore import QPoint
-from PyQt5.QtGui import QColor
+import numpy as np
+from PyQt5.QtCore import QEvent, QPoint, QPointF, Qt
+from PyQt5.QtGui import QColor, QMouseEvent
 from PyQt5.QtWidgets import QApplication
-from ivviewer import Point, Viewer
+from qwt import QwtPlot
+from ivviewer import ArrayCurve, ArrayCursors, Point, Viewer
 from .utils import MouseEvent, prepare_test
 
 
@@ -118,3 +120,263 @@ class TestCursor:
         if display_window:
             window.show()
             app.exec()
+
+    @prepare_test
+    def test_8_find_cursor_among_many_cursors(self, window: Viewer) -> None:
+        """
+        Test checks that cursor is found among many cursors and that pixel positions of cursors are recalculated when
+        scale changes.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        for x in np.linspace(-5, 5, 20):
+            for y in np.linspace(-12, 12, 10):
+                window.plot.cursors.add_cursor(Point(x, y))
+        cursors = window.plot.get_list_of_all_cursors()
+        assert len(cursors) == 200
+
+        for scale in (12.0, 30.0), (6.0, 15.0):
+            for index, cursor in enumerate(cursors):
+                assert window.plot.cursors.find_cursor_at_point(cursor.get_cursor_coordinates_in_px()) == index
+            window.plot.set_scale(*scale)
+
+        assert window.plot.cursors.find_cursor_at_point(QPoint(-100, -100)) is None
+        window.plot.cursors.move_cursor(Point(0.0, 0.0))
+        assert window.plot.cursors.find_cursor_at_point(cursors[-1].get_cursor_coordinates_in_px()) == 199
+        window.setToolTip("Должно быть много меток, активная метка (красная) должна находиться в точке (0, 0)")
+
+    @prepare_test
+    def test_9_snap_cursor_to_curve(self, window: Viewer) -> None:
+        """
+        Test checks that cursor is placed and moved to the nearest point of the curve when snapping is enabled.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        angles = np.linspace(0, 2 * np.pi, 100000, endpoint=False)
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve(4 * np.cos(angles), 0.01 * np.sin(angles)))
+        window.plot.enable_snap_to_curves(True)
+        window.plot.canvas().grab()
+
+        x_map = window.plot.canvasMap(QwtPlot.xBottom)
+        y_map = window.plot.canvasMap(QwtPlot.yLeft)
+        x = x_map.transform(4 * np.cos(angles))
+        y = y_map.transform(10 * np.sin(angles))
+        canvas_pos = window.plot.canvas().pos()
+        # Mouse positions are near the curve, closer than SNAP_DISTANCE
+        positions = [canvas_pos + QPoint(round(x[index]) + 5, round(y[index]) - 5) for index in (10000, 60000)]
+        for pos in positions:
+            distances = np.hypot(x - (pos.x() - canvas_pos.x()), y - (pos.y() - canvas_pos.y()))
+            expected_index = int(np.argmin(distances))
+            if pos is positions[0]:
+                window.plot.add_cursor(pos)
+            else:
+                window.plot._left_button_pressed = True
+                window.plot._handle_mouse_move_event(MouseEvent(pos - canvas_pos))
+                window.plot._left_button_pressed = False
+            cursor = window.plot.get_list_of_all_cursors()[0]
+            assert cursor.value().x() == 4 * np.cos(angles[expected_index])
+            assert abs(cursor.value().y() - 10 * np.sin(angles[expected_index])) < 1e-12
+        window.setToolTip("Метка должна находиться на кривой")
+
+    @prepare_test
+    def test_10_cursor_readout(self, window: Viewer) -> None:
+        """
+        Test checks currents of curves at the voltages of cursors and their display in cursor texts.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        voltages = np.linspace(-5, 5, 101)
+        for factor in range(1, 4):
+            curve = window.plot.add_curve(f"R{factor}")
+            curve.set_curve(ArrayCurve(voltages, factor * voltages / 1000))
+        window.plot.add_curve("empty")
+        for x in -2.5, 0.0, 1.25:
+            window.plot.cursors.add_cursor(Point(x, 0.0))
+
+        readout = window.plot.get_cursor_readout()
+        assert readout.shape == (3, 4)
+        assert np.allclose(readout[:, :3], np.outer([-2.5, 0.0, 1.25], [1, 2, 3]))
+        assert np.isnan(readout[:, 3]).all()
+        assert window.plot.get_cursor_readout() is readout
+
+        window.plot.cursors.move_cursor(Point(2.0, 0.0))
+        readout = window.plot.get_cursor_readout()
+        assert np.allclose(readout[2, :3], [2.0, 4.0, 6.0])
+        window.plot.curves[0].set_curve(ArrayCurve(voltages, -voltages / 1000))
+        assert np.allclose(window.plot.get_cursor_readout()[:, 0], [2.5, 0.0, -2.0])
+
+        window.plot.enable_cursor_readout(True)
+        window.plot.replot()
+        assert "R3: I = 6.0" in window.plot.get_list_of_all_cursors()[2].label().text()
+        window.plot.enable_cursor_readout(False)
+        assert "R3" not in window.plot.get_list_of_all_cursors()[2].label().text()
+        window.plot.enable_cursor_readout(True)
+        window.setToolTip("Должно быть три прямые и три метки, у каждой метки показаны токи всех прямых")
+
+    @prepare_test
+    def test_11_change_mouse_cursor_on_transitions(self, window: Viewer) -> None:
+        """
+        Test checks that application override cursor is changed only when the mouse starts or stops hovering over
+        cursor or dragging it.
+        :param window: viewer widget.
+        """
+
+        shapes = []
+        window.plot._set_mouse_cursor = lambda mouse_cursor=None: shapes.append(mouse_cursor and mouse_cursor.shape())
+        canvas = window.plot.canvas()
+
+        def move_mouse(pos: QPoint) -> None:
+            event = QMouseEvent(QEvent.MouseMove, QPointF(pos - canvas.pos()), Qt.NoButton, Qt.NoButton, Qt.NoModifier)
+            window.plot.eventFilter(canvas, event)
+
+        cursor_pos = QPoint(300, 200)
+        for pos in QPoint(100, 100), QPoint(300, 200):
+            move_mouse(pos)
+        assert shapes == []
+
+        window.plot.add_cursor(cursor_pos)
+        for pos in QPoint(100, 100), QPoint(120, 100), cursor_pos, cursor_pos + QPoint(1, 1), cursor_pos:
+            move_mouse(pos)
+        assert shapes == [Qt.PointingHandCursor]
+
+        window.plot.mousePressEvent(MouseEvent(cursor_pos))
+        for pos in QPoint(310, 210), QPoint(320, 220):
+            move_mouse(pos)
+        window.plot.mouseReleaseEvent(MouseEvent(QPoint(320, 220)))
+        move_mouse(QPoint(500, 400))
+        move_mouse(QPoint(510, 400))
+        assert shapes == [Qt.PointingHandCursor, Qt.ClosedHandCursor, Qt.PointingHandCursor, None]
+        window.setToolTip("Должна быть одна метка")
+
+    @prepare_test
+    def test_12_array_cursors(self, window: Viewer) -> None:
+        """
+        Test checks adding, finding, moving and removing of many cursors stored in array.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        window.plot.add_cursor(QPoint(222, 51))
+        window.plot.enable_array_cursors(True)
+        assert isinstance(window.plot.cursors, ArrayCursors)
+        assert len(window.plot.get_list_of_all_cursors()) == 1
+
+        x, y = np.meshgrid(np.linspace(-5, 5, 100), np.linspace(-12, 12, 50))
+        window.plot.cursors.add_cursors(np.column_stack((x.ravel(), y.ravel())))
+        positions = window.plot.cursors.get_positions()
+        assert positions.shape == (5001, 2)
+        assert window.plot.cursors._current_index == 5000
+
+        x_map = window.plot.canvasMap(QwtPlot.xBottom)
+        y_map = window.plot.canvasMap(QwtPlot.yLeft)
+        canvas_pos = window.plot.canvas().pos()
+        for index in 1, 2500, 5000:
+            pos = QPoint(round(x_map.transform(positions[index, 0])) + canvas_pos.x(),
+                         round(y_map.transform(positions[index, 1])) + canvas_pos.y())
+            window.plot.mousePressEvent(MouseEvent(pos))
+            window.plot.mouseReleaseEvent(MouseEvent(pos))
+            assert window.plot.cursors._current_index == index
+
+        window.plot.cursors.move_cursors([0, 1], [(1.0, 2.0), (-1.0, -2.0)])
+        assert window.plot.cursors.get_positions() is not positions
+        assert window.plot.cursors[1] == Point(-1.0, -2.0)
+        window.plot.cursors.remove_cursors([0, 1, 4999])
+        assert len(window.plot.cursors.get_positions()) == 4998
+        assert window.plot.cursors._current_index == 4997
+        assert window.plot.cursors[window.plot.cursors._current_index] == Point(*positions[5000].tolist())
+
+        window.plot.remove_all_cursors()
+        window.plot.cursors.add_cursors([(-2.5, 0.0), (1.25, 0.0)])
+        curve = window.plot.add_curve("R")
+        curve.set_curve(ArrayCurve(np.linspace(-5, 5, 11), np.linspace(-5, 5, 11) / 1000))
+        window.plot.enable_cursor_readout(True)
+        window.plot.replot()
+        assert "R: I = 1.25" in window.plot.cursors._marker.label().text()
+
+        window.plot.enable_array_cursors(False)
+        assert [cursor.value().x() for cursor in window.plot.get_list_of_all_cursors()] == [-2.5, 1.25]
+        window.plot.enable_array_cursors(True)
+        window.setToolTip("Должно быть две метки и прямая, у активной метки показан ток прямой")
+
+    @prepare_test
+    def test_13_release_snapped_cursor(self, window: Viewer) -> None:
+        """
+        Test checks that dragging of cursor snapped to curve is finished when the mouse is released away from cursor.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve(np.linspace(-5, 5, 1001), np.zeros(1001)))
+        window.plot.enable_snap_to_curves(True)
+        window.plot.canvas().grab()
+
+        canvas = window.plot.canvas()
+        y = canvas.y() + round(window.plot.canvasMap(QwtPlot.yLeft).transform(0))
+        window.plot.add_cursor(QPoint(300, y))
+        window.plot.mousePressEvent(MouseEvent(QPoint(300, y)))
+        for pos in QPoint(350, y + 15), QPoint(400, y + 15):
+            event = QMouseEvent(QEvent.MouseMove, QPointF(pos - canvas.pos()), Qt.NoButton, Qt.LeftButton,
+                                Qt.NoModifier)
+            window.plot.eventFilter(canvas, event)
+        window.plot.mouseReleaseEvent(MouseEvent(QPoint(400, y + 15)))
+        cursor = window.plot.get_list_of_all_cursors()[0]
+        value = cursor.value()
+        assert value.y() == 0
+
+        event = QMouseEvent(QEvent.MouseMove, QPointF(QPoint(200, y + 15) - canvas.pos()), Qt.NoButton, Qt.NoButton,
+                            Qt.NoModifier)
+        window.plot.eventFilter(canvas, event)
+        assert not window.plot._left_button_pressed
+        assert cursor.value() == value
+        window.setToolTip("Метка должна находиться на прямой")
+
+    @prepare_test
+    def test_14_snap_distance(self, window: Viewer) -> None:
+        """
+        Test checks that cursor is not snapped to curve that is farther than SNAP_DISTANCE pixels from mouse.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve(np.linspace(-5, 5, 1001), np.zeros(1001)))
+        window.plot.enable_snap_to_curves(True)
+        window.plot.canvas().grab()
+
+        y = window.plot.canvas().y() + round(window.plot.canvasMap(QwtPlot.yLeft).transform(0))
+        window.plot.add_cursor(QPoint(300, y - window.plot.SNAP_DISTANCE + 5))
+        window.plot.add_cursor(QPoint(300, y - window.plot.SNAP_DISTANCE - 50))
+        cursors = window.plot.get_list_of_all_cursors()
+        assert cursors[0].value().y() == 0
+        assert cursors[1].value().y() > 0
+        window.setToolTip("Одна метка должна находиться на прямой, другая - над прямой")
+
+    @prepare_test
+    def test_15_move_cursor_directly(self, window: Viewer) -> None:
+        """
+        Test checks that cached positions of cursors are updated when a cursor from the list of all cursors is moved
+        directly.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve(np.linspace(-5, 5, 101), np.linspace(-5, 5, 101) / 1000))
+        for x in -2.5, 1.25:
+            window.plot.cursors.add_cursor(Point(x, 0.0))
+        window.plot.canvas().grab()
+        cursor = window.plot.get_list_of_all_cursors()[1]
+        old_pos = cursor.get_cursor_coordinates_in_px()
+        assert window.plot.cursors.find_cursor_at_point(old_pos) == 1
+        assert np.allclose(window.plot.get_cursor_readout()[:, 0], [-2.5, 1.25])
+
+        cursor.move(Point(4.0, 0.0))
+        assert window.plot.cursors.find_cursor_at_point(old_pos) is None
+        assert window.plot.cursors.find_cursor_at_point(cursor.get_cursor_coordinates_in_px()) == 1
+        assert np.allclose(window.plot.get_cursor_readout()[:, 0], [-2.5, 4.0])
+        window.setToolTip("Должно быть две метки на прямой")
@@ -1,6 +1,13 @@
+import numpy as np
+import pytest
+from PyQt5.QtCore import QPoint, QThreadPool
 from PyQt5.QtGui import QColor, QBrush, QPen
-from ivviewer import Curve, Viewer
-from .utils import prepare_test
+from PyQt5.QtWidgets import QApplication
+from qwt import QwtPlot
+from ivviewer import ArrayCurve, Curve, StoragePolicy, Viewer
+from ivviewer.decimation import decimate_min_max
+from ivviewer.spatial import SegmentGrid
+from .utils import MouseEvent, prepare_test
 
 
 class TestCurve:
@@ -66,3 +73,313 @@ class TestCurve:
         assert curve_2.pen() == pen_for_curve_2
 
         window.setToolTip("Должна быть одна прямая")
+
+    @prepare_test
+    def test_3_set_array_curve(self, window: Viewer) -> None:
+        """
+        Test checks that the voltage buffer of array-backed curve is given to the plot without copying.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        array_curve = ArrayCurve([-2.5, 0, 2.5], [-0.005, 0, 0.005])
+        curve = window.plot.add_curve()
+        curve.set_curve(array_curve)
+        assert curve.curve is array_curve
+        assert curve.data().xData() is array_curve.closed_voltages
+        assert np.allclose(curve.data().xData(), [-2.5, 0, 2.5, -2.5])
+        assert np.allclose(curve.data().yData(), [-5, 0, 5, -5])
+
+        currents_buffer = curve.data().yData()
+        curve.set_curve(ArrayCurve([-2.5, 0, 2.5], [-0.003, 0, 0.003], dtype=np.float32))
+        assert curve.data().yData() is currents_buffer
+        assert np.allclose(curve.data().yData(), [-3, 0, 3, -3])
+
+        window.setToolTip("Должна быть одна прямая")
+
+    @prepare_test
+    def test_4_update_curve(self, window: Viewer) -> None:
+        """
+        Test checks that the curve buffers are overwritten in place when the number of points does not change.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        curve = window.plot.add_curve()
+        curve.update_curve(np.array([-2.5, 0, 2.5]), np.array([-0.005, 0, 0.005]))
+        array_curve = curve.curve
+        assert isinstance(array_curve, ArrayCurve)
+
+        curve.update_curve(np.array([-2.0, 0, 2.0]), np.array([-0.003, 0, 0.003]))
+        assert curve.curve is array_curve
+        assert np.allclose(curve.data().xData(), [-2, 0, 2, -2])
+        assert np.allclose(curve.data().yData(), [-3, 0, 3, -3])
+
+        curve.update_curve(np.array([-2.0, 2.0]), np.array([-0.003, 0.003]))
+        assert curve.curve is not array_curve
+        assert len(curve.curve) == 2
+
+        window.setToolTip("Должна быть одна прямая")
+
+    @prepare_test
+    def test_5_stream_curve(self, window: Viewer) -> None:
+        """
+        Test checks adding points to the curve in streaming mode.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        curve = window.plot.add_curve()
+        curve.start_stream(4)
+        assert curve.is_streaming()
+        curve.append_points([-2.5, -1.5], [-0.005, -0.003])
+        curve.append_points([-0.5], [-0.001])
+        assert np.allclose(curve.data().xData(), [-2.5, -1.5, -0.5])
+        assert np.allclose(curve.data().yData(), [-5, -3, -1])
+
+        curve.append_points([0.5, 1.5, 2.5], [0.001, 0.003, 0.005])
+        assert np.allclose(curve.data().xData(), [-0.5, 0.5, 1.5, 2.5])
+        assert np.allclose(curve.data().yData(), [-1, 1, 3, 5])
+
+        curve.finish_stream()
+        assert not curve.is_streaming()
+        assert np.allclose(curve.curve.voltages, [-0.5, 0.5, 1.5, 2.5])
+        assert np.allclose(curve.curve.currents, [-0.001, 0.001, 0.003, 0.005])
+        assert curve.data().size() == 5
+
+        window.setToolTip("Должна быть одна прямая")
+
+    def test_6_decimate_min_max(self) -> None:
+        """
+        Test checks that decimation keeps the first and last points and the envelope of every pixel column.
+        """
+
+        x = np.repeat(np.arange(10, dtype=float), 100) + np.tile(np.linspace(0, 0.9, 100), 10)
+        y = np.sin(np.arange(1000))
+        reduced_x, reduced_y = decimate_min_max(x, y)
+        assert reduced_x.size == 40
+        assert reduced_x[0] == x[0] and reduced_y[0] == y[0]
+        assert reduced_x[-1] == x[-1] and reduced_y[-1] == y[-1]
+        for column in range(10):
+            column_y = y[column * 100:(column + 1) * 100]
+            reduced_column_y = reduced_y[np.floor(reduced_x) == column]
+            assert reduced_column_y.min() == column_y.min()
+            assert reduced_column_y.max() == column_y.max()
+
+    @prepare_test
+    def test_7_draw_decimated_curve(self, window: Viewer) -> None:
+        """
+        Test checks that dense curve is decimated once and the result is reused until data changes.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        voltages = 2.5 * np.sin(np.linspace(0, 2 * np.pi, 100000))
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve(voltages, voltages / 1000))
+        image = window.plot.grab()
+        polyline = curve._decimated_polyline
+        assert polyline is not None
+        assert polyline.size() < 10000
+
+        window.plot.grab()
+        assert curve._decimated_polyline is polyline
+
+        curve.update_curve(voltages, -voltages / 1000)
+        window.plot.grab()
+        assert curve._decimated_polyline is not polyline
+        assert not image.isNull()
+
+        window.setToolTip("Должна быть прямая")
+
+    @prepare_test
+    def test_8_set_curve_async(self, window: Viewer) -> None:
+        """
+        Test checks that curve is prepared in worker thread and data for replaced curve is dropped.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        changes = []
+        curve = window.plot.add_curve()
+        curve.curve_changed.connect(lambda: changes.append(curve.curve))
+        voltages = np.linspace(-2.5, 2.5, 1000)
+        curve_1 = ArrayCurve(voltages, voltages / 1000)
+        curve_2 = ArrayCurve(voltages, -voltages / 1000)
+        curve.set_curve_async(curve_1)
+        curve.set_curve_async(curve_2)
+        QThreadPool.globalInstance().waitForDone()
+        QApplication.processEvents()
+
+        assert changes == [curve_2]
+        assert curve.curve is curve_2
+        assert np.allclose(curve.data().yData()[:-1], -voltages)
+        assert curve.bounds == (-2.5, 2.5, -2.5, 2.5)
+
+        curve.set_curve_async(curve_1)
+        curve.set_curve(curve_2)
+        QThreadPool.globalInstance().waitForDone()
+        QApplication.processEvents()
+        assert curve.curve is curve_2
+
+        window.setToolTip("Должна быть прямая")
+
+    @prepare_test
+    def test_9_compact_storage(self, window: Viewer) -> None:
+        """
+        Test checks that curves are stored as float32 without copies in mA if compact storage policy is set.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        curve_1 = window.plot.add_curve()
+        curve_1.set_curve(Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005]))
+        window.plot.set_storage_policy(StoragePolicy(np.float32, False))
+        curve_2 = window.plot.add_curve()
+        curve_2.set_curve(Curve([-2.5, 2.5], [-0.003, 0.003]))
+
+        for curve in (curve_1, curve_2):
+            assert isinstance(curve.curve, ArrayCurve)
+            assert curve.curve.dtype == np.float32
+            assert curve.data().xData().dtype == np.float64
+            assert curve._currents_buffer is None
+        assert np.allclose(curve_1.data().yData(), [-5, 0, 5, -5])
+        assert np.allclose(curve_2.bounds, (-2.5, 2.5, -3, 3))
+        assert not window.plot.grab().isNull()
+
+        window.setToolTip("Должно быть две прямые")
+
+    @prepare_test
+    def test_10_skip_unchanged_curve(self, window: Viewer) -> None:
+        """
+        Test checks that curve with the same data as the shown curve is not redrawn.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        changes = []
+        curve = window.plot.add_curve()
+        curve.curve_changed.connect(lambda: changes.append(curve.curve))
+        curve_1 = Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005])
+        curve.set_curve(curve_1)
+        version = curve.data().version
+        curve.set_curve(Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005]))
+        curve.set_curve(curve_1)
+        assert changes == [curve_1]
+        assert curve.data().version == version
+
+        curve_1.currents[0] = -0.003
+        curve.set_curve(curve_1)
+        assert len(changes) == 2
+        assert curve.bounds == (-2.5, 2.5, -3, 5)
+
+        curve.set_curve(ArrayCurve(curve_1.voltages, curve_1.currents))
+        assert len(changes) == 3
+
+        window.setToolTip("Должна быть ломаная")
+
+    def test_11_segment_grid(self) -> None:
+        """
+        Test checks that the nearest segment found with grid index is the same as found by checking all segments.
+        """
+
+        random = np.random.RandomState(0)
+        x = np.cumsum(random.normal(0, 3, 5000)) + 400
+        y = np.cumsum(random.normal(0, 3, 5000)) + 300
+        x[100] = np.nan
+        x[200:210] = np.linspace(0, 2000, 10)
+        grid = SegmentGrid(x, y)
+        assert len(grid) == 4997
+
+        x_1, y_1, x_2, y_2 = x[:-1], y[:-1], x[1:], y[1:]
+        for query_x, query_y in random.uniform(-200, 1000, (200, 2)).tolist():
+            ratios = np.clip(((query_x - x_1) * (x_2 - x_1) + (query_y - y_1) * (y_2 - y_1)) /
+                             ((x_2 - x_1) ** 2 + (y_2 - y_1) ** 2), 0, 1)
+            distances = np.hypot(x_1 + ratios * (x_2 - x_1) - query_x, y_1 + ratios * (y_2 - y_1) - query_y)
+            distances[np.isnan(distances)] = np.inf
+            nearest = grid.find_nearest(query_x, query_y, 20)
+            if distances.min() > 20:
+                assert nearest is None
+            else:
+                assert nearest[0] == int(np.argmin(distances))
+                assert np.isclose(nearest[1], distances.min())
+
+    @prepare_test
+    def test_12_select_curve(self, window: Viewer) -> None:
+        """
+        Test checks that click near a curve selects and highlights it and click far from curves clears selection.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        angles = np.linspace(0, 2 * np.pi, 10000)
+        for radius in range(1, 6):
+            curve = window.plot.add_curve()
+            curve.set_curve(ArrayCurve(radius * np.cos(angles), radius * np.sin(angles) / 1000))
+        selected = []
+        window.plot.curve_selected.connect(selected.append)
+        window.plot.enable_curve_selection(True)
+        window.plot.canvas().grab()
+
+        canvas_pos = window.plot.canvas().pos()
+        x = round(window.plot.transform(QwtPlot.xBottom, 3.0)) + canvas_pos.x()
+        y = round(window.plot.transform(QwtPlot.yLeft, 0.0)) + canvas_pos.y()
+        window.plot.mousePressEvent(MouseEvent(QPoint(x + 2, y)))
+        assert window.plot.get_selected_curve() is window.plot.curves[2]
+        assert window.plot.curves[2].is_highlighted()
+
+        window.plot.mousePressEvent(MouseEvent(QPoint(x + 30, y)))
+        assert window.plot.get_selected_curve() is None
+        assert not window.plot.curves[2].is_highlighted()
+        window.plot.mousePressEvent(MouseEvent(QPoint(x + 2, y)))
+        assert selected == [window.plot.curves[2], None, window.plot.curves[2]]
+        window.setToolTip("Должно быть пять окружностей, средняя выделена")
+
+    @prepare_test
+    def test_13_curve_with_different_lengths(self, window: Viewer) -> None:
+        """
+        Test checks that curve with different numbers of voltages and currents is rejected and the shown curve is
+        kept.
+        :param window: viewer widget.
+        """
+
+        curve = window.plot.add_curve()
+        curve.set_curve(Curve([0, 1, 2], [0, 0.001, 0.002]))
+        for method in curve.set_curve, curve.set_curve_async:
+            with pytest.raises(ValueError, match="3 voltages and 2 currents"):
+                method(Curve([0, 1, 2], [0, 0.001]))
+        assert curve.curve == Curve([0, 1, 2], [0, 0.001, 0.002])
+        assert curve.dataSize() == 4
+        window.setToolTip("Должна быть прямая")
+
+    @prepare_test
+    def test_14_stream_keeps_values(self, window: Viewer) -> None:
+        """
+        Test checks that the curve collected in streaming mode has exactly the values that were added.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        angles = np.linspace(0, 2 * np.pi, 1000)
+        voltages = 5 * np.cos(angles)
+        currents = np.random.RandomState(0).rand(1000) * np.sin(angles) / 100
+
+        curve = window.plot.add_curve()
+        curve.start_stream(2000)
+        for start in range(0, voltages.size, 64):
+            curve.append_points(voltages[start:start + 64], currents[start:start + 64])
+            window.plot.canvas().grab()
+        assert np.allclose(curve.data().yData(), currents * 1000)
+        assert np.isclose(curve.bounds[3], currents.max() * 1000)
+
+        curve.finish_stream()
+        assert np.array_equal(curve.curve.voltages, voltages)
+        assert np.array_equal(curve.curve.currents, currents)
+        window.setToolTip("Должна быть одна кривая")
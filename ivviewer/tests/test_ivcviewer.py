@@ -1,10 +1,15 @@
 import os
 import re
 import sys
-from PyQt5.QtCore import QPoint, Qt
+import zipfile
+from unittest import mock
+import numpy as np
+import pytest
+from PyQt5.QtCore import QPoint, Qt, QThreadPool
 from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtTest import QTest
 from PyQt5.QtWidgets import QApplication
-from ivviewer import Curve, Viewer
+from ivviewer import ArrayCurve, Curve, Point, Viewer
 from .utils import prepare_test
 
 
@@ -208,3 +213,369 @@ class TestViewer:
         with open(os.path.join(dir_to_export, file_name), "r") as file:
             content = file.read()
         assert content == "\ncurve #1:\nВ, А\n-2.5, -0.005\n2.5, 0.005\n"
+
+    @prepare_test
+    def test_13_batch_update(self, window: Viewer) -> None:
+        """
+        Test checks that scale adjustment and curve_changed signal are deferred until the end of batch update.
+        :param window: viewer widget.
+        """
+
+        signals = []
+        window.plot.curve_changed.connect(lambda: signals.append(True))
+        with window.plot.batch():
+            for i in range(16):
+                curve = window.plot.add_curve()
+                curve.set_curve(Curve([-2.5, 2.5], [-0.001 * i, 0.001 * i]))
+            window.plot.set_scale(6.0, 15.0)
+            window.plot.set_lower_text("Текст внизу")
+            assert not signals
+            assert window.plot.axisScaleDiv(window.plot.xBottom).upperBound() != 6.0
+
+        window.setToolTip("Должно быть 16 прямых, шкала по X до 6, по Y до 15")
+        assert len(signals) == 1
+        assert window.plot.axisScaleDiv(window.plot.xBottom).upperBound() == 6.0
+        assert window.plot.axisScaleDiv(window.plot.yLeft).upperBound() == 15.0
+
+    @prepare_test
+    def test_14_limit_frame_rate(self, window: Viewer) -> None:
+        """
+        Test checks that changes made between two frames are shown with one replot.
+        :param window: viewer widget.
+        """
+
+        QApplication.processEvents()
+        replots = []
+        window.plot.replot = lambda: replots.append(True)
+        window.plot.set_max_frame_rate(30)
+        curve = window.plot.add_curve()
+        for i in range(10):
+            curve.set_curve(Curve([-2.5, 2.5], [-0.001 * i, 0.001 * i]))
+            window.plot.set_scale(6.0 + i, 15.0)
+        window.plot.add_cursor(QPoint(222, 51))
+        window.plot.cursors.move_cursor(Point(0.5, 1))
+        assert not replots
+        assert window.plot._replot_timer.isActive()
+
+        QTest.qWait(100)
+        window.setToolTip("Должна быть одна прямая и одна метка")
+        assert len(replots) == 1
+
+    @prepare_test
+    def test_15_autoscale(self, window: Viewer) -> None:
+        """
+        Test checks that scales are fitted to the curves, grow at once and are reduced only with hysteresis.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_min_borders(0.01, 0.01)
+        window.plot.enable_autoscale(True)
+        curve = window.plot.add_curve()
+        curve.set_curve(Curve([-2.5, 2.5], [-0.005, 0.005]))
+        assert curve.bounds == (-2.5, 2.5, -5, 5)
+        assert window.plot.x_scale == 5
+        assert window.plot.y_scale == 10
+
+        curve.update_curve([-2.0, 2.0], [-0.005, 0.005])
+        assert window.plot.x_scale == 5
+        curve.update_curve([-6.0, 6.0], [-0.005, 0.005])
+        assert window.plot.x_scale == 10
+
+        curve.update_curve([-0.1, 0.1], [-0.005, 0.005])
+        assert window.plot.x_scale == 0.2
+        curve.update_curve([-0.3, 0.3], [-0.005, 0.005])
+        assert window.plot.x_scale == 0.5
+        curve.update_curve([-0.1, 0.1], [-0.005, 0.005])
+        assert window.plot.x_scale == 0.5
+
+        window.setToolTip("Должна быть одна прямая, шкала по X до 0.5, по Y до 10")
+        assert window.plot.axisScaleDiv(window.plot.xBottom).upperBound() == 0.5
+
+    @prepare_test
+    def test_16_render_to_memory(self, window: Viewer) -> None:
+        """
+        Test checks rendering of plot to image and encoded bytes in memory.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+        curve = window.plot.add_curve()
+        curve.set_curve(Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005]))
+
+        image = window.plot.render_image((400, 300), dpi=144)
+        assert (image.width(), image.height()) == (400, 300)
+        assert image.dotsPerMeterX() == 5669
+        assert window.plot.render_to_bytes("png", (400, 300)).startswith(b"\x89PNG")
+        assert b"<svg" in window.plot.render_to_bytes("svg", (400, 300))
+        with pytest.raises(ValueError):
+            window.plot.render_to_bytes("unknown")
+
+        window.setToolTip("Должна быть прямая")
+
+    @prepare_test
+    def test_17_export_ivc_in_background(self, window: Viewer) -> None:
+        """
+        Test checks that curves are exported to file in worker thread.
+        :param window: viewer widget.
+        """
+
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve([-2.5, 2.5], [-0.005, 0.005]))
+        exported_files = []
+        progress = []
+        window.plot.ivc_export_finished.connect(exported_files.append)
+        window.plot.ivc_export_progress.connect(lambda written, total: progress.append((written, total)))
+
+        dir_to_export = os.path.join(os.path.curdir, "test_results")
+        window.plot.set_path_to_directory(dir_to_export)
+        window.plot.export_ivc(False, True)
+        QThreadPool.globalInstance().waitForDone()
+        QApplication.processEvents()
+        window.setToolTip("В папке test_results должен появиться csv файл")
+
+        assert len(exported_files) == 1
+        assert progress == [(2, 2)]
+        with open(exported_files[0], "r") as file:
+            content = file.read()
+        assert content == "\ncurve #1:\nВ, А\n-2.5, -0.005\n2.5, 0.005\n"
+
+    @prepare_test
+    def test_18_ivc_archive(self, window: Viewer) -> None:
+        """
+        Test checks export of curves to binary archive with and without compression and import from it.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+        curve_1 = window.plot.add_curve("Test curve")
+        curve_1.set_curve(Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005]))
+        curve_1.set_curve_params(QColor(0, 153, 255))
+        curve_2 = window.plot.add_curve("Reference curve")
+        curve_2.set_curve(ArrayCurve([-2.5, 2.5], [0.003, -0.003], dtype=np.float32))
+        window.plot.add_curve()
+
+        for compress in (False, True):
+            file_name = os.path.join(os.path.curdir, "test_results", f"ivc_archive_{int(compress)}.npz")
+            window.plot.export_ivc_archive(file_name, compress)
+            curves = window.plot.import_ivc_archive(file_name)
+
+            assert [curve.curve_title for curve in curves] == ["Test curve", "Reference curve"]
+            assert isinstance(curves[0].curve.voltages, np.memmap) != compress
+            if not compress:
+                assert curves[0].curve.voltages.ctypes.data % 64 == 0
+                assert curves[0].curve.currents.ctypes.data % 64 == 0
+            assert curves[1].curve.dtype == np.float64
+            assert np.allclose(curves[0].curve.currents, [-0.005, 0, 0.005])
+            assert np.allclose(curves[1].curve.voltages, [-2.5, 2.5])
+            assert curves[0].pen().color() == QColor(0, 153, 255)
+            assert np.allclose(curves[1].data().yData(), [3, -3, 3])
+            for curve in curves:
+                curve.detach()
+                window.plot.curves.remove(curve)
+
+        window.setToolTip("Должно быть две прямые")
+
+    @prepare_test
+    def test_19_import_ivc(self, window: Viewer) -> None:
+        """
+        Test checks import of curves from CSV file written by export_ivc.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+        curve = window.plot.add_curve()
+        curve.set_curve(Curve([-2.5, 0, 2.5], [-0.005, 0, 0.005]))
+        window.plot.add_curve("Reference curve").set_curve(Curve([-2.5, 2.5], [0.003, -0.003]))
+
+        dir_to_export = os.path.join(os.path.curdir, "test_results")
+        window.plot.set_path_to_directory(dir_to_export)
+        exported_files = []
+        window.plot.ivc_export_finished.connect(exported_files.append)
+        window.plot.export_ivc(False)
+        curves = window.plot.import_ivc(exported_files[0])
+
+        assert [curve.curve_title for curve in curves] == ["curve #1", "Reference curve"]
+        assert np.allclose(curves[0].curve.voltages, [-2.5, 0, 2.5])
+        assert np.allclose(curves[1].curve.currents, [0.003, -0.003])
+        assert len(window.plot.curves) == 4
+
+        window.setToolTip("Должно быть две прямые")
+
+    @prepare_test
+    def test_20_layered_rendering(self, window: Viewer) -> None:
+        """
+        Test checks that in layered rendering mode the plot looks the same and that curves are not redrawn when cursor
+        is moved.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        angles = np.linspace(0, 2 * np.pi, 1000)
+        for index in range(1, 4):
+            curve = window.plot.add_curve()
+            curve.set_curve(ArrayCurve(5 * np.cos(index * angles), index * np.sin(angles) / 1000))
+        window.plot.add_cursor(QPoint(300, 200))
+        window.plot.set_center_text("Текст")
+        image = window.plot.canvas().grab().toImage()
+
+        window.plot.enable_layered_rendering(True)
+        assert window.plot.canvas().grab().toImage() == image
+        static_layer = window.plot._static_layer
+        window.plot.cursors.move_cursor(Point(1.0, 2.0))
+        window.plot.canvas().grab()
+        assert window.plot._static_layer is static_layer
+
+        window.plot.curves[0].set_curve(ArrayCurve(angles - 3, np.sin(angles) / 1000))
+        window.plot.canvas().grab()
+        assert window.plot._static_layer is not static_layer
+        window.setToolTip("Должно быть три кривые, метка и текст в центре")
+
+    @prepare_test
+    def test_21_curve_layers(self, window: Viewer) -> None:
+        """
+        Test checks that in layered rendering mode with curve layers the plot looks the same and that only changed
+        curves are redrawn.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        angles = np.linspace(0, 2 * np.pi, 1000)
+        for index in range(1, 4):
+            curve = window.plot.add_curve()
+            curve.set_curve(ArrayCurve(5 * np.cos(index * angles), index * np.sin(angles) / 1000))
+        window.plot.add_cursor(QPoint(300, 200))
+        window.plot.enable_layered_rendering(True)
+        image = window.plot.canvas().grab().toImage()
+
+        window.plot.enable_layered_rendering(True, curve_layers=True)
+        assert window.plot.canvas().grab().toImage() == image
+        layers = [window.plot._curve_layers[curve][1] for curve in window.plot.curves]
+        window.plot.curves[0].set_curve(ArrayCurve(angles - 3, np.sin(angles) / 1000))
+        window.plot.canvas().grab()
+        assert window.plot._curve_layers[window.plot.curves[0]][1] is not layers[0]
+        for curve, layer in zip(window.plot.curves[1:], layers[1:]):
+            assert window.plot._curve_layers[curve][1] is layer
+
+        layers = [window.plot._curve_layers[curve][1] for curve in window.plot.curves]
+        window.plot.curves[1].set_curve_params(QColor(0, 0, 255))
+        window.plot.cursors.move_cursor(Point(1.0, 2.0))
+        window.plot.canvas().grab()
+        assert window.plot._curve_layers[window.plot.curves[1]][1] is not layers[1]
+        assert window.plot._curve_layers[window.plot.curves[2]][1] is layers[2]
+
+        window.plot.curves[2].setVisible(False)
+        window.plot.canvas().grab()
+        assert window.plot.curves[2] not in window.plot._curve_layers
+        window.plot.curves[2].setVisible(True)
+        window.setToolTip("Должно быть три кривые (одна синяя) и метка")
+
+    @prepare_test
+    def test_22_texts_on_overlay(self, window: Viewer) -> None:
+        """
+        Test checks that in layered rendering mode curves are not redrawn when texts and cursors are changed.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 15.0)
+        angles = np.linspace(0, 2 * np.pi, 1000)
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve(5 * np.cos(angles), np.sin(angles) / 1000))
+        window.plot.enable_layered_rendering(True)
+        window.plot.canvas().grab()
+        static_layer = window.plot._static_layer
+
+        window.plot.set_lower_text("Текст внизу")
+        window.plot.canvas().grab()
+        window.plot.clear_lower_text()
+        window.plot.set_lower_text("Новый текст внизу")
+        window.plot.add_cursor(QPoint(300, 200))
+        window.plot.canvas().grab()
+        assert window.plot._static_layer is static_layer
+
+        window.plot.clear_lower_text()
+        window.plot.remove_all_cursors()
+        window.plot.canvas().grab()
+        assert window.plot._static_layer is static_layer
+        window.plot.set_lower_text("Новый текст внизу")
+        window.setToolTip("Должна быть одна кривая и текст внизу")
+
+    @prepare_test
+    def test_23_import_ivc_archive_lazily(self, window: Viewer) -> None:
+        """
+        Test checks that data of memory-mapped curves is not read when archive is imported, but only when curves
+        are drawn.
+        :param window: viewer widget.
+        """
+
+        class TouchedMemmap(np.memmap):
+            touched: bool = False
+
+            def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+                TouchedMemmap.touched = True
+                inputs = tuple(np.asarray(value) if isinstance(value, np.memmap) else value for value in inputs)
+                return getattr(ufunc, method)(*inputs, **kwargs)
+
+        window.plot.set_min_borders(0.01, 0.01)
+        window.plot.enable_autoscale(True)
+        for factor in range(1, 4):
+            curve = window.plot.add_curve(f"R{factor}")
+            curve.set_curve(ArrayCurve([-2.5, 0, 2.5], [-0.001 * factor, 0, 0.001 * factor]))
+        file_name = os.path.join(os.path.curdir, "test_results", "ivc_archive_lazy.npz")
+        window.plot.export_ivc_archive(file_name)
+        for curve in list(window.plot.curves):
+            curve.detach()
+            window.plot.curves.remove(curve)
+
+        with mock.patch.object(np, "memmap", TouchedMemmap):
+            curves = window.plot.import_ivc_archive(file_name)
+        assert isinstance(curves[2].curve.currents, TouchedMemmap)
+        assert curves[2].bounds == (-2.5, 2.5, -3, 3)
+        assert window.plot.y_scale >= 3
+        assert not TouchedMemmap.touched
+
+        window.plot.canvas().grab()
+        assert TouchedMemmap.touched
+        window.setToolTip("Должно быть три прямые")
+
+    @prepare_test
+    def test_24_import_invalid_ivc_archive(self, window: Viewer) -> None:
+        """
+        Test checks that archive with invalid local header of member is not memory-mapped.
+        :param window: viewer widget.
+        """
+
+        curve = window.plot.add_curve()
+        curve.set_curve(ArrayCurve([-2.5, 0, 2.5], [-0.005, 0, 0.005]))
+        file_name = os.path.join(os.path.curdir, "test_results", "ivc_archive_invalid.npz")
+        window.plot.export_ivc_archive(file_name)
+        with zipfile.ZipFile(file_name) as archive:
+            header_offset = archive.getinfo("currents.npy").header_offset
+        with open(file_name, "r+b") as file:
+            file.seek(header_offset)
+            file.write(b"PK\x05\x06")
+
+        with pytest.raises(ValueError):
+            window.plot.import_ivc_archive(file_name)
+        window.setToolTip("Должна быть одна прямая")
+
+    @prepare_test
+    def test_25_export_ivc_with_integers(self, window: Viewer) -> None:
+        """
+        Test checks that integer values of curves with lists are exported without decimal point.
+        :param window: viewer widget.
+        """
+
+        curve = window.plot.add_curve()
+        curve.set_curve(Curve([-2.5, 0, 2.5, 1], [-0.005, 0, 0.005, 0.0]))
+        curve = window.plot.add_curve()
+        curve.set_curve(Curve([-1, 1], [0, 0]))
+        exported_files = []
+        window.plot.ivc_export_finished.connect(exported_files.append)
+
+        window.plot.set_path_to_directory(os.path.join(os.path.curdir, "test_results"))
+        window.plot.export_ivc(False)
+        window.setToolTip("В папке test_results должен появиться csv файл")
+
+        with open(exported_files[0], "r") as file:
+            content = file.read()
+        assert content == "\ncurve #1:\nВ, А\n-2.5, -0.005\n0, 0\n2.5, 0.005\n1, 0.0\n\ncurve #2:\nВ, А\n-1, 0\n1, 0\n"
@@ -0,0 +1,122 @@
+import os
+import numpy as np
+import pytest
+from PyQt5.QtGui import QImage
+from ivviewer import Viewer
+from ivviewer.__main__ import main
+from ivviewer.ivc_file import read_ivc
+from ivviewer.render import find_curve_files, render_files
+from .utils import prepare_test
+
+
+DIR_NAME = os.path.join(os.path.curdir, "test_results", "render")
+FILE_CONTENT = "\ncurve #1:\nВ, А\n-2.5, -0.005\n0, 0\n2.5, 0.005\n\ncurve #2:\nВ, А\n-2.5, 0.003\n2.5, -0.003\n"
+
+
+def create_curve_files(number: int) -> str:
+    """
+    :param number: number of CSV files to create.
+    :return: directory with CSV files.
+    """
+
+    input_dir = os.path.join(DIR_NAME, "input")
+    os.makedirs(input_dir, exist_ok=True)
+    for index in range(number):
+        with open(os.path.join(input_dir, f"ivc_{index}.csv"), "w") as file:
+            file.write(FILE_CONTENT)
+    return input_dir
+
+
+class TestRender:
+
+    def test_1_read_ivc(self) -> None:
+        """
+        Test checks reading of CSV file with curves.
+        """
+
+        input_dir = create_curve_files(1)
+        curves = read_ivc(os.path.join(input_dir, "ivc_0.csv"))
+        assert [curve.title for curve in curves] == ["curve #1", "curve #2"]
+        assert (curves[0].x_unit, curves[0].y_unit) == ("В", "А")
+        assert np.allclose(curves[0].curve.voltages, [-2.5, 0, 2.5])
+        assert np.allclose(curves[1].curve.currents, [0.003, -0.003])
+
+    @prepare_test
+    def test_2_render_in_current_process(self, window: Viewer) -> None:
+        """
+        Test checks rendering of files to images in the current process.
+        :param window: viewer widget.
+        """
+
+        input_dir = create_curve_files(2)
+        output_dir = os.path.join(DIR_NAME, "output")
+        images = render_files(find_curve_files(input_dir), output_dir, jobs=1, size=(400, 300))
+        assert [os.path.basename(image) for image in images] == ["ivc_0.png", "ivc_1.png"]
+        assert QImage(images[0]).width() == 400
+
+        window.setToolTip("В папке test_results/render/output должны появиться png изображения")
+
+    def test_3_render_in_process_pool(self) -> None:
+        """
+        Test checks rendering of each curve to separate image in pool of processes.
+        """
+
+        input_dir = create_curve_files(2)
+        output_dir = os.path.join(DIR_NAME, "output_pool")
+        images = render_files(find_curve_files(input_dir), output_dir, jobs=2, split=True)
+        expected_images = ["ivc_0_1.png", "ivc_0_2.png", "ivc_1_1.png", "ivc_1_2.png"]
+        assert sorted(os.path.basename(image) for image in images) == expected_images
+        assert all(os.path.isfile(image) for image in images)
+
+    def test_4_invalid_image_format(self) -> None:
+        """
+        Test checks that command line rejects unknown image format.
+        """
+
+        input_dir = create_curve_files(1)
+        with pytest.raises(SystemExit):
+            main(["render", input_dir, os.path.join(DIR_NAME, "output_gif"), "--format", "gif"])
+        assert not os.path.exists(os.path.join(DIR_NAME, "output_gif"))
+
+    def test_5_read_invalid_ivc(self) -> None:
+        """
+        Test checks that reading of CSV file with invalid values of curve raises error with title of the curve.
+        """
+
+        os.makedirs(DIR_NAME, exist_ok=True)
+        file_name = os.path.join(DIR_NAME, "invalid.csv")
+        for values in ("-2.5, x\n2.5, 0.005", "-2.5, -0.005, 0\n2.5", "-2.5\n2.5", "-2.5, -0.005\n\n2.5, 0.005"):
+            with open(file_name, "w") as file:
+                file.write(f"\ncurve #1:\nВ, А\n-2.5, -0.005\n\ncurve #2:\nВ, А\n{values}\n")
+            with pytest.raises(ValueError, match="curve #2"):
+                read_ivc(file_name)
+
+    def test_6_render_with_invalid_file(self, capsys) -> None:
+        """
+        Test checks that invalid CSV file does not stop rendering of other files and is reported by command line.
+        :param capsys: fixture to capture output.
+        """
+
+        input_dir = os.path.join(DIR_NAME, "input_invalid")
+        os.makedirs(input_dir, exist_ok=True)
+        for file_name, content in ("ivc_0.csv", FILE_CONTENT), ("ivc_1.csv", "\ncurve #1:\nВ, А\n-2.5, x\n"), \
+                ("ivc_2.csv", FILE_CONTENT):
+            with open(os.path.join(input_dir, file_name), "w") as file:
+                file.write(content)
+
+        errors = []
+        images = render_files(find_curve_files(input_dir), os.path.join(DIR_NAME, "output_invalid"), jobs=1,
+                              errors=errors)
+        assert [os.path.basename(image) for image in images] == ["ivc_0.png", "ivc_2.png"]
+        assert [os.path.basename(file_name) for file_name, _ in errors] == ["ivc_1.csv"]
+        assert "curve #1" in errors[0][1]
+        with pytest.raises(ValueError, match="ivc_1.csv"):
+            render_files(find_curve_files(input_dir), os.path.join(DIR_NAME, "output_invalid"), jobs=1)
+
+        with pytest.raises(SystemExit) as exc_info:
+            main(["render", input_dir, os.path.join(DIR_NAME, "output_invalid_pool"), "--jobs", "2"])
+        assert exc_info.value.code == 1
+        output = capsys.readouterr()
+        assert "2 images saved" in output.out
+        assert "ivc_1.csv" in output.err
+        assert sorted(os.listdir(os.path.join(DIR_NAME, "output_invalid_pool"))) == ["ivc_0.png", "ivc_2.png"]
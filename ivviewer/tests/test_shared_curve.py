@@ -0,0 +1,92 @@
+import numpy as np
+from ivviewer import Viewer
+from ivviewer.shared_curve import SharedCurveBuffer, SharedCurveSource
+from .utils import prepare_test
+
+
+class TestSharedCurve:
+
+    @prepare_test
+    def test_1_update_curve_from_shared_memory(self, window: Viewer) -> None:
+        """
+        Test checks that the curve is updated when new data is written to the shared memory.
+        :param window: viewer widget.
+        """
+
+        window.plot.set_scale(6.0, 6.0)
+
+        writer = SharedCurveBuffer.create(100, x_unit="V", y_unit="A")
+        reader = SharedCurveBuffer.attach(writer.name)
+        try:
+            assert reader.units == ("V", "A")
+            curve = window.plot.add_curve()
+            source = SharedCurveSource(reader, curve)
+            assert not source.check_buffer()
+            assert curve.curve is None
+
+            writer.write([-2.5, 0, 2.5], [-0.005, 0, 0.005])
+            assert source.check_buffer()
+            assert not source.check_buffer()
+            assert np.allclose(curve.curve.voltages, [-2.5, 0, 2.5])
+            assert np.allclose(curve.data().yData(), [-5, 0, 5, -5])
+
+            array_curve = curve.curve
+            writer.write([-2.5, 0, 2.5], [-0.003, 0, 0.003])
+            assert source.check_buffer()
+            assert curve.curve is array_curve
+            assert np.allclose(curve.curve.currents, [-0.003, 0, 0.003])
+            voltages = curve.curve.voltages
+            writer.write([-2.5, 0, 2.5], [-0.004, 0, 0.004])
+            assert source.check_buffer()
+            assert np.shares_memory(curve.curve.voltages, voltages)
+            assert np.allclose(curve.data().yData(), [-4, 0, 4, -4])
+
+            writer.write([-2.5, -1, 0, 2.5], [-0.005, -0.002, 0, 0.005])
+            assert source.check_buffer()
+            assert curve.curve is not array_curve
+            assert np.allclose(curve.curve.voltages, [-2.5, -1, 0, 2.5])
+            assert np.allclose(curve.data().yData(), [-5, -2, 0, 5, -5])
+        finally:
+            reader.close()
+            writer.close()
+
+        window.setToolTip("Должна быть одна прямая")
+
+    @prepare_test
+    def test_2_skip_torn_data(self, window: Viewer) -> None:
+        """
+        Test checks that the curve is not changed if the data was being written while it was read from the shared
+        memory.
+        :param window: viewer widget.
+        """
+
+        def read_torn_data(voltages: np.ndarray, currents: np.ndarray) -> None:
+            voltages[:] = np.nan
+            currents[:] = np.nan
+            return None
+
+        window.plot.set_scale(6.0, 6.0)
+
+        writer = SharedCurveBuffer.create(100)
+        reader = SharedCurveBuffer.attach(writer.name)
+        try:
+            curve = window.plot.add_curve()
+            source = SharedCurveSource(reader, curve)
+            writer.write([-2.5, 0, 2.5], [-0.005, 0, 0.005])
+            assert source.check_buffer()
+
+            read = reader.read
+            reader.read = read_torn_data
+            writer.write([-2.5, 0, 2.5], [-0.003, 0, 0.003])
+            assert not source.check_buffer()
+            assert np.allclose(curve.curve.currents, [-0.005, 0, 0.005])
+            assert np.allclose(curve.data().yData(), [-5, 0, 5, -5])
+
+            reader.read = read
+            assert source.check_buffer()
+            assert np.allclose(curve.data().yData(), [-3, 0, 3, -3])
+        finally:
+            reader.close()
+            writer.close()
+
+        window.setToolTip("Должна быть одна прямая")